@@ -1,6 +1,7 @@
 """The Teufel Raumfeld (Raumkernel Addon) integration."""
 
 import logging
+from dataclasses import dataclass
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_PORT, Platform
@@ -8,12 +9,21 @@ from homeassistant.core import HomeAssistant
 
 from .api import RaumfeldApiClient
 from .const import DOMAIN
+from .room_store import RaumfeldRoomStore
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER, Platform.BUTTON, Platform.SENSOR]
 
 
+@dataclass
+class RaumfeldData:
+    """Objects shared by the platforms of a config entry."""
+
+    client: RaumfeldApiClient
+    rooms: RaumfeldRoomStore
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Teufel Raumfeld (Raumkernel Addon) from a config entry."""
     hass.data.setdefault(DOMAIN, {})
@@ -22,13 +32,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     port = entry.data[CONF_PORT]
 
     client = RaumfeldApiClient(host, port)
+    # Created before connecting, so the store sees every room the client mirrors
+    rooms = RaumfeldRoomStore(client)
 
     # Connect in background to avoid blocking startup
     entry.async_create_background_task(
         hass, client.connect(), "teufel_raumfeld_raumkernel_connect"
     )
 
-    hass.data[DOMAIN][entry.entry_id] = client
+    hass.data[DOMAIN][entry.entry_id] = RaumfeldData(client, rooms)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -40,7 +52,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(
         hass, entry, PLATFORMS
     ):
-        client = hass.data[DOMAIN].pop(entry.entry_id)
-        await client.close()
+        data: RaumfeldData = hass.data[DOMAIN].pop(entry.entry_id)
+        data.rooms.close()
+        await data.client.close()
 
     return unload_ok
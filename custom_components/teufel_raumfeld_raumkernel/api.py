@@ -1,15 +1,83 @@
 """API Client for Teufel Raumfeld (Raumkernel Addon)."""
 
 import asyncio
+import itertools
 import json
 import logging
-from collections.abc import Callable
+import random
+from collections.abc import Callable, Iterable
 from typing import Any
+from urllib.parse import urlencode
 
 import aiohttp
+from homeassistant.exceptions import HomeAssistantError
+
+from .browse_cache import BrowseCache
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
 
 _LOGGER = logging.getLogger(__name__)
 
+# WebSocket subprotocols selecting the add-on's frame encoding, in order of
+# preference. Add-ons that don't know them fall back to JSON text frames.
+SUBPROTOCOLS: tuple[str, ...] = (
+    ("raumkernel.msgpack", "raumkernel.json")
+    if MSGPACK_AVAILABLE
+    else ("raumkernel.json",)
+)
+
+# Seconds to wait for the add-on's hello message after connecting
+HELLO_TIMEOUT = 5.0
+
+# Reconnect delays in seconds. The first retry comes quickly to ride out add-on
+# restarts; later ones back off exponentially with jitter so that several HA
+# instances don't reconnect in lockstep.
+RECONNECT_INITIAL_DELAY = 0.5
+RECONNECT_MAX_DELAY = 60.0
+
+# Seconds a connection must stay up before the reconnect delay starts over, so
+# that an add-on which drops every connection right away is still backed off
+RECONNECT_STABLE_AFTER = 30.0
+
+# Seconds to wait for a command result. Commands that may have to transition a
+# room out of Spotify mode or regroup zones take considerably longer.
+DEFAULT_COMMAND_TIMEOUT = 10.0
+COMMAND_TIMEOUTS: dict[str, float] = {
+    "play": 20.0,
+    "load": 20.0,
+    "loadContainer": 20.0,
+    "loadSingle": 20.0,
+    "selectSource": 20.0,
+    "joinGroup": 30.0,
+    "leaveGroup": 30.0,
+}
+
+# Operations per batch frame the add-on accepts
+BATCH_MAX_OPERATIONS = 100
+
+# Renderers the add-on drives in parallel during a batch (its default)
+BATCH_CONCURRENCY = 4
+
+# Upper bound in seconds for waiting on a batch result
+BATCH_MAX_TIMEOUT = 120.0
+
+
+MessageListener = Callable[[dict[str, Any]], None]
+RoomListener = Callable[[dict[str, Any]], None]
+
+
+class RaumfeldCommandError(HomeAssistantError):
+    """A command failed on the Raumkernel add-on."""
+
+
+class RaumfeldCommandTimeout(RaumfeldCommandError):
+    """The Raumkernel add-on did not answer a command in time."""
+
 
 class RaumfeldApiClient:
     """Teufel Raumfeld API Client."""
@@ -25,47 +93,85 @@ class RaumfeldApiClient:
         self._port = port
         self._session = session
         self._ws: aiohttp.ClientWebSocketResponse | None = None
-        self._listeners: list[Callable[[dict[str, Any]], None]] = []
         self._loop = asyncio.get_running_loop()
 
+        # Local mirror of the add-on's room state, kept in sync via stateDelta
+        self._rooms: dict[str, dict[str, Any]] = {}
+        self._state_version: int | None = None
+        self._state_epoch: str | None = None
+        self._resync_pending = False
+        # Set while the add-on serves rooms restored from its snapshot, whose
+        # playback state is unknown until it reaches the Raumfeld system
+        self._stale = False
+
+        # Listeners indexed by message type (None = every message) and by room UDN
+        self._listeners: dict[str | None, list[MessageListener]] = {}
+        self._room_listeners: dict[str, list[RoomListener]] = {}
+
+        # Protocol features announced by the add-on, and commands awaiting a reply
+        self._server_features: set[str] = set()
+        self._request_ids = itertools.count(1)
+        self._pending: dict[int | str, asyncio.Future[Any]] = {}
+
+        # Browse results, invalidated by the add-on when containers change
+        self._browse_cache = BrowseCache()
+
     @property
     def connected(self) -> bool:
         """Return True if connected."""
         return self._ws is not None and not self._ws.closed
 
+    @property
+    def stale(self) -> bool:
+        """Return True while the rooms are restored ones with unknown state."""
+        return self._stale
+
+    @property
+    def rooms(self) -> list[dict[str, Any]]:
+        """Return the rooms currently known from the add-on."""
+        return list(self._rooms.values())
+
+    def get_room(self, udn: str) -> dict[str, Any] | None:
+        """Return the mirrored state of a room, or None if it is unknown."""
+        return self._rooms.get(udn)
+
     async def connect(self) -> None:
         """Connect to the WebSocket and maintain connection."""
         if self._session is None:
             self._session = aiohttp.ClientSession()
 
-        url = f"ws://{self._host}:{self._port}"
-
+        attempt = 0
         while True:
+            url = self._build_url()
+            connected_at: float | None = None
             try:
                 _LOGGER.debug("Connecting to %s", url)
-                self._ws = await self._session.ws_connect(url)
+                # compress=15 negotiates permessage-deflate
+                self._ws = await self._session.ws_connect(
+                    url, protocols=SUBPROTOCOLS, compress=15
+                )
                 _LOGGER.info(
-                    "Connected to Teufel Raumfeld (Raumkernel Addon) at %s", url
+                    "Connected to Teufel Raumfeld (Raumkernel Addon) at %s (%s)",
+                    url,
+                    self._ws.protocol or "json",
                 )
 
-                # Fetch initial state
-                await self.get_zones()
+                # The add-on sends its features and a full snapshot on connect,
+                # or only the missed deltas if it could resume the session
+                await self._receive_hello()
+                connected_at = self._loop.time()
 
                 # Listen for messages - this blocks until connection is closed
                 await self._listen()
 
-                _LOGGER.warning(
-                    "Disconnected from Teufel Raumfeld (Raumkernel Addon). "
-                    "Reconnecting in 5s..."
-                )
+                _LOGGER.warning("Disconnected from Teufel Raumfeld (Raumkernel Addon)")
 
             except asyncio.CancelledError:
                 _LOGGER.debug("Connection task cancelled")
                 raise
             except (aiohttp.ClientError, OSError) as err:
                 _LOGGER.warning(
-                    "Failed to connect to Teufel Raumfeld (Raumkernel Addon) at "
-                    "%s: %s. Retrying in 5s...",
+                    "Failed to connect to Teufel Raumfeld (Raumkernel Addon) at %s: %s",
                     url,
                     str(err) or type(err).__name__,
                 )
@@ -76,9 +182,40 @@ class RaumfeldApiClient:
             if self._ws and not self._ws.closed:
                 await self._ws.close()
             self._ws = None
+            self._fail_pending(
+                RaumfeldCommandError("Connection to Raumkernel add-on lost")
+            )
 
-            # Wait before retrying
-            await asyncio.sleep(5)
+            if (
+                connected_at is not None
+                and self._loop.time() - connected_at >= RECONNECT_STABLE_AFTER
+            ):
+                attempt = 0
+            delay = self._reconnect_delay(attempt)
+            attempt += 1
+            _LOGGER.info("Reconnecting in %.1fs", delay)
+            await asyncio.sleep(delay)
+
+    def _build_url(self) -> str:
+        """Return the WebSocket URL for the next connection attempt."""
+        # delta=1 asks the add-on for versioned per-room deltas instead of
+        # a fullStateUpdate on every change. Older add-ons ignore it.
+        params: dict[str, Any] = {"delta": 1}
+        if (
+            self._state_epoch is not None
+            and self._state_version is not None
+            and not self._resync_pending
+        ):
+            # Lets the add-on send only what changed while we were away
+            params["since"] = self._state_version
+            params["epoch"] = self._state_epoch
+        return f"ws://{self._host}:{self._port}/?{urlencode(params)}"
+
+    @staticmethod
+    def _reconnect_delay(attempt: int) -> float:
+        """Return the jittered delay before reconnect attempt number `attempt`."""
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_INITIAL_DELAY * 2**attempt)
+        return random.uniform(delay / 2, delay)
 
     async def close(self) -> None:
         """Close the client."""
@@ -87,18 +224,45 @@ class RaumfeldApiClient:
         if self._session and not self._session.closed:
             await self._session.close()
 
+    async def _receive_hello(self) -> None:
+        """Read the add-on's hello message to learn its protocol features."""
+        self._server_features = set()
+        self._state_epoch = None
+        # Invalidations sent while disconnected were missed
+        self._browse_cache.invalidate()
+        try:
+            msg = await self._ws.receive(timeout=HELLO_TIMEOUT)
+        except TimeoutError:
+            return
+
+        if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+            data = self._decode(msg)
+            if data and data.get("type") == "hello":
+                payload = data.get("payload", {})
+                self._server_features = set(payload.get("features", []))
+                self._state_epoch = payload.get("epoch")
+                # A resumed connection may not receive a delta carrying the flag
+                if self._update_stale(payload.get("stale", False)):
+                    self._notify_rooms_changed(self.rooms)
+                _LOGGER.debug(
+                    "Add-on features: %s, resumed: %s",
+                    self._server_features,
+                    payload.get("resumed", False),
+                )
+            elif data:
+                # Add-ons without a hello message start with the state snapshot
+                self._handle_message(data)
+
     async def _listen(self) -> None:
         """Listen for messages."""
         if not self._ws:
             return
 
         async for msg in self._ws:
-            if msg.type == aiohttp.WSMsgType.TEXT:
-                try:
-                    data = json.loads(msg.data)
-                    self._dispatch_event(data)
-                except json.JSONDecodeError:
-                    _LOGGER.error("Received invalid JSON: %s", msg.data)
+            if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                data = self._decode(msg)
+                if data is not None:
+                    self._handle_message(data)
             elif msg.type == aiohttp.WSMsgType.ERROR:
                 _LOGGER.error(
                     "WebSocket connection closed with exception %s",
@@ -106,25 +270,225 @@ class RaumfeldApiClient:
                 )
                 break
 
+    def _decode(self, msg: aiohttp.WSMessage) -> dict[str, Any] | None:
+        """Decode a JSON text frame or a MessagePack binary frame."""
+        if msg.type == aiohttp.WSMsgType.BINARY:
+            if not MSGPACK_AVAILABLE:
+                _LOGGER.error("Received binary frame but msgpack is not available")
+                return None
+            try:
+                return msgpack.unpackb(msg.data)
+            except (ValueError, msgpack.UnpackException) as err:
+                _LOGGER.error("Received invalid MessagePack frame: %s", err)
+                return None
+
+        try:
+            return json.loads(msg.data)
+        except json.JSONDecodeError:
+            _LOGGER.error("Received invalid JSON: %s", msg.data)
+            return None
+
+    def _handle_message(self, data: dict[str, Any]) -> None:
+        """Resolve command replies, dispatch everything else."""
+        msg_type = data.get("type")
+        if msg_type in ("result", "error") and data.get("id") is not None:
+            future = self._pending.pop(data["id"], None)
+            if future is not None and not future.done():
+                if msg_type == "result":
+                    future.set_result(data.get("payload"))
+                else:
+                    future.set_exception(
+                        RaumfeldCommandError(data.get("error") or "Command failed")
+                    )
+            return
+
+        if msg_type == "browseResult":
+            # Add-ons without request IDs answer browse commands with this frame
+            payload = data.get("payload", {})
+            future = self._pending.pop(f"browse:{payload.get('objectId')}", None)
+            if future is not None and not future.done():
+                future.set_result(payload.get("items", []))
+            return
+
+        if msg_type == "browseInvalidated":
+            self._browse_cache.invalidate(data.get("payload", {}).get("objectIds"))
+
+        self._dispatch_event(data)
+
+    def _fail_pending(self, err: Exception) -> None:
+        """Fail all commands that are still waiting for a reply."""
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(err)
+
     def _dispatch_event(self, data: dict[str, Any]) -> None:
-        """Dispatch events to listeners."""
-        for listener in self._listeners:
+        """Update the local room mirror and route the message to its listeners.
+
+        Room-carrying messages are folded into the mirror once. Only the rooms
+        that actually changed are handed to their room listeners and announced
+        to "roomsChanged" listeners.
+        """
+        msg_type = data.get("type")
+        changed_rooms: list[dict[str, Any]] = []
+
+        if msg_type == "stateDelta":
+            changed_rooms = self._apply_delta(data.get("payload", {}))
+        elif msg_type == "fullStateUpdate":
+            payload = data.get("payload", {})
+            changed_rooms = self._apply_snapshot(
+                payload.get("availableRooms", []), data.get("version")
+            )
+            if self._update_stale(payload.get("stale", False)):
+                changed_rooms = self.rooms
+        elif msg_type in ("zones", "zoneStateChanged"):
+            changed_rooms = self._apply_snapshot(
+                data.get("payload", []), data.get("version")
+            )
+
+        self._notify(self._listeners.get(msg_type, ()), data)
+        self._notify(self._listeners.get(None, ()), data)
+        self._notify_rooms_changed(changed_rooms)
+
+    def _notify_rooms_changed(self, changed_rooms: list[dict[str, Any]]) -> None:
+        """Hand changed rooms to their room and "roomsChanged" listeners."""
+        if not changed_rooms:
+            return
+
+        self._notify(
+            self._listeners.get("roomsChanged", ()),
+            {"type": "roomsChanged", "payload": changed_rooms},
+        )
+        for room in changed_rooms:
+            self._notify(self._room_listeners.get(room["udn"], ()), room)
+
+    @staticmethod
+    def _notify(listeners: Iterable[Callable[[Any], None]], data: Any) -> None:
+        """Call listeners, isolating their errors."""
+        # Copy, listeners may unregister themselves while being called
+        for listener in list(listeners):
             try:
                 listener(data)
             except Exception as err:
                 _LOGGER.error("Error in listener: %s", err)
 
-    def register_listener(self, listener: Callable[[dict[str, Any]], None]) -> None:
-        """Register a message listener."""
-        self._listeners.append(listener)
+    def _apply_snapshot(
+        self, rooms: list[dict[str, Any]], version: int | None
+    ) -> list[dict[str, Any]]:
+        """Replace the room mirror with a full snapshot.
+
+        Returns the rooms that differ from the previous mirror.
+        """
+        previous = self._rooms
+        # Copies, deltas update the mirrored rooms in place
+        self._rooms = {room["udn"]: dict(room) for room in rooms}
+        self._state_version = version
+        self._resync_pending = False
+        return [room for udn, room in self._rooms.items() if previous.get(udn) != room]
+
+    def _apply_delta(self, delta: dict[str, Any]) -> list[dict[str, Any]]:
+        """Apply a stateDelta to the room mirror.
+
+        Returns the complete dicts of the rooms that changed. If the delta does
+        not directly follow the mirrored version, a full snapshot is requested
+        instead and nothing is returned.
+        """
+        base_version = delta.get("baseVersion")
+        if self._state_version is None or base_version != self._state_version:
+            if not self._resync_pending:
+                _LOGGER.debug(
+                    "State version gap (have %s, delta based on %s), resyncing",
+                    self._state_version,
+                    base_version,
+                )
+                self._resync_pending = True
+                self._loop.create_task(self._request_snapshot())
+            return []
 
-    def unregister_listener(self, listener: Callable[[dict[str, Any]], None]) -> None:
-        """Unregister a message listener."""
-        if listener in self._listeners:
-            self._listeners.remove(listener)
+        changed_rooms = []
+        for udn, patch in delta.get("rooms", {}).items():
+            # The delta belongs to the message, which other listeners also get
+            patch = dict(patch)
+            now_playing = patch.pop("nowPlaying", None)
+            room = self._rooms.get(udn)
+            if room is None:
+                room = self._rooms[udn] = patch
+                if now_playing is not None:
+                    room["nowPlaying"] = dict(now_playing)
+            else:
+                room.update(patch)
+                if now_playing:
+                    room["nowPlaying"] = {**room.get("nowPlaying", {}), **now_playing}
+            changed_rooms.append(room)
+
+        for udn in delta.get("removed", []):
+            self._rooms.pop(udn, None)
+
+        self._state_version = delta["version"]
+        if self._update_stale(delta.get("stale", False)):
+            return self.rooms
+        return changed_rooms
+
+    def _update_stale(self, stale: bool) -> bool:
+        """Record whether the rooms are stale; return True if that changed.
+
+        Every room is affected by a change, as entities are unavailable while
+        the rooms are stale.
+        """
+        if stale == self._stale:
+            return False
+        self._stale = stale
+        return True
+
+    async def _request_snapshot(self) -> None:
+        """Request a full state snapshot after a version gap."""
+        try:
+            await self.get_zones()
+        except ConnectionError:
+            # The snapshot sent on reconnect resyncs the mirror
+            pass
+        except RaumfeldCommandError as err:
+            _LOGGER.warning("Could not request a state snapshot: %s", err)
+        finally:
+            # Lets the next version gap request a snapshot again, otherwise the
+            # mirror would ignore every delta until reconnecting
+            self._resync_pending = False
+
+    def register_listener(
+        self, listener: MessageListener, message_type: str | None = None
+    ) -> None:
+        """Register a listener for one message type, or for every message."""
+        self._listeners.setdefault(message_type, []).append(listener)
 
-    async def send_command(self, command: str, payload: dict[str, Any]) -> None:
-        """Send a command."""
+    def unregister_listener(
+        self, listener: MessageListener, message_type: str | None = None
+    ) -> None:
+        """Unregister a message listener."""
+        listeners = self._listeners.get(message_type, [])
+        if listener in listeners:
+            listeners.remove(listener)
+
+    def register_room_listener(self, room_udn: str, listener: RoomListener) -> None:
+        """Register a listener called with the room's state whenever it changes."""
+        self._room_listeners.setdefault(room_udn, []).append(listener)
+
+    def unregister_room_listener(self, room_udn: str, listener: RoomListener) -> None:
+        """Unregister a room listener."""
+        listeners = self._room_listeners.get(room_udn, [])
+        if listener in listeners:
+            listeners.remove(listener)
+        if not listeners:
+            self._room_listeners.pop(room_udn, None)
+
+    async def send_command(
+        self, command: str, payload: dict[str, Any], timeout: float | None = None
+    ) -> Any:
+        """Send a command and wait for its result.
+
+        Raises RaumfeldCommandError if the add-on reports a failure and
+        RaumfeldCommandTimeout if it does not answer in time. Add-ons that do not
+        support replies are sent the command without waiting.
+        """
         if not self._ws or self._ws.closed:
             _LOGGER.error(
                 "Not connected to Teufel Raumfeld (Raumkernel Addon) (ws=%s)", self._ws
@@ -133,7 +497,85 @@ class RaumfeldApiClient:
 
         _LOGGER.info("Sending command %s with payload %s", command, payload)
         msg = {"command": command, "payload": payload}
-        await self._ws.send_json(msg)
+        if "ack" not in self._server_features:
+            await self._ws.send_json(msg)
+            return None
+
+        request_id = next(self._request_ids)
+        msg["id"] = request_id
+        future = self._pending[request_id] = self._loop.create_future()
+
+        if timeout is None:
+            timeout = COMMAND_TIMEOUTS.get(command, DEFAULT_COMMAND_TIMEOUT)
+
+        try:
+            await self._ws.send_json(msg)
+            return await asyncio.wait_for(future, timeout=timeout)
+        except TimeoutError as err:
+            raise RaumfeldCommandTimeout(
+                f"Timeout waiting for {command} after {timeout}s"
+            ) from err
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def batch(
+        self, operations: Iterable[tuple[str, dict[str, Any]]]
+    ) -> list[Any]:
+        """Run several commands in one round-trip.
+
+        Returns one entry per operation: its result, or the RaumfeldCommandError
+        it failed with. Add-ons without batch support get the commands one by one.
+        """
+        operations = list(operations)
+        if not operations:
+            return []
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            raise ValueError(f"At most {BATCH_MAX_OPERATIONS} operations per batch")
+
+        if "batch" not in self._server_features:
+            results: list[Any] = []
+            for command, payload in operations:
+                try:
+                    results.append(await self.send_command(command, payload))
+                except RaumfeldCommandError as err:
+                    results.append(err)
+            return results
+
+        replies = await self.send_command(
+            "batch",
+            {
+                "operations": [
+                    {"command": command, "payload": payload}
+                    for command, payload in operations
+                ]
+            },
+            timeout=self._batch_timeout(operations),
+        )
+        return [
+            reply.get("result")
+            if reply.get("ok")
+            else RaumfeldCommandError(reply.get("error") or "Unknown error")
+            for reply in replies
+        ]
+
+    def _batch_timeout(self, operations: list[tuple[str, dict[str, Any]]]) -> float:
+        """Return how long a batch may take on the add-on.
+
+        The add-on runs the operations of one renderer (the zone renderer for
+        grouped rooms) in order and up to BATCH_CONCURRENCY renderers in
+        parallel. A batch therefore takes as long as its slowest lane, or as its
+        operations spread over the parallel slots, whichever is longer.
+        """
+        lanes: dict[Any, float] = {}
+        for index, (command, payload) in enumerate(operations):
+            room_id = payload.get("roomUdn", payload.get("room"))
+            room = self._rooms.get(room_id) if room_id is not None else None
+            lane = (room or {}).get("currentZoneUdn") or room_id or index
+            lanes[lane] = lanes.get(lane, 0.0) + COMMAND_TIMEOUTS.get(
+                command, DEFAULT_COMMAND_TIMEOUT
+            )
+        timeout = max(max(lanes.values()), sum(lanes.values()) / BATCH_CONCURRENCY)
+        return min(timeout, BATCH_MAX_TIMEOUT)
 
     async def get_zones(self) -> None:
         """Request zones."""
@@ -173,28 +615,61 @@ class RaumfeldApiClient:
         await self.send_command("setMute", {"roomUdn": room_udn, "mute": mute})
 
     async def browse(self, object_id: str) -> list[dict[str, Any]]:
-        """Browse media."""
-        future = self._loop.create_future()
+        """Browse media.
 
-        def _response_handler(data: dict[str, Any]) -> None:
-            if (
-                data.get("type") == "browseResult"
-                and data.get("payload", {}).get("objectId") == object_id
-            ):
-                if not future.done():
-                    future.set_result(data["payload"]["items"])
+        Results are cached; concurrent requests for the same container share one
+        request to the add-on. The returned list must not be modified.
+        """
+        return await self._browse_cache.fetch(
+            object_id, lambda: self._request_browse(object_id)
+        )
+
+    async def browse_page(
+        self, object_id: str, offset: int, limit: int
+    ) -> tuple[list[dict[str, Any]], int, bool]:
+        """Browse part of a container.
+
+        Returns up to limit children starting at offset, the total number of
+        children and whether more children may follow. The total is only a lower
+        bound if the media server can't count the children. Add-ons without
+        paging support send the whole container, which is sliced here.
+        """
+        if "browsePaging" not in self._server_features:
+            items = await self.browse(object_id)
+            return (
+                items[offset : offset + limit],
+                len(items),
+                offset + limit < len(items),
+            )
+
+        page = await self._browse_cache.fetch(
+            object_id,
+            lambda: self.send_command(
+                "browse", {"objectId": object_id, "offset": offset, "limit": limit}
+            ),
+            (offset, limit),
+        )
+        items, total = page["items"], page["totalMatches"]
+        # Add-ons before hasMore reported a total of 0 as the end of the container
+        return items, total, page.get("hasMore", offset + len(items) < total)
 
-        self.register_listener(_response_handler)
+    async def _request_browse(self, object_id: str) -> list[dict[str, Any]]:
+        """Request the children of a container from the add-on."""
+        if "ack" in self._server_features:
+            return await self.send_command("browse", {"objectId": object_id}) or []
 
+        key = f"browse:{object_id}"
+        future = self._pending[key] = self._loop.create_future()
         try:
             await self.send_command("browse", {"objectId": object_id})
-            return await asyncio.wait_for(future, timeout=10.0)
-        except TimeoutError:
-            _LOGGER.error("Timeout waiting for browse result for %s", object_id)
-            return []
+            return await asyncio.wait_for(future, timeout=DEFAULT_COMMAND_TIMEOUT)
+        except TimeoutError as err:
+            raise RaumfeldCommandTimeout(
+                f"Timeout waiting for browse result for {object_id}"
+            ) from err
         finally:
-            if _response_handler in self._listeners:
-                self._listeners.remove(_response_handler)
+            if self._pending.get(key) is future:
+                del self._pending[key]
 
     async def load_container(self, room_udn: str, container_id: str) -> None:
         """Load container."""
@@ -0,0 +1,118 @@
+"""Browse result cache for the Teufel Raumfeld media browser."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+# Object ID and page
+CacheKey = tuple[str, Hashable]
+
+# Number of containers whose browse result is kept
+BROWSE_CACHE_SIZE = 100
+
+# Seconds a browse result is kept, by object ID prefix; the first match wins.
+# The add-on caches results for longer and announces updated containers, this
+# tier only saves the round-trips of navigating back and forth.
+BROWSE_CACHE_TTLS: tuple[tuple[str, float], ...] = (
+    ("0/Favorites/RecentlyPlayed", 10.0),
+    ("0/Favorites", 30.0),
+    ("0/Playlists", 30.0),
+    ("0/My Music", 300.0),
+    ("0/RadioTime", 300.0),
+)
+BROWSE_CACHE_DEFAULT_TTL = 60.0
+
+
+def browse_ttl(object_id: str) -> float:
+    """Return the number of seconds the browse result of a container is kept."""
+    for prefix, ttl in BROWSE_CACHE_TTLS:
+        if object_id == prefix or object_id.startswith(f"{prefix}/"):
+            return ttl
+    return BROWSE_CACHE_DEFAULT_TTL
+
+
+class BrowseCache:
+    """Browse results with per-container TTLs and LRU eviction.
+
+    Pages of a container are cached separately and invalidated together.
+    Concurrent requests for the same page share one fetch. A fetch that was
+    running while the cache was invalidated answers the callers waiting for it,
+    but is neither stored nor shared with later callers, as it may have read
+    the old contents.
+    """
+
+    def __init__(self, max_entries: int = BROWSE_CACHE_SIZE) -> None:
+        """Initialize."""
+        self._max_entries = max_entries
+        # (expires at, result) by object ID and page, least recently used first
+        self._entries: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[CacheKey, asyncio.Task[Any]] = {}
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "deduplicated": 0, "invalidations": 0}
+
+    async def fetch(
+        self,
+        object_id: str,
+        load: Callable[[], Awaitable[_T]],
+        page: Hashable = None,
+    ) -> _T:
+        """Return a cached browse result, loading it if needed.
+
+        page identifies a part of the container, None stands for all of it.
+        """
+        key = (object_id, page)
+        if (entry := self._entries.get(key)) is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+            del self._entries[key]
+
+        if (task := self._in_flight.get(key)) is not None:
+            self.stats["deduplicated"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = self._in_flight[key] = asyncio.create_task(
+                self._load(key, load, self._generation)
+            )
+        # A cancelled caller must not cancel the fetch the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: CacheKey, load: Callable[[], Awaitable[_T]], generation: int
+    ) -> _T:
+        """Run a fetch and store its result unless the cache was invalidated."""
+        try:
+            result = await load()
+        finally:
+            # An invalidation may have let a newer fetch take the key
+            if self._in_flight.get(key) is asyncio.current_task():
+                del self._in_flight[key]
+
+        if generation == self._generation:
+            self._entries[key] = (time.monotonic() + browse_ttl(key[0]), result)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, object_ids: Iterable[str] | None = None) -> None:
+        """Drop the given containers, or everything if none are given."""
+        self._generation += 1
+        self.stats["invalidations"] += 1
+        if object_ids is None:
+            self._entries.clear()
+            self._in_flight.clear()
+            return
+        invalidated = set(object_ids)
+        for key in [key for key in self._entries if key[0] in invalidated]:
+            del self._entries[key]
+        for key in [key for key in self._in_flight if key[0] in invalidated]:
+            del self._in_flight[key]
@@ -5,6 +5,7 @@ from typing import Any
 
 import voluptuous as vol
 from homeassistant.components.media_player import (
+    BrowseError,
     BrowseMedia,
     MediaPlayerEntity,
     MediaPlayerEntityFeature,
@@ -16,12 +17,26 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
 
+from . import RaumfeldData
 from .api import RaumfeldApiClient
 from .const import DOMAIN
+from .entity import RaumfeldRoomEntity
+from .room_store import RaumfeldRoomStore, RoomView
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds the reported playback position may differ from HA's interpolation
+# before it is written as a new position (e.g. after a seek)
+POSITION_DRIFT_TOLERANCE = 2.0
+
+# Children per media browser page; larger containers end with a "More" entry
+BROWSE_PAGE_SIZE = 200
+
+# Content ID prefix of "More" entries, followed by "<offset>:<object ID>"
+BROWSE_PAGE_PREFIX = "page:"
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -29,7 +44,7 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Teufel Raumfeld media player."""
-    client: RaumfeldApiClient = hass.data[DOMAIN][entry.entry_id]
+    data: RaumfeldData = hass.data[DOMAIN][entry.entry_id]
 
     platform = entity_platform.async_get_current_platform()
 
@@ -41,51 +56,41 @@ async def async_setup_entry(
         "async_play_system_sound",
     )
 
-    known_udns = set()
-
     @callback
-    def handle_message(data: dict[str, Any]) -> None:
-        if data.get("type") in ("zones", "zoneStateChanged"):
-            rooms = data.get("payload", [])
-            new_entities = []
-            for room in rooms:
-                if room["udn"] not in known_udns:
-                    known_udns.add(room["udn"])
-                    new_entities.append(RaumfeldMediaPlayer(client, room))
-
-            if new_entities:
-                async_add_entities(new_entities)
-
-        elif data.get("type") == "fullStateUpdate":
-            rooms = data.get("payload", {}).get("availableRooms", [])
-            new_entities = []
-            for room in rooms:
-                if room["udn"] not in known_udns:
-                    known_udns.add(room["udn"])
-                    new_entities.append(RaumfeldMediaPlayer(client, room))
-            if new_entities:
-                async_add_entities(new_entities)
-
-    client.register_listener(handle_message)
-
-    # Trigger initial fetch if already connected
-    if client.connected:
-        hass.async_create_task(client.get_zones())
-
-
-class RaumfeldMediaPlayer(MediaPlayerEntity):
+    def add_new_rooms(rooms: list[RoomView]) -> None:
+        async_add_entities(
+            RaumfeldMediaPlayer(data.client, data.rooms, room) for room in rooms
+        )
+
+    entry.async_on_unload(data.rooms.async_add_new_rooms_listener(add_new_rooms))
+
+
+class RaumfeldMediaPlayer(RaumfeldRoomEntity, MediaPlayerEntity):
     """Teufel Raumfeld Media Player Entity."""
 
-    def __init__(self, client: RaumfeldApiClient, room_data: dict[str, Any]) -> None:
+    def __init__(
+        self, client: RaumfeldApiClient, rooms: RaumfeldRoomStore, room: RoomView
+    ) -> None:
         """Initialize."""
-        self._client = client
-        self._udn = room_data["udn"]
-        self._attr_name = room_data.get("name")
-        self._attr_unique_id = self._udn
+        self._attr_name = room.name
+        self._attr_unique_id = room.udn
         self._attr_icon = "mdi:speaker-multiple"
         self._upnp_class = ""
         self._attr_media_content_id = None
-        self.update_state(room_data)
+        self._attr_media_position = None
+        self._attr_media_position_updated_at = None
+        self._position_interpolated = False
+        super().__init__(client, rooms, room)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when this Entity has been added to HA."""
+        await super().async_added_to_hass()
+        self._rooms.set_media_player_id(self._udn, self.entity_id)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Run when this Entity is being removed from HA."""
+        # Renaming the entity ID removes and re-adds the entity
+        self._rooms.remove_media_player_id(self._udn, self.entity_id)
 
     @property
     def device_info(self):
@@ -97,42 +102,16 @@ class RaumfeldMediaPlayer(MediaPlayerEntity):
             "model": "Raumfeld Room",
         }
 
-    async def async_added_to_hass(self) -> None:
-        """Run when this Entity has been added to HA."""
-        self._client.register_listener(self._handle_event)
-
-    async def async_will_remove_from_hass(self) -> None:
-        """Run when this Entity is being removed from HA."""
-        self._client.unregister_listener(self._handle_event)
-
-    @callback
-    def _handle_event(self, data: dict[str, Any]) -> None:
-        """Handle incoming events."""
-        if data.get("type") in ("zones", "zoneStateChanged"):
-            rooms = data.get("payload", [])
-            for room in rooms:
-                if room["udn"] == self._udn:
-                    self.update_state(room)
-                    self.async_write_ha_state()
-                    break
-        elif data.get("type") == "fullStateUpdate":
-            rooms = data.get("payload", {}).get("availableRooms", [])
-            for room in rooms:
-                if room["udn"] == self._udn:
-                    self.update_state(room)
-                    self.async_write_ha_state()
-                    break
-
-    def update_state(self, room_data: dict[str, Any]) -> None:
+    def update_state(self, room: RoomView) -> None:
         """Update state from data."""
-        self._attr_available = True
+        self._attr_available = not room.stale
 
-        now_playing = room_data.get("nowPlaying", {})
+        now_playing = room.now_playing
 
         # Check power state first - if in standby, show as idle
         # PowerState can be: ACTIVE, IDLE, STANDBY, MANUAL_STANDBY, AUTOMATIC_STANDBY
         # Use IDLE instead of OFF to keep the UI expanded and controls visible
-        power_state = now_playing.get("powerState", "ACTIVE")
+        power_state = room.power_state
 
         if "STANDBY" in power_state:
             self._attr_state = MediaPlayerState.IDLE
@@ -157,25 +136,18 @@ class RaumfeldMediaPlayer(MediaPlayerEntity):
         # Parse duration and position for seek functionality
         # Add-on provides seconds directly as integer
         self._attr_media_duration = now_playing.get("durationSeconds", 0)
-        self._attr_media_position = now_playing.get("positionSeconds", 0)
-
-        # Update position timestamp so HA can interpolate position during playback
-        if now_playing.get("isPlaying"):
-            from homeassistant.util import dt as dt_util
-
-            self._attr_media_position_updated_at = dt_util.utcnow()
+        self._update_position(
+            now_playing.get("positionSeconds", 0), bool(now_playing.get("isPlaying"))
+        )
 
         # Store zone info for extra state attributes
-        self._zone_name = room_data.get("zoneName")
-        self._zone_members = room_data.get("zoneMembers", [])
-        self._current_zone_udn = room_data.get("currentZoneUdn")
+        self._zone_name = room.zone_name
+        self._zone_members = room.zone_members
+        self._current_zone_udn = room.zone_udn
 
         # Capabilities
-        # Default to False if not present (older add-on versions)
-        self._source_switching_supported = room_data.get(
-            "sourceSwitchingSupported", False
-        )
-        self._line_in_supported = room_data.get("lineInSupported", False)
+        self._source_switching_supported = room.source_switching_supported
+        self._line_in_supported = room.line_in_supported
 
         # Supported features
         features = (
@@ -204,6 +176,55 @@ class RaumfeldMediaPlayer(MediaPlayerEntity):
 
         self._attr_supported_features = features
 
+    def _update_position(self, position: int, is_playing: bool) -> None:
+        """Update the media position unless HA's interpolation already matches it.
+
+        HA extrapolates the position from media_position_updated_at while
+        playing, so regular position ticks need no state write. Only seeks,
+        track changes and pauses move the reported position.
+        """
+        now = dt_util.utcnow()
+        updated_at = self._attr_media_position_updated_at
+        if (
+            is_playing
+            and self._position_interpolated
+            and self._attr_media_position is not None
+            and updated_at is not None
+        ):
+            expected = self._attr_media_position + (now - updated_at).total_seconds()
+            if abs(position - expected) <= POSITION_DRIFT_TOLERANCE:
+                return
+
+        self._attr_media_position = position
+        if is_playing:
+            # Lets HA interpolate the position during playback
+            self._attr_media_position_updated_at = now
+        self._position_interpolated = is_playing
+
+    def state_fingerprint(self) -> tuple:
+        """Return the values this entity exposes."""
+        return (
+            self._attr_available,
+            self._attr_state,
+            self._attr_volume_level,
+            self._attr_is_volume_muted,
+            self._attr_media_title,
+            self._attr_media_artist,
+            self._attr_media_album_name,
+            self._attr_media_image_url,
+            self._attr_media_content_id,
+            self._upnp_class,
+            self._attr_media_duration,
+            self._attr_media_position,
+            self._attr_media_position_updated_at,
+            self._zone_name,
+            tuple(self._zone_members),
+            self._current_zone_udn,
+            self._source_switching_supported,
+            self._line_in_supported,
+            self._attr_supported_features,
+        )
+
     @property
     def media_content_type(self) -> str | None:
         """Return the content type of currently playing media."""
@@ -288,36 +309,7 @@ class RaumfeldMediaPlayer(MediaPlayerEntity):
         if not self._zone_members or len(self._zone_members) <= 1:
             return None
 
-        # Resolve UDNs to Entity IDs
-        members = []
-
-        # Get all media_player entities
-        all_states = self.hass.states.async_all("media_player")
-
-        _LOGGER.debug(
-            "[group_members] Entity %s: zone_members=%s, checking %d states",
-            self.entity_id,
-            self._zone_members,
-            len(all_states),
-        )
-
-        for state in all_states:
-            room_udn = state.attributes.get("room_udn")
-            if room_udn:
-                _LOGGER.debug(
-                    "[group_members] Checking %s: room_udn=%s, in_members=%s",
-                    state.entity_id,
-                    room_udn,
-                    room_udn in self._zone_members,
-                )
-            if room_udn in self._zone_members:
-                members.append(state.entity_id)
-
-        _LOGGER.debug(
-            "[group_members] Entity %s: resolved members=%s",
-            self.entity_id,
-            members,
-        )
+        members = self._rooms.media_player_ids(self._zone_members)
         return members if members else None
 
     async def async_media_play(self) -> None:
@@ -479,6 +471,19 @@ class RaumfeldMediaPlayer(MediaPlayerEntity):
         if media_content_id is None:
             media_content_id = "0/Favorites"
 
+        offset = 0
+        object_id = media_content_id
+        if media_content_id.startswith(BROWSE_PAGE_PREFIX):
+            offset_str, _, object_id = media_content_id.removeprefix(
+                BROWSE_PAGE_PREFIX
+            ).partition(":")
+            try:
+                offset = int(offset_str)
+            except ValueError:
+                offset = -1
+            if offset < 0:
+                raise BrowseError(f"Invalid media content ID: {media_content_id}")
+
         # Helper to map UPNP class to HA MediaClass
         def _get_media_class(upnp_class: str) -> str:
             if not upnp_class:
@@ -497,7 +502,9 @@ class RaumfeldMediaPlayer(MediaPlayerEntity):
                 return MediaClass.DIRECTORY
             return MediaClass.MUSIC
 
-        items = await self._client.browse(media_content_id)
+        items, total, has_more = await self._client.browse_page(
+            object_id, offset, BROWSE_PAGE_SIZE
+        )
 
         children = []
         for item in items:
@@ -521,6 +528,25 @@ class RaumfeldMediaPlayer(MediaPlayerEntity):
                 )
             )
 
+        next_offset = offset + len(items)
+        if items and has_more:
+            if next_offset < total:
+                last = min(next_offset + BROWSE_PAGE_SIZE, total)
+                title = f"More ({next_offset + 1}-{last} of {total})"
+            else:
+                # The media server didn't report how many children there are
+                title = f"More (from {next_offset + 1})"
+            children.append(
+                BrowseMedia(
+                    title=title,
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_id=f"{BROWSE_PAGE_PREFIX}{next_offset}:{object_id}",
+                    media_content_type="container",
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
+
         # We assume the root or current level is a directory for now
         # Ideally we would get info about the parent from the API,
         # but for now we construct a generic parent.
@@ -0,0 +1,94 @@
+/**
+ * BroadcastScheduler - Coalesces bursts of state change events into one broadcast
+ *
+ * A zone of several speakers changing track fires a burst of rendererStateChanged
+ * events within a few milliseconds. Instead of rebuilding and broadcasting the state
+ * for each of them, events are collected until no new event arrived for `windowMs`.
+ * `maxLatencyMs` bounds how long a continuous stream of events can delay the
+ * broadcast, so interactive changes still show up promptly.
+ */
+
+export default class BroadcastScheduler {
+    /**
+     * @param {function(number): void} flush - Called with the number of coalesced events
+     * @param {{windowMs?: number, maxLatencyMs?: number}} [options]
+     */
+    constructor(flush, { windowMs = 50, maxLatencyMs = 200 } = {}) {
+        this._flush = flush;
+        this.windowMs = Math.max(0, windowMs);
+        this.maxLatencyMs = Math.max(this.windowMs, maxLatencyMs);
+
+        this._timer = null;
+        this._pendingEvents = 0;
+        this._firstEventAt = 0;
+
+        this._stats = {
+            events: 0,
+            broadcasts: 0,
+            lastCoalesced: 0,
+            maxCoalesced: 0
+        };
+    }
+
+    /**
+     * Records a state change event and (re)schedules the broadcast.
+     */
+    schedule() {
+        this._stats.events += 1;
+        this._pendingEvents += 1;
+
+        if (this.windowMs === 0) {
+            this.flush();
+            return;
+        }
+
+        const now = Date.now();
+        if (this._pendingEvents === 1) {
+            this._firstEventAt = now;
+        }
+
+        // Trailing window, but never later than maxLatencyMs after the first event
+        const deadline = this._firstEventAt + this.maxLatencyMs;
+        const delay = Math.max(0, Math.min(this.windowMs, deadline - now));
+
+        clearTimeout(this._timer);
+        this._timer = setTimeout(() => this.flush(), delay);
+    }
+
+    /**
+     * Broadcasts pending events immediately.
+     */
+    flush() {
+        clearTimeout(this._timer);
+        this._timer = null;
+
+        const coalesced = this._pendingEvents;
+        if (coalesced === 0) return;
+        this._pendingEvents = 0;
+
+        this._stats.broadcasts += 1;
+        this._stats.lastCoalesced = coalesced;
+        this._stats.maxCoalesced = Math.max(this._stats.maxCoalesced, coalesced);
+
+        this._flush(coalesced);
+    }
+
+    /**
+     * Drops pending events without broadcasting.
+     */
+    cancel() {
+        clearTimeout(this._timer);
+        this._timer = null;
+        this._pendingEvents = 0;
+    }
+
+    getStats() {
+        const { events, broadcasts } = this._stats;
+        return {
+            ...this._stats,
+            windowMs: this.windowMs,
+            maxLatencyMs: this.maxLatencyMs,
+            avgCoalesced: broadcasts > 0 ? Math.round((events - this._pendingEvents) / broadcasts * 100) / 100 : 0
+        };
+    }
+}
@@ -0,0 +1,137 @@
+/**
+ * BrowseCache - Browse results with per-container TTLs, LRU eviction and
+ * in-flight de-duplication
+ *
+ * Every browse is a UPnP round trip to the Raumfeld media server, which takes a
+ * while for larger containers. Results are kept for a TTL chosen by object ID
+ * (favourites change more often than the music library) in a bounded LruCache,
+ * and concurrent requests for the same container share one upstream call. Pages
+ * of a container are cached separately and invalidated together.
+ *
+ * Containers the media server reports as updated are dropped with `invalidate`.
+ * A load that was running during an invalidation still answers the callers that
+ * were waiting for it, but is not cached and not shared with later callers, as
+ * it may have read the old contents.
+ */
+
+import LruCache from './LruCache.js';
+
+export default class BrowseCache {
+    /**
+     * @param {{maxEntries?: number, ttlFor?: function(string): number}} [options]
+     *   `ttlFor` returns the TTL in milliseconds for an object ID
+     */
+    constructor({ maxEntries = 200, ttlFor = () => 60000 } = {}) {
+        this._ttlFor = ttlFor;
+
+        /** @type {LruCache} {result, expiresAt} keyed by object ID and page */
+        this._entries = new LruCache(maxEntries);
+
+        /** @type {Map<string, Promise<*>>} Running loads keyed by object ID and page */
+        this._inFlight = new Map();
+
+        /** Incremented by every invalidation; loads started before one are not cached */
+        this._generation = 0;
+
+        this._stats = { hits: 0, misses: 0, expired: 0, deduplicated: 0, invalidations: 0 };
+    }
+
+    /**
+     * Returns the cached browse result of a container, loading it if needed.
+     * Callers share the returned result and must not modify it.
+     * @param {string} objectId
+     * @param {function(): Promise<*>} load - Fetches the result; a rejection
+     *   is passed to all waiting callers and nothing is cached
+     * @param {string} [page] - Identifies a part of the container, e.g. its
+     *   offset and limit; omitted for the whole container
+     * @returns {Promise<*>}
+     */
+    fetch(objectId, load, page) {
+        // Object IDs never contain line breaks
+        const key = page === undefined ? objectId : `${objectId}\n${page}`;
+        const entry = this._entries.get(key);
+        if (entry) {
+            if (entry.expiresAt > Date.now()) {
+                this._stats.hits += 1;
+                return Promise.resolve(entry.result);
+            }
+            // Reloaded below, or joins a reload that is already running
+            this._entries.delete(key);
+            this._stats.expired += 1;
+        }
+
+        const running = this._inFlight.get(key);
+        if (running) {
+            this._stats.deduplicated += 1;
+            return running;
+        }
+
+        this._stats.misses += 1;
+        const generation = this._generation;
+        const promise = Promise.resolve()
+            .then(load)
+            .then((result) => {
+                if (generation === this._generation) {
+                    this._entries.set(key, { result, expiresAt: Date.now() + this._ttlFor(objectId) });
+                }
+                return result;
+            })
+            .finally(() => {
+                // An invalidation may have let a newer load take the key
+                if (this._inFlight.get(key) === promise) this._inFlight.delete(key);
+            });
+        this._inFlight.set(key, promise);
+        return promise;
+    }
+
+    /**
+     * Drops cached containers with all their pages.
+     * @param {string[]} [objectIds] - Containers to drop; all if omitted
+     */
+    invalidate(objectIds) {
+        this._generation += 1;
+        this._stats.invalidations += 1;
+        if (objectIds === undefined) {
+            this._entries.clear();
+            this._inFlight.clear();
+            return;
+        }
+        const invalidated = new Set(objectIds);
+        for (const key of [...this._entries.keys()]) {
+            if (invalidated.has(key.split('\n', 1)[0])) this._entries.delete(key);
+        }
+        for (const key of [...this._inFlight.keys()]) {
+            if (invalidated.has(key.split('\n', 1)[0])) this._inFlight.delete(key);
+        }
+    }
+
+    getStats() {
+        const { hits, misses } = this._stats;
+        const { size, maxSize, evictions } = this._entries.getStats();
+        return {
+            ...this._stats,
+            size,
+            maxSize,
+            evictions,
+            inFlight: this._inFlight.size,
+            hitRate: hits + misses > 0 ? Math.round(hits / (hits + misses) * 1000) / 1000 : 0
+        };
+    }
+}
+
+/**
+ * Parses the ContainerUpdateIDs state variable of a ContentDirectory event:
+ * comma-separated pairs of container ID and update ID, with commas inside IDs
+ * escaped as "\,".
+ * @param {string|undefined} value
+ * @returns {string[]} IDs of the updated containers
+ */
+export function parseContainerUpdateIds(value) {
+    if (!value) return [];
+    const fields = value.split(/(?<!\\),/).map(field => field.replace(/\\,/g, ','));
+    const containerIds = [];
+    for (let i = 0; i + 1 < fields.length; i += 2) {
+        if (fields[i] !== '') containerIds.push(fields[i]);
+    }
+    return containerIds;
+}
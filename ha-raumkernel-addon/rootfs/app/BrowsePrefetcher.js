@@ -0,0 +1,192 @@
+/**
+ * BrowsePrefetcher - Loads the first child containers of a browsed container
+ * into the browse cache ahead of time
+ *
+ * After opening a container, users usually open one of its first children next.
+ * Those children are browsed in the background, `concurrency` at a time and only
+ * while no client browse is running, so prefetching never delays real requests.
+ * Opening another container replaces the children still waiting.
+ *
+ * Prefetched results count against a budget of `maxItems` browse objects until a
+ * client uses them or they expire; while the budget is exhausted nothing is
+ * prefetched. Hits are client browses that found a prefetched (or still loading)
+ * result, misses are client browses of containers that were not prefetched.
+ */
+
+/**
+ * @typedef {Object} PrefetchRequest
+ * @property {string} objectId
+ * @property {string} [page] - Page key as used by the BrowseCache
+ * @property {function(): Promise<Array|{items: Array}>} load - Browses into the cache
+ */
+
+export default class BrowsePrefetcher {
+    /**
+     * @param {{count?: number, concurrency?: number, maxItems?: number, delayMs?: number,
+     *   ttlFor?: function(string): number}} [options]
+     *   `count` children are prefetched per browse (0 disables prefetching); `ttlFor`
+     *   returns how long the browse cache keeps a container, in ms
+     */
+    constructor({ count = 3, concurrency = 1, maxItems = 5000, delayMs = 100, ttlFor = () => 60000 } = {}) {
+        this.count = Math.max(0, Math.floor(count) || 0);
+        this.concurrency = Math.max(1, concurrency);
+        this.maxItems = maxItems;
+        this._delayMs = delayMs;
+        this._ttlFor = ttlFor;
+
+        /** @type {PrefetchRequest[]} Children waiting to be prefetched */
+        this._queue = [];
+        this._timer = null;
+        this._running = 0;
+
+        /** Client browses currently running; prefetching pauses while there are any */
+        this._foreground = 0;
+
+        /** @type {Map<string, {used: boolean}>} Running prefetches; `used` once a client asked for it */
+        this._loading = new Map();
+
+        /** @type {Map<string, {items: number, expiresAt: number}>} Prefetched results not used yet */
+        this._prefetched = new Map();
+        this._heldItems = 0;
+
+        this._stats = { prefetches: 0, failures: 0, superseded: 0, skipped: 0, unused: 0, hits: 0, misses: 0 };
+    }
+
+    get enabled() {
+        return this.count > 0;
+    }
+
+    /**
+     * Runs a client browse, pausing prefetches until it is done.
+     * @template T
+     * @param {string} objectId
+     * @param {string|undefined} page
+     * @param {function(): Promise<T>} load
+     * @returns {Promise<T>}
+     */
+    async runRequest(objectId, page, load) {
+        if (!this.enabled) return load();
+
+        const key = this._key(objectId, page);
+        this._expire();
+        const prefetched = this._prefetched.get(key);
+        if (prefetched) {
+            this._prefetched.delete(key);
+            this._heldItems -= prefetched.items;
+            this._stats.hits += 1;
+        } else if (this._loading.has(key)) {
+            this._loading.get(key).used = true;
+            this._stats.hits += 1;
+        } else {
+            this._stats.misses += 1;
+        }
+
+        this._foreground += 1;
+        try {
+            return await load();
+        } finally {
+            this._foreground -= 1;
+            this._scheduleRun();
+        }
+    }
+
+    /**
+     * Queues the first children of a browsed container, replacing children of
+     * previously browsed containers that were not started yet.
+     * @param {PrefetchRequest[]} requests - Child containers in display order
+     */
+    prefetch(requests) {
+        if (!this.enabled) return;
+
+        this._stats.superseded += this._queue.length;
+        this._expire();
+        this._queue = requests
+            .filter(({ objectId, page }) => {
+                const key = this._key(objectId, page);
+                return !this._prefetched.has(key) && !this._loading.has(key);
+            })
+            .slice(0, this.count);
+        this._scheduleRun();
+    }
+
+    /**
+     * Drops pending prefetches and forgets prefetched results, e.g. after the
+     * browse cache was cleared.
+     */
+    clear() {
+        this._queue = [];
+        this._prefetched.clear();
+        this._heldItems = 0;
+    }
+
+    getStats() {
+        const { hits, misses } = this._stats;
+        return {
+            enabled: this.enabled,
+            ...this._stats,
+            hitRate: hits + misses > 0 ? Math.round(hits / (hits + misses) * 1000) / 1000 : 0,
+            queued: this._queue.length,
+            running: this._running,
+            heldItems: this._heldItems,
+            maxItems: this.maxItems
+        };
+    }
+
+    _key(objectId, page) {
+        return page === undefined ? objectId : `${objectId}\n${page}`;
+    }
+
+    /** Starts prefetches after a short delay, so the reply to a browse goes out first */
+    _scheduleRun() {
+        if (this._timer || this._queue.length === 0) return;
+        this._timer = setTimeout(() => {
+            this._timer = null;
+            this._run();
+        }, this._delayMs);
+    }
+
+    _run() {
+        while (this._foreground === 0 && this._running < this.concurrency && this._queue.length > 0) {
+            this._expire();
+            if (this._heldItems >= this.maxItems) {
+                this._stats.skipped += this._queue.length;
+                this._queue = [];
+                return;
+            }
+
+            const { objectId, page, load } = this._queue.shift();
+            const key = this._key(objectId, page);
+            const loading = { used: false };
+            this._running += 1;
+            this._loading.set(key, loading);
+            this._stats.prefetches += 1;
+
+            Promise.resolve()
+                .then(load)
+                .then((result) => {
+                    if (loading.used) return;
+                    const items = (Array.isArray(result) ? result : result?.items ?? []).length;
+                    this._prefetched.set(key, { items, expiresAt: Date.now() + this._ttlFor(objectId) });
+                    this._heldItems += items;
+                }, () => {
+                    this._stats.failures += 1;
+                })
+                .finally(() => {
+                    this._running -= 1;
+                    this._loading.delete(key);
+                    this._scheduleRun();
+                });
+        }
+    }
+
+    /** Forgets prefetched results the browse cache no longer holds */
+    _expire() {
+        const now = Date.now();
+        for (const [key, entry] of this._prefetched) {
+            if (entry.expiresAt > now) continue;
+            this._prefetched.delete(key);
+            this._heldItems -= entry.items;
+            this._stats.unused += 1;
+        }
+    }
+}
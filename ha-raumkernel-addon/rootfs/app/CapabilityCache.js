@@ -0,0 +1,90 @@
+/**
+ * CapabilityCache - Persisted results of renderer capability probes
+ *
+ * Probing "Source Select" and Line-in takes several UPnP round trips per device
+ * (plus a retry delay on devices that drop the connection), and the answer only
+ * changes with different hardware or firmware. Results are stored in the add-on's
+ * /data directory keyed by renderer UDN, together with the device's model and
+ * version; an entry whose identity no longer matches is ignored.
+ */
+
+import JsonFile from './JsonFile.js';
+
+/** Bump when the entry format changes; files with another version are discarded */
+const FILE_VERSION = 1;
+
+/**
+ * @typedef {Object} DeviceIdentity
+ * @property {string|null} model
+ * @property {string|null} version - Model number / firmware version as reported by the device
+ */
+
+/**
+ * @typedef {Object} Capabilities
+ * @property {boolean} sourceSelect
+ * @property {boolean} lineIn
+ */
+
+export default class CapabilityCache {
+    /**
+     * @param {string} filePath
+     */
+    constructor(filePath) {
+        this._file = new JsonFile(filePath);
+
+        /** @type {Map<string, DeviceIdentity & Capabilities & {probedAt: number}>} */
+        this._entries = new Map();
+
+        this._stats = { hits: 0, misses: 0, identityMismatches: 0 };
+    }
+
+    /**
+     * Reads the cache file. A missing or unreadable file leaves the cache empty.
+     */
+    load() {
+        const data = this._file.read();
+        if (data?.version !== FILE_VERSION || typeof data.devices !== 'object') return;
+        this._entries = new Map(Object.entries(data.devices));
+    }
+
+    /**
+     * @param {string} rendererUdn
+     * @param {DeviceIdentity} identity
+     * @returns {(Capabilities & {probedAt: number})|undefined} undefined if unknown or
+     *   stored for a different model/version
+     */
+    get(rendererUdn, identity) {
+        const entry = this._entries.get(rendererUdn);
+        if (!entry) {
+            this._stats.misses += 1;
+            return undefined;
+        }
+        if (entry.model !== identity.model || entry.version !== identity.version) {
+            this._stats.identityMismatches += 1;
+            this._stats.misses += 1;
+            return undefined;
+        }
+        this._stats.hits += 1;
+        return { sourceSelect: entry.sourceSelect, lineIn: entry.lineIn, probedAt: entry.probedAt };
+    }
+
+    /**
+     * @param {string} rendererUdn
+     * @param {DeviceIdentity} identity
+     * @param {Capabilities} capabilities
+     */
+    set(rendererUdn, identity, { sourceSelect, lineIn }) {
+        this._entries.set(rendererUdn, {
+            model: identity.model,
+            version: identity.version,
+            sourceSelect,
+            lineIn,
+            probedAt: Date.now()
+        });
+        this._file.scheduleWrite(() => ({ version: FILE_VERSION, devices: Object.fromEntries(this._entries) }));
+    }
+
+    getStats() {
+        return { ...this._stats, ...this._file.getStats(), entries: this._entries.size };
+    }
+}
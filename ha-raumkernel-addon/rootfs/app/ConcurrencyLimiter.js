@@ -0,0 +1,54 @@
+/**
+ * ConcurrencyLimiter - Runs async tasks with a bounded number in flight
+ *
+ * The Raumfeld devices handle only a few UPnP requests at a time, so fan-out
+ * work (batch commands, device polling) is queued here instead of firing
+ * every request at once.
+ */
+
+export default class ConcurrencyLimiter {
+    /**
+     * @param {number} limit - Maximum number of tasks running at the same time
+     */
+    constructor(limit) {
+        this.limit = Math.max(1, Math.floor(limit) || 1);
+        this._active = 0;
+        this._queue = [];
+    }
+
+    /**
+     * Runs `task` as soon as a slot is free.
+     * @template T
+     * @param {function(): Promise<T>} task
+     * @returns {Promise<T>} Settles with the task's result
+     */
+    run(task) {
+        return new Promise((resolve, reject) => {
+            this._queue.push({ task, resolve, reject });
+            this._next();
+        });
+    }
+
+    get active() {
+        return this._active;
+    }
+
+    get pending() {
+        return this._queue.length;
+    }
+
+    _next() {
+        while (this._active < this.limit && this._queue.length > 0) {
+            const { task, resolve, reject } = this._queue.shift();
+            this._active += 1;
+
+            Promise.resolve()
+                .then(task)
+                .then(resolve, reject)
+                .finally(() => {
+                    this._active -= 1;
+                    this._next();
+                });
+        }
+    }
+}
@@ -0,0 +1,168 @@
+/**
+ * DidlParser - Lightweight DIDL-Lite extractor
+ *
+ * UPnP track metadata and ContentDirectory browse results are DIDL-Lite documents:
+ * a flat list of <item> and <container> elements whose children are simple text
+ * elements (dc:title, upnp:class, res, ...). This tokenizer reads exactly that in a
+ * single pass over the string, without building a DOM.
+ *
+ * Element names are matched as written (including the namespace prefix), the same
+ * way getElementsByTagName('dc:title') does. Only the first occurrence of each
+ * text element per object is kept; elements with child elements are skipped.
+ */
+
+const OBJECT_TAGS = new Set(['item', 'container']);
+
+const NAMED_ENTITIES = { amp: '&', lt: '<', gt: '>', quot: '"', apos: '\'' };
+const ENTITY_PATTERN = /&(?:#(\d+)|#x([0-9a-fA-F]+)|(amp|lt|gt|quot|apos));/g;
+
+/**
+ * @typedef {Object} DidlObject
+ * @property {'item'|'container'} type
+ * @property {string|null} id - The object's id attribute
+ * @property {Object<string, string>} fields - Text of child elements keyed by tag name
+ */
+
+/**
+ * Decodes XML character and predefined entity references.
+ * @param {string} text
+ * @returns {string}
+ */
+export function decodeEntities(text) {
+    if (!text.includes('&')) return text;
+    return text.replace(ENTITY_PATTERN, (match, decimal, hex, name) => {
+        if (name) return NAMED_ENTITIES[name];
+        const codePoint = decimal ? parseInt(decimal, 10) : parseInt(hex, 16);
+        try {
+            return String.fromCodePoint(codePoint);
+        } catch {
+            return match;
+        }
+    });
+}
+
+// Finds the '>' closing a tag, skipping over quoted attribute values
+function findTagEnd(xml, from) {
+    let pos = from;
+    for (;;) {
+        const gt = xml.indexOf('>', pos);
+        if (gt === -1) return -1;
+
+        // Searching the slice keeps indexOf from scanning past the tag
+        const segment = xml.slice(pos, gt);
+        const doubleQuote = segment.indexOf('"');
+        const singleQuote = segment.indexOf('\'');
+        const quote = doubleQuote === -1 || (singleQuote !== -1 && singleQuote < doubleQuote)
+            ? singleQuote
+            : doubleQuote;
+        if (quote === -1) return gt;
+
+        const closingQuote = xml.indexOf(segment[quote], pos + quote + 1);
+        if (closingQuote === -1) return -1;
+        pos = closingQuote + 1;
+    }
+}
+
+// Returns the element name at the start of a tag's content
+function getTagName(tag) {
+    let end = 0;
+    while (end < tag.length) {
+        const char = tag.charCodeAt(end);
+        // whitespace or '/'
+        if (char <= 32 || char === 47) break;
+        end++;
+    }
+    return tag.slice(0, end);
+}
+
+function getAttribute(tag, name) {
+    const match = tag.match(new RegExp(`\\s${name}\\s*=\\s*(?:"([^"]*)"|'([^']*)')`));
+    return match ? decodeEntities(match[1] ?? match[2]) : null;
+}
+
+/**
+ * Parses the items and containers of a DIDL-Lite document.
+ * Malformed input yields whatever could be read up to the error, never throws.
+ * @param {string} xml
+ * @returns {DidlObject[]} Objects in document order
+ */
+export function parseDidl(xml) {
+    const objects = [];
+    if (!xml) return objects;
+
+    /** @type {Array<{name: string, text: string, hasChildren: boolean}>} */
+    const stack = [];
+    let current = null;
+    let pos = 0;
+
+    const openElement = (name) => {
+        if (stack.length > 0) stack[stack.length - 1].hasChildren = true;
+        stack.push({ name, text: '', hasChildren: false });
+    };
+
+    const closeElement = (name) => {
+        // Tolerate unbalanced markup by unwinding to the matching element
+        let index = stack.length - 1;
+        while (index >= 0 && stack[index].name !== name) index--;
+        if (index < 0) return;
+
+        let element;
+        while (stack.length > index) element = stack.pop();
+
+        if (current && index === current.depth) {
+            objects.push({ type: current.type, id: current.id, fields: current.fields });
+            current = null;
+        } else if (current && !element.hasChildren && !(name in current.fields)) {
+            current.fields[name] = element.text;
+        }
+    };
+
+    while (pos < xml.length) {
+        const lt = xml.indexOf('<', pos);
+        const textEnd = lt === -1 ? xml.length : lt;
+        if (textEnd > pos && stack.length > 0) {
+            stack[stack.length - 1].text += decodeEntities(xml.slice(pos, textEnd));
+        }
+        if (lt === -1) break;
+
+        if (xml.startsWith('<![CDATA[', lt)) {
+            const end = xml.indexOf(']]>', lt + 9);
+            if (end === -1) break;
+            if (stack.length > 0) stack[stack.length - 1].text += xml.slice(lt + 9, end);
+            pos = end + 3;
+            continue;
+        }
+        if (xml.startsWith('<!--', lt)) {
+            const end = xml.indexOf('-->', lt + 4);
+            if (end === -1) break;
+            pos = end + 3;
+            continue;
+        }
+
+        const gt = findTagEnd(xml, lt + 1);
+        if (gt === -1) break;
+        pos = gt + 1;
+
+        const tag = xml.slice(lt + 1, gt);
+        const first = tag[0];
+        if (first === '?' || first === '!') continue;
+
+        if (first === '/') {
+            closeElement(tag.slice(1).trim());
+            continue;
+        }
+
+        const selfClosing = tag.endsWith('/');
+        const name = getTagName(tag);
+        if (!name) continue;
+
+        if (OBJECT_TAGS.has(name) && !current) {
+            current = { type: name, id: getAttribute(tag, 'id'), fields: {}, depth: stack.length };
+        }
+
+        openElement(name);
+        if (selfClosing) closeElement(name);
+    }
+
+    return objects;
+}
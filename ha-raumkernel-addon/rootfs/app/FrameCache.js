@@ -0,0 +1,107 @@
+/**
+ * FrameCache - Serialise-once cache for state snapshot frames
+ *
+ * fullStateUpdate, zones and zoneStateChanged messages carry the complete room
+ * list. Their encoded frames are cached per message type and codec until the state
+ * version (or the ready flag) changes, so new connections, getZones replies and
+ * broadcasts share one buffer.
+ *
+ * Each room is additionally cached as an encoded fragment keyed by the room state
+ * object. RaumkernelHelper only replaces the objects of rooms that were rebuilt,
+ * so a new snapshot re-encodes just those rooms and splices in the rest.
+ */
+
+import MessagePack from './MessagePack.js';
+
+export const SNAPSHOT_MESSAGE_TYPES = new Set(['fullStateUpdate', 'zones', 'zoneStateChanged']);
+
+// JSON.stringify for an object with some values replaced by pre-encoded JSON
+const stringifyWith = (object, rawValues) => '{' + Object.entries(object)
+    .filter(([, value]) => value !== undefined && typeof value !== 'function')
+    .map(([key, value]) => `${JSON.stringify(key)}:${rawValues.get(value) ?? JSON.stringify(value)}`)
+    .join(',') + '}';
+
+export default class FrameCache {
+    constructor() {
+        this._key = null;
+        /** @type {Map<string, string|Buffer>} Frames of the current state, keyed by `${type}:${codec}` */
+        this._frames = new Map();
+        /** @type {WeakMap<Object, {json?: string, msgpack?: Buffer}>} Encoded rooms */
+        this._fragments = new WeakMap();
+
+        this._stats = { hits: 0, misses: 0, fragmentHits: 0, fragmentMisses: 0 };
+    }
+
+    /**
+     * Returns the encoded frame of a snapshot message.
+     * @param {{type: string, version: number, payload: Object|Array}} message - payload is
+     *   the full state (fullStateUpdate) or the room array (zones, zoneStateChanged)
+     * @param {'json'|'msgpack'} codec
+     * @param {boolean} isReady - Part of the cache key, the ready flag changes without a new version
+     * @returns {string|Buffer}
+     */
+    getFrame(message, codec, isReady) {
+        const key = `${message.version}:${isReady}`;
+        if (key !== this._key) {
+            this._key = key;
+            this._frames.clear();
+        }
+
+        const frameKey = `${message.type}:${codec}`;
+        let frame = this._frames.get(frameKey);
+        if (frame !== undefined) {
+            this._stats.hits += 1;
+            return frame;
+        }
+
+        this._stats.misses += 1;
+        frame = codec === 'msgpack' ? this._encodeMsgpack(message) : this._encodeJson(message);
+        this._frames.set(frameKey, frame);
+        return frame;
+    }
+
+    getStats() {
+        return { ...this._stats, frames: this._frames.size };
+    }
+
+    _fragment(room, codec) {
+        let fragments = this._fragments.get(room);
+        if (!fragments) {
+            fragments = {};
+            this._fragments.set(room, fragments);
+        }
+
+        if (fragments[codec] === undefined) {
+            this._stats.fragmentMisses += 1;
+            // Copy out of the encoder's oversized buffer
+            fragments[codec] = codec === 'msgpack'
+                ? Buffer.from(MessagePack.encode(room))
+                : JSON.stringify(room);
+        } else {
+            this._stats.fragmentHits += 1;
+        }
+        return fragments[codec];
+    }
+
+    _encodeJson(message) {
+        const { payload } = message;
+        const rooms = Array.isArray(payload) ? payload : payload.availableRooms;
+        const roomsJson = `[${rooms.map(room => this._fragment(room, 'json')).join(',')}]`;
+
+        const payloadJson = Array.isArray(payload)
+            ? roomsJson
+            : stringifyWith(payload, new Map([[rooms, roomsJson]]));
+        return stringifyWith(message, new Map([[payload, payloadJson]]));
+    }
+
+    _encodeMsgpack(message) {
+        const { payload } = message;
+        const rooms = Array.isArray(payload) ? payload : payload.availableRooms;
+        const rawRooms = rooms.map(room => new MessagePack.Raw(this._fragment(room, 'msgpack')));
+
+        return MessagePack.encode({
+            ...message,
+            payload: Array.isArray(payload) ? rawRooms : { ...payload, availableRooms: rawRooms }
+        });
+    }
+}
@@ -0,0 +1,76 @@
+/**
+ * JsonFile - A JSON document in the add-on's /data directory
+ *
+ * Writes are debounced, so a burst of changes (e.g. every renderer being probed
+ * during start-up) results in one write, and go through a temporary file and a
+ * rename, so a restart mid-write can't leave a truncated file behind.
+ */
+
+import fs from 'fs';
+import path from 'path';
+
+export default class JsonFile {
+    /**
+     * @param {string} filePath
+     * @param {{writeDelayMs?: number}} [options]
+     */
+    constructor(filePath, { writeDelayMs = 1000 } = {}) {
+        this.filePath = filePath;
+        this.writeDelayMs = writeDelayMs;
+
+        this._writeTimer = null;
+        this._getData = null;
+        this._writeFailed = false;
+
+        this._stats = { writes: 0, writeFailures: 0 };
+    }
+
+    /**
+     * @returns {*} The parsed document, or undefined if missing or unreadable
+     */
+    read() {
+        try {
+            if (!fs.existsSync(this.filePath)) return undefined;
+            return JSON.parse(fs.readFileSync(this.filePath, 'utf8'));
+        } catch (err) {
+            console.warn(`JsonFile: Failed to read ${this.filePath}: ${err.message}`);
+            return undefined;
+        }
+    }
+
+    /**
+     * Writes the document after the write delay.
+     * @param {function(): *} getData - Called at write time, so the latest data is written
+     */
+    scheduleWrite(getData) {
+        this._getData = getData;
+        if (this._writeTimer) return;
+        this._writeTimer = setTimeout(() => {
+            this._writeTimer = null;
+            this._write();
+        }, this.writeDelayMs);
+    }
+
+    getStats() {
+        return { ...this._stats };
+    }
+
+    async _write() {
+        const data = JSON.stringify(this._getData());
+        const tmpPath = `${this.filePath}.tmp`;
+        try {
+            await fs.promises.mkdir(path.dirname(this.filePath), { recursive: true });
+            await fs.promises.writeFile(tmpPath, data, 'utf8');
+            await fs.promises.rename(tmpPath, this.filePath);
+            this._stats.writes += 1;
+            this._writeFailed = false;
+        } catch (err) {
+            this._stats.writeFailures += 1;
+            // Warn once, e.g. in a standalone container without a /data volume
+            if (!this._writeFailed) {
+                console.warn(`JsonFile: Failed to write ${this.filePath}: ${err.message}`);
+            }
+            this._writeFailed = true;
+        }
+    }
+}
@@ -0,0 +1,65 @@
+/**
+ * LastChange - Reader for UPnP LastChange event documents
+ *
+ * RenderingControl and AVTransport report state changes as a single LastChange
+ * variable holding a small XML document:
+ *
+ *   <Event xmlns="urn:schemas-upnp-org:metadata-1-0/RCS/">
+ *     <InstanceID val="0"><Volume channel="Master" val="30"/></InstanceID>
+ *   </Event>
+ *
+ * Every state variable is an empty element carrying its value in `val`.
+ */
+
+import { decodeEntities } from './DidlParser.js';
+
+const ELEMENT_PATTERN = /<([A-Za-z_][\w.:-]*)((?:\s+[\w.:-]+\s*=\s*(?:"[^"]*"|'[^']*'))*)\s*\/?>/g;
+const ATTRIBUTE_PATTERN = /([\w.:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')/g;
+const CONTAINER_ELEMENTS = new Set(['Event', 'InstanceID']);
+
+/**
+ * @typedef {Object} LastChangeVariable
+ * @property {string} name - Element name without namespace prefix
+ * @property {Object<string, string>} attributes - Decoded attributes, including `val`
+ */
+
+/**
+ * Lists the state variables of a LastChange document in document order.
+ * Only instance 0 is read; Raumfeld renderers have no other instances.
+ * @param {string} xml
+ * @returns {LastChangeVariable[]}
+ */
+export function parseLastChange(xml) {
+    const variables = [];
+    if (!xml) return variables;
+
+    let instance = null;
+    for (const [, tagName, attributeText] of xml.matchAll(ELEMENT_PATTERN)) {
+        const name = tagName.slice(tagName.indexOf(':') + 1);
+        const attributes = {};
+        for (const [, key, doubleQuoted, singleQuoted] of attributeText.matchAll(ATTRIBUTE_PATTERN)) {
+            attributes[key] = decodeEntities(doubleQuoted ?? singleQuoted);
+        }
+
+        if (name === 'InstanceID') instance = attributes.val;
+        if (CONTAINER_ELEMENTS.has(name) || instance !== '0') continue;
+        variables.push({ name, attributes });
+    }
+    return variables;
+}
+
+/**
+ * Returns the "Source Select" value reported in a LastChange document, either as a
+ * SourceSelect variable or as a device setting named "Source Select".
+ * @param {LastChangeVariable[]} variables
+ * @returns {string|undefined}
+ */
+export function getSourceSelect(variables) {
+    for (const { name, attributes } of variables) {
+        const settingName = attributes.Name ?? attributes.name;
+        if (name === 'SourceSelect' || settingName === 'Source Select') {
+            return attributes.val ?? attributes.Value;
+        }
+    }
+    return undefined;
+}
@@ -0,0 +1,40 @@
+/**
+ * LatencyRecorder - Percentiles over the most recent durations of an operation
+ *
+ * Keeps a fixed-size window of samples, so the reported percentiles follow the
+ * current behaviour instead of averaging over the add-on's whole uptime.
+ */
+
+export default class LatencyRecorder {
+    /**
+     * @param {number} [windowSize] - Number of most recent samples kept
+     */
+    constructor(windowSize = 100) {
+        this.windowSize = windowSize;
+        this._samples = [];
+        this._count = 0;
+    }
+
+    /**
+     * @param {number} durationMs
+     */
+    record(durationMs) {
+        this._count += 1;
+        this._samples.push(durationMs);
+        if (this._samples.length > this.windowSize) this._samples.shift();
+    }
+
+    getStats() {
+        const sorted = [...this._samples].sort((a, b) => a - b);
+        const percentile = (p) => sorted.length > 0
+            ? sorted[Math.min(sorted.length - 1, Math.ceil(p / 100 * sorted.length) - 1)]
+            : null;
+        return {
+            count: this._count,
+            p50: percentile(50),
+            p90: percentile(90),
+            p99: percentile(99),
+            max: sorted.length > 0 ? sorted[sorted.length - 1] : null
+        };
+    }
+}
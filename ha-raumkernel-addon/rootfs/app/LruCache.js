@@ -0,0 +1,81 @@
+/**
+ * LruCache - Bounded least-recently-used cache
+ *
+ * Relies on Map preserving insertion order: a hit re-inserts the entry at the
+ * end, so the first key is always the least recently used one.
+ */
+
+export default class LruCache {
+    /**
+     * @param {number} maxSize - Maximum number of entries
+     */
+    constructor(maxSize) {
+        this.maxSize = Math.max(1, maxSize);
+        this._entries = new Map();
+        this._stats = { hits: 0, misses: 0, evictions: 0 };
+    }
+
+    /**
+     * @param {*} key
+     * @returns {*} The cached value, or undefined
+     */
+    get(key) {
+        if (!this._entries.has(key)) {
+            this._stats.misses += 1;
+            return undefined;
+        }
+
+        const value = this._entries.get(key);
+        this._entries.delete(key);
+        this._entries.set(key, value);
+        this._stats.hits += 1;
+        return value;
+    }
+
+    /**
+     * @param {*} key
+     * @param {*} value
+     */
+    set(key, value) {
+        this._entries.delete(key);
+        this._entries.set(key, value);
+
+        if (this._entries.size > this.maxSize) {
+            this._entries.delete(this._entries.keys().next().value);
+            this._stats.evictions += 1;
+        }
+    }
+
+    /**
+     * @returns {Iterator} Keys, least recently used first
+     */
+    keys() {
+        return this._entries.keys();
+    }
+
+    has(key) {
+        return this._entries.has(key);
+    }
+
+    delete(key) {
+        return this._entries.delete(key);
+    }
+
+    clear() {
+        this._entries.clear();
+    }
+
+    get size() {
+        return this._entries.size;
+    }
+
+    getStats() {
+        const { hits, misses } = this._stats;
+        return {
+            ...this._stats,
+            size: this._entries.size,
+            maxSize: this.maxSize,
+            hitRate: hits + misses > 0 ? Math.round(hits / (hits + misses) * 1000) / 1000 : 0
+        };
+    }
+}
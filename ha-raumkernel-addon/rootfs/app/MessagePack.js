@@ -0,0 +1,237 @@
+/**
+ * MessagePack - Minimal MessagePack encoder/decoder for WebSocket frames
+ *
+ * Covers the subset of the format needed for JSON-compatible data: nil, booleans,
+ * integers, float64, strings, arrays and maps (plus bin on decode). Like
+ * JSON.stringify, object properties whose value is undefined or a function are
+ * skipped and such array elements are encoded as nil.
+ *
+ * Values wrapped in `Raw` are written as-is, which lets callers splice
+ * previously encoded fragments into a new message.
+ */
+
+const INITIAL_BUFFER_SIZE = 4096;
+
+/**
+ * An already encoded MessagePack value
+ */
+export class Raw {
+    /**
+     * @param {Buffer} bytes
+     */
+    constructor(bytes) {
+        this.bytes = bytes;
+    }
+}
+
+class Encoder {
+    constructor() {
+        this.buffer = Buffer.allocUnsafe(INITIAL_BUFFER_SIZE);
+        this.offset = 0;
+    }
+
+    _ensure(bytes) {
+        if (this.offset + bytes <= this.buffer.length) return;
+        let size = this.buffer.length * 2;
+        while (size < this.offset + bytes) size *= 2;
+        const buffer = Buffer.allocUnsafe(size);
+        this.buffer.copy(buffer, 0, 0, this.offset);
+        this.buffer = buffer;
+    }
+
+    _byte(value) {
+        this._ensure(1);
+        this.buffer[this.offset++] = value;
+    }
+
+    _header(type, writer, bytes, value) {
+        this._ensure(1 + bytes);
+        this.buffer[this.offset++] = type;
+        this.buffer[writer](value, this.offset);
+        this.offset += bytes;
+    }
+
+    encode(value) {
+        switch (typeof value) {
+            case 'string':
+                return this._string(value);
+            case 'number':
+                return this._number(value);
+            case 'boolean':
+                return this._byte(value ? 0xc3 : 0xc2);
+            case 'object':
+                if (value === null) return this._byte(0xc0);
+                if (Array.isArray(value)) return this._array(value);
+                if (value instanceof Raw) return this._raw(value.bytes);
+                return this._map(value);
+            default:
+                return this._byte(0xc0);
+        }
+    }
+
+    _raw(bytes) {
+        this._ensure(bytes.length);
+        bytes.copy(this.buffer, this.offset);
+        this.offset += bytes.length;
+    }
+
+    _number(value) {
+        if (!Number.isSafeInteger(value)) {
+            return this._header(0xcb, 'writeDoubleBE', 8, value);
+        }
+        if (value >= 0) {
+            if (value < 0x80) return this._byte(value);
+            if (value < 0x100) return this._header(0xcc, 'writeUInt8', 1, value);
+            if (value < 0x10000) return this._header(0xcd, 'writeUInt16BE', 2, value);
+            if (value < 0x100000000) return this._header(0xce, 'writeUInt32BE', 4, value);
+            return this._header(0xcf, 'writeBigUInt64BE', 8, BigInt(value));
+        }
+        if (value >= -0x20) return this._byte(value & 0xff);
+        if (value >= -0x80) return this._header(0xd0, 'writeInt8', 1, value);
+        if (value >= -0x8000) return this._header(0xd1, 'writeInt16BE', 2, value);
+        if (value >= -0x80000000) return this._header(0xd2, 'writeInt32BE', 4, value);
+        return this._header(0xd3, 'writeBigInt64BE', 8, BigInt(value));
+    }
+
+    _string(value) {
+        const length = Buffer.byteLength(value);
+        if (length < 0x20) {
+            this._byte(0xa0 | length);
+        } else if (length < 0x100) {
+            this._header(0xd9, 'writeUInt8', 1, length);
+        } else if (length < 0x10000) {
+            this._header(0xda, 'writeUInt16BE', 2, length);
+        } else {
+            this._header(0xdb, 'writeUInt32BE', 4, length);
+        }
+        this._ensure(length);
+        this.offset += this.buffer.write(value, this.offset, 'utf8');
+    }
+
+    _array(value) {
+        const length = value.length;
+        if (length < 0x10) {
+            this._byte(0x90 | length);
+        } else if (length < 0x10000) {
+            this._header(0xdc, 'writeUInt16BE', 2, length);
+        } else {
+            this._header(0xdd, 'writeUInt32BE', 4, length);
+        }
+        for (const item of value) this.encode(item);
+    }
+
+    _map(value) {
+        const keys = Object.keys(value).filter((key) =>
+            value[key] !== undefined && typeof value[key] !== 'function');
+        const length = keys.length;
+        if (length < 0x10) {
+            this._byte(0x80 | length);
+        } else if (length < 0x10000) {
+            this._header(0xde, 'writeUInt16BE', 2, length);
+        } else {
+            this._header(0xdf, 'writeUInt32BE', 4, length);
+        }
+        for (const key of keys) {
+            this._string(key);
+            this.encode(value[key]);
+        }
+    }
+}
+
+class Decoder {
+    constructor(buffer) {
+        this.buffer = Buffer.isBuffer(buffer) ? buffer : Buffer.from(buffer);
+        this.offset = 0;
+    }
+
+    _read(reader, bytes) {
+        const value = this.buffer[reader](this.offset);
+        this.offset += bytes;
+        return value;
+    }
+
+    _string(length) {
+        const value = this.buffer.toString('utf8', this.offset, this.offset + length);
+        this.offset += length;
+        return value;
+    }
+
+    _binary(length) {
+        const value = this.buffer.subarray(this.offset, this.offset + length);
+        this.offset += length;
+        return value;
+    }
+
+    _array(length) {
+        const value = new Array(length);
+        for (let i = 0; i < length; i++) value[i] = this.decode();
+        return value;
+    }
+
+    _map(length) {
+        const value = {};
+        for (let i = 0; i < length; i++) {
+            const key = this.decode();
+            value[key] = this.decode();
+        }
+        return value;
+    }
+
+    decode() {
+        const type = this.buffer[this.offset++];
+
+        if (type < 0x80) return type;
+        if (type < 0x90) return this._map(type & 0x0f);
+        if (type < 0xa0) return this._array(type & 0x0f);
+        if (type < 0xc0) return this._string(type & 0x1f);
+        if (type >= 0xe0) return type - 0x100;
+
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return this._binary(this._read('readUInt8', 1));
+            case 0xc5: return this._binary(this._read('readUInt16BE', 2));
+            case 0xc6: return this._binary(this._read('readUInt32BE', 4));
+            case 0xca: return this._read('readFloatBE', 4);
+            case 0xcb: return this._read('readDoubleBE', 8);
+            case 0xcc: return this._read('readUInt8', 1);
+            case 0xcd: return this._read('readUInt16BE', 2);
+            case 0xce: return this._read('readUInt32BE', 4);
+            case 0xcf: return Number(this._read('readBigUInt64BE', 8));
+            case 0xd0: return this._read('readInt8', 1);
+            case 0xd1: return this._read('readInt16BE', 2);
+            case 0xd2: return this._read('readInt32BE', 4);
+            case 0xd3: return Number(this._read('readBigInt64BE', 8));
+            case 0xd9: return this._string(this._read('readUInt8', 1));
+            case 0xda: return this._string(this._read('readUInt16BE', 2));
+            case 0xdb: return this._string(this._read('readUInt32BE', 4));
+            case 0xdc: return this._array(this._read('readUInt16BE', 2));
+            case 0xdd: return this._array(this._read('readUInt32BE', 4));
+            case 0xde: return this._map(this._read('readUInt16BE', 2));
+            case 0xdf: return this._map(this._read('readUInt32BE', 4));
+            default:
+                throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+        }
+    }
+}
+
+/**
+ * @param {*} value
+ * @returns {Buffer}
+ */
+export function encode(value) {
+    const encoder = new Encoder();
+    encoder.encode(value);
+    return encoder.buffer.subarray(0, encoder.offset);
+}
+
+/**
+ * @param {Buffer|Uint8Array} buffer
+ * @returns {*}
+ */
+export function decode(buffer) {
+    return new Decoder(buffer).decode();
+}
+
+export default { encode, decode, Raw };
@@ -0,0 +1,163 @@
+/**
+ * OutboundQueue - Per-client send queue with backpressure
+ *
+ * Frames are written to the socket directly while the client keeps up. Once more
+ * than `highWaterMark` bytes are waiting to be written, frames are queued instead:
+ * - State messages (fullStateUpdate, stateDelta, zoneStateChanged) are not queued
+ *   one by one. A single placeholder records that the client's state is stale and
+ *   is replaced by a fresh snapshot when the queue drains, so a slow client skips
+ *   intermediate states instead of receiving all of them late.
+ * - All other messages (command replies, hello, events) are queued and never
+ *   dropped. If they exceed `maxQueueBytes` the client is considered stuck and
+ *   the connection is terminated.
+ */
+
+export const STATE_MESSAGE_TYPES = new Set(['fullStateUpdate', 'stateDelta', 'zoneStateChanged']);
+
+const byteLength = (frame) => typeof frame === 'string' ? Buffer.byteLength(frame) : frame.length;
+
+export default class OutboundQueue {
+    /**
+     * @param {WebSocket} ws
+     * @param {function(Set<string>): Array<string|Buffer|null>} resyncState - Builds the
+     *        frames that replace superseded state messages of the given types
+     * @param {{highWaterMark?: number, maxQueueBytes?: number}} [options]
+     */
+    constructor(ws, resyncState, { highWaterMark = 64 * 1024, maxQueueBytes = 1024 * 1024 } = {}) {
+        this._ws = ws;
+        this._resyncState = resyncState;
+        this.highWaterMark = highWaterMark;
+        this.maxQueueBytes = maxQueueBytes;
+
+        this._queue = [];
+        this._queuedBytes = 0;
+        this._stateEntry = null;
+        this._inFlight = 0;
+        this._drainWaiters = [];
+
+        this._stats = {
+            sentMessages: 0,
+            sentBytes: 0,
+            queuedMessages: 0,
+            supersededStates: 0,
+            resyncs: 0,
+            maxQueueDepth: 0,
+            maxQueuedBytes: 0
+        };
+    }
+
+    /**
+     * True while frames are waiting, either in this queue or in the socket buffer.
+     */
+    get isCongested() {
+        return this._queue.length > 0 || this._buffered() >= this.highWaterMark;
+    }
+
+    /**
+     * Sends a frame that must not be dropped.
+     * @param {string|Buffer} frame
+     */
+    send(frame) {
+        if (!this.isCongested) {
+            this._write(frame);
+            return;
+        }
+
+        const bytes = byteLength(frame);
+        this._queue.push({ frame, bytes });
+        this._queuedBytes += bytes;
+        this._stats.queuedMessages += 1;
+        this._trackDepth();
+
+        if (this._queuedBytes > this.maxQueueBytes) {
+            console.warn(`Client queue exceeded ${this.maxQueueBytes} bytes, closing connection`);
+            this._ws.terminate();
+        }
+    }
+
+    /**
+     * Resolves once nothing is queued and the socket buffer is below the high
+     * water mark, or a write failed. Lets producers of long replies pace
+     * themselves instead of filling the queue.
+     * @returns {Promise<void>}
+     */
+    whenDrained() {
+        if (!this.isCongested) return Promise.resolve();
+        return new Promise(resolve => this._drainWaiters.push(resolve));
+    }
+
+    /**
+     * Records a state message that was not sent because the client is congested.
+     * The client receives the then-current state once the queue drains.
+     * @param {string} type - State message type
+     */
+    supersedeState(type) {
+        this._stats.supersededStates += 1;
+        if (!this._stateEntry) {
+            this._stateEntry = { types: new Set() };
+            this._queue.push(this._stateEntry);
+            this._trackDepth();
+        }
+        this._stateEntry.types.add(type);
+    }
+
+    getStats() {
+        return {
+            ...this._stats,
+            queueDepth: this._queue.length,
+            queuedBytes: this._queuedBytes,
+            bufferedBytes: this._buffered(),
+            statePending: this._stateEntry !== null
+        };
+    }
+
+    _buffered() {
+        return Math.max(this._ws.bufferedAmount, this._inFlight);
+    }
+
+    _trackDepth() {
+        this._stats.maxQueueDepth = Math.max(this._stats.maxQueueDepth, this._queue.length);
+        this._stats.maxQueuedBytes = Math.max(this._stats.maxQueuedBytes, this._queuedBytes);
+    }
+
+    _write(frame) {
+        const bytes = byteLength(frame);
+        this._inFlight += bytes;
+        this._stats.sentMessages += 1;
+        this._stats.sentBytes += bytes;
+
+        // The callback runs once the frame has been handed to the socket
+        this._ws.send(frame, (error) => {
+            this._inFlight -= bytes;
+            if (error) {
+                this._releaseDrainWaiters();
+            } else {
+                this._drain();
+            }
+        });
+    }
+
+    _drain() {
+        while (this._queue.length > 0 && this._buffered() < this.highWaterMark) {
+            const entry = this._queue.shift();
+
+            if (entry === this._stateEntry) {
+                this._stateEntry = null;
+                this._stats.resyncs += 1;
+                for (const frame of this._resyncState(entry.types)) {
+                    if (frame) this._write(frame);
+                }
+            } else {
+                this._queuedBytes -= entry.bytes;
+                this._write(entry.frame);
+            }
+        }
+        if (!this.isCongested) this._releaseDrainWaiters();
+    }
+
+    _releaseDrainWaiters() {
+        const waiters = this._drainWaiters;
+        this._drainWaiters = [];
+        waiters.forEach(resolve => resolve());
+    }
+}
@@ -27,8 +27,22 @@
  * - deviceManager.mediaRenderersVirtual is keyed by ZONE UDN
  */
 
-import { JSDOM } from 'jsdom';
+import { EventEmitter } from 'events';
+import { randomUUID } from 'crypto';
 import * as RaumkernelLib from 'node-raumkernel';
+import BroadcastScheduler from './BroadcastScheduler.js';
+import BrowseCache, { parseContainerUpdateIds } from './BrowseCache.js';
+import BrowsePrefetcher from './BrowsePrefetcher.js';
+import CapabilityCache from './CapabilityCache.js';
+import ConcurrencyLimiter from './ConcurrencyLimiter.js';
+import LatencyRecorder from './LatencyRecorder.js';
+import LruCache from './LruCache.js';
+import { parseDidl } from './DidlParser.js';
+import { getSourceSelect, parseLastChange } from './LastChange.js';
+import RoomIndex from './RoomIndex.js';
+import SourcePoller from './SourcePoller.js';
+import StateSnapshot from './StateSnapshot.js';
+import { buildZoneTopology, changedZones, diffZoneTopology } from './ZoneTopology.js';
 
 // ============================================================================
 // TYPE DEFINITIONS (JSDoc for IDE support)
@@ -83,6 +97,18 @@ import * as RaumkernelLib from 'node-raumkernel';
  * @property {string} classString - UPnP object class
  */
 
+/**
+ * @typedef {Object} StateDelta
+ * @property {number} version - State version after applying this delta
+ * @property {number} baseVersion - State version this delta applies on top of
+ * @property {boolean} stale - Whether the rooms are still the ones restored from
+ *   the snapshot, with unknown playback state
+ * @property {Object<string, Object>} rooms - Changed fields keyed by room UDN.
+ *   New rooms are sent in full; for existing rooms only changed top-level fields
+ *   and changed `nowPlaying` fields are included.
+ * @property {string[]} removed - Room UDNs that are no longer available
+ */
+
 // ============================================================================
 // LOGGING CONFIGURATION
 // ============================================================================
@@ -95,14 +121,96 @@ const LOG_PREFIX = {
     BROWSE: '[Browse]'
 };
 
+/** Number of distinct track metadata strings whose parse result is cached */
+const METADATA_CACHE_SIZE = 256;
+
+/** Number of recent deltas kept so reconnecting clients can catch up without a snapshot */
+const DELTA_HISTORY_SIZE = 256;
+
+/** Where capability probe results are persisted across add-on restarts */
+const CAPABILITY_CACHE_PATH = '/data/capabilities.json';
+
+/** Where the last known room list is kept for warm starts */
+const STATE_SNAPSHOT_PATH = '/data/state-snapshot.json';
+
+/** Number of renderers probed for capabilities at the same time */
+const CAPABILITY_PROBE_CONCURRENCY = 3;
+
+/** Age after which a cached capability entry is re-probed in the background */
+const CAPABILITY_REVALIDATE_AFTER_MS = 24 * 60 * 60 * 1000;
+
+/** Delay before background revalidation, so it doesn't compete with startup traffic */
+const CAPABILITY_REVALIDATE_DELAY_MS = 60 * 1000;
+
+/** Delay before probing a renderer again whose probe got no answer */
+const CAPABILITY_RETRY_DELAY_MS = 30 * 1000;
+
+/** Error codes of upnp-device-client for calls the device answered with a rejection */
+const UPNP_REJECTION_CODES = new Set(['EUPNP', 'ENOSERVICE', 'ENOACTION']);
+
+/** How long grouping commands wait for the host to set up a zone */
+const ZONE_WAIT_TIMEOUT_MS = 7500;
+
+/** node-raumkernel events after which a zone waiter may be satisfied */
+const ZONE_WAIT_EVENTS = ['mediaRendererRaumfeldVirtualAdded', 'mediaRendererAdded'];
+
+const RENDERING_CONTROL_SERVICE = 'urn:upnp-org:serviceId:RenderingControl';
+
+/** RenderingControl variables that change often and never accompany a source switch */
+const VOLUME_VARIABLES = new Set(['Volume', 'VolumeDB', 'Mute', 'Loudness', 'RoomVolumes', 'RoomMutes']);
+
+const CONTENT_DIRECTORY_SERVICE = 'urn:upnp-org:serviceId:ContentDirectory';
+
+/** Number of containers whose browse result is cached */
+const BROWSE_CACHE_SIZE = 200;
+
+/** Browse cache TTLs by object ID prefix; the first match wins. Updated containers
+ *  are invalidated through ContentDirectory events, the TTL covers missed events. */
+const BROWSE_CACHE_TTLS = [
+    ['0/Favorites/RecentlyPlayed', 10 * 1000],
+    ['0/Favorites', 60 * 1000],
+    ['0/Playlists', 60 * 1000],
+    ['0/My Music', 10 * 60 * 1000],
+    ['0/RadioTime', 10 * 60 * 1000]
+];
+const BROWSE_CACHE_DEFAULT_TTL_MS = 2 * 60 * 1000;
+
+/** Largest number of objects requested from the media server in one Browse call */
+const BROWSE_MAX_PAGE_SIZE = 500;
+
+/** Child containers prefetched after each browse, unless configured otherwise */
+const BROWSE_PREFETCH_DEFAULT_COUNT = 3;
+
+/** Prefetches running at the same time */
+const BROWSE_PREFETCH_CONCURRENCY = 1;
+
+/** Browse objects that prefetched, not yet used results may hold in the cache */
+const BROWSE_PREFETCH_MAX_ITEMS = 5000;
+
 // ============================================================================
 // MAIN CLASS
 // ============================================================================
 
-class RaumkernelHelper {
-    constructor() {
+/**
+ * Emits:
+ * - 'stateDelta' ({StateDelta}) whenever the published room state changes
+ * - 'zoneChanges' ({ZoneChange[]}) when rooms join or leave zones, or zones are
+ *   created, removed or renamed
+ * - 'browseInvalidated' ({objectIds: string[]|null}) when the media server reports
+ *   updated containers; null means all browse results may be outdated
+ */
+class RaumkernelHelper extends EventEmitter {
+    /**
+     * @param {{raumkernel?: RaumkernelLib.Raumkernel, broadcastWindowMs?: number,
+     *   broadcastMaxLatencyMs?: number, capabilityCachePath?: string,
+     *   stateSnapshotPath?: string, browsePrefetchCount?: number}} [options]
+     *   `raumkernel` replaces the node-raumkernel instance, e.g. with a stub in tests
+     */
+    constructor(options = {}) {
+        super();
+
         /** @type {RaumkernelLib.Raumkernel} */
-        this.raumkernel = new RaumkernelLib.Raumkernel();
+        this.raumkernel = options.raumkernel ?? new RaumkernelLib.Raumkernel();
 
         // Configure manual host if set
         if (process.env.RAUMFELD_HOST && process.env.RAUMFELD_HOST.trim() !== '') {
@@ -113,26 +221,129 @@ class RaumkernelHelper {
         /** @type {Map<string, RoomInfo>} Room registry keyed by RENDERER UDN */
         this._rooms = new Map();
 
+        /** @type {Map<string, string>} ROOM UDN to RENDERER UDN for registry lookups */
+        this._roomKeysByRoomUdn = new Map();
+
+        /** @type {Map<string, import('./ZoneTopology.js').ZoneInfo>} Last applied zone configuration */
+        this._zoneTopology = new Map();
+
         /** @type {Map<string, boolean>} Source Select capability cache keyed by RENDERER UDN */
         this._roomCapabilities = new Map();
 
         /** @type {Map<string, boolean>} Line-in capability cache keyed by RENDERER UDN */
         this._roomLineInCapabilities = new Map();
 
+        /** @type {CapabilityCache} Probe results persisted across restarts */
+        this._capabilityCache = new CapabilityCache(options.capabilityCachePath ?? CAPABILITY_CACHE_PATH);
+        this._capabilityCache.load();
+
+        /** @type {ConcurrencyLimiter} Bounds parallel capability probes */
+        this._capabilityProbeLimiter = new ConcurrencyLimiter(CAPABILITY_PROBE_CONCURRENCY);
+
+        /** @type {Map<string, Promise<void>>} Running detections keyed by RENDERER UDN */
+        this._capabilityDetections = new Map();
+        this._capabilityStats = { probes: 0, probeFailures: 0, revalidations: 0, revalidationChanges: 0 };
+
         /** @type {Map<string, string>} Current "Source Select" value cache keyed by RENDERER UDN */
         this._roomCurrentSourceCache = new Map();
 
+        /** @type {SourcePoller} Refreshes the "Source Select" value of soundbars/sounddecks */
+        // Source changes are picked up from RenderingControl events; polling only
+        // catches changes the device doesn't announce.
+        this._sourcePoller = new SourcePoller({
+            getKeys: () => this._getSourceSwitchingRenderers(),
+            poll: (rendererUdn) => this._readCurrentSource(rendererUdn),
+            apply: (rendererUdn, source) => this._applySource(rendererUdn, source)
+        }, { minIntervalMs: 30000, maxIntervalMs: 300000 });
+
+        /** @type {Map<string, {upnpClient: Object, listener: Function}>} RenderingControl
+         *  event subscriptions of source-switching renderers, keyed by RENDERER UDN */
+        this._sourceEventSubscriptions = new Map();
+        this._sourceEventStats = { events: 0, sourceChanges: 0, triggeredPolls: 0 };
+
+        /** @type {Map<string, string>} Last seen PowerState of source-switching renderers, keyed by RENDERER UDN */
+        this._lastPowerStates = new Map();
+
         /** @type {Map<string, number>} Timestamp until which a cached "LineIn" source should not be
          *  overridden by stale URI-based detection (renderer reconnect after Line-in switch) */
         this._roomLineInGraceUntil = new Map();
         
-        /** @type {{isReady: boolean, availableRooms: RoomState[], favourites: []}} */
+        /** @type {{isReady: boolean, stale: boolean, availableRooms: RoomState[], favourites: []}}
+         *  `stale` is set while rooms restored from the snapshot are served before systemReady */
         this._state = {
             isReady: false,
+            stale: false,
             availableRooms: [],
             favourites: []
         };
 
+        /** @type {Map<string, RoomState>} Last published state per room, keyed by RENDERER UDN */
+        this._roomStates = new Map();
+
+        /** @type {string[]} RENDERER UDNs ordered by room name, kept sorted on insert and rename */
+        this._sortedRoomKeys = [];
+        this._roomNameCollator = new Intl.Collator();
+
+        /** @type {RoomIndex} Published rooms by room, zone and renderer UDN and name */
+        this._roomIndex = new RoomIndex(this._roomNameCollator);
+
+        /** @type {Set<string>} RENDERER UDNs of rooms to rebuild on the next scheduled broadcast */
+        this._dirtyRooms = new Set();
+        this._allRoomsDirty = false;
+        this._roomStateStats = { rebuilt: 0, reused: 0 };
+
+        /** @type {LruCache} Parsed track metadata keyed by the DIDL-Lite string */
+        this._metadataCache = new LruCache(METADATA_CACHE_SIZE);
+
+        /** @type {BrowseCache} Parsed browse results keyed by object ID */
+        this._browseCache = new BrowseCache({
+            maxEntries: BROWSE_CACHE_SIZE,
+            ttlFor: (objectId) => this._getBrowseTtl(objectId)
+        });
+
+        /** @type {BrowsePrefetcher} Browses the first children of opened containers in the background */
+        this._browsePrefetcher = new BrowsePrefetcher({
+            count: options.browsePrefetchCount ?? BROWSE_PREFETCH_DEFAULT_COUNT,
+            concurrency: BROWSE_PREFETCH_CONCURRENCY,
+            maxItems: BROWSE_PREFETCH_MAX_ITEMS,
+            ttlFor: (objectId) => this._getBrowseTtl(objectId)
+        });
+
+        /** @type {{upnpClient: Object, listener: Function, systemUpdateId?: string}|null}
+         *  ContentDirectory event subscription of the media server, for browse cache invalidation */
+        this._contentDirectorySubscription = null;
+        this._contentDirectoryEvents = 0;
+
+        /** @type {number} Monotonically increasing version of the published room state */
+        this._stateVersion = 0;
+
+        /** @type {string} Identifies this process' version sequence; versions restart with the add-on */
+        this._stateEpoch = randomUUID();
+
+        /** @type {StateDelta[]} Most recent deltas, oldest first */
+        this._deltaHistory = [];
+
+        /** `stale` as last published; a change is published even if no room changed */
+        this._publishedStale = false;
+
+        // Coalesces bursts of rendererStateChanged events into one state rebuild
+        this._broadcastScheduler = new BroadcastScheduler(() => this._broadcastDirtyRooms(), {
+            windowMs: options.broadcastWindowMs,
+            maxLatencyMs: options.broadcastMaxLatencyMs
+        });
+
+        /** @type {Set<{roomUdn: string, check: Function}>} Pending waitForZone calls */
+        this._zoneWaiters = new Set();
+        this._zoneWaitStats = { resolved: 0, timedOut: 0 };
+
+        /** @type {LatencyRecorder} Duration of successful joinGroup commands */
+        this._joinLatency = new LatencyRecorder();
+        this._joinFailures = 0;
+
+        /** @type {StateSnapshot} Last known rooms, served until discovery completes */
+        this._stateSnapshot = new StateSnapshot(options.stateSnapshotPath ?? STATE_SNAPSHOT_PATH);
+        this._restoreStateSnapshot();
+
         this._setupLogging();
         this._setupEventHandlers();
         this.raumkernel.init();
@@ -162,24 +373,29 @@ class RaumkernelHelper {
             console.log(`${LOG_PREFIX.REGISTRY} System ready: ${ready}`);
             this._state.isReady = ready;
             if (ready) {
+                // Live rooms replace the restored ones; the diff removes rooms that are gone
+                this._state.stale = false;
+                // The live rooms are new to the registry and have no zone fields yet. A
+                // restored topology must not be the baseline, or rooms of unchanged
+                // zones would never get them.
+                this._zoneTopology = new Map();
                 // If we have a fixed host, we might want to log it
                 if (this.raumkernel.getSettings().raumfeldHost !== "0.0.0.0") {
                      console.log(`${LOG_PREFIX.REGISTRY} Connected to fixed host: ${this.raumkernel.getSettings().raumfeldHost}`);
                 }
-                this._refreshRoomRegistry();
 
-                // Process initial zone state
+                // Process initial zone state first, so rooms are never published
+                // without their zones in between
                 const zoneManager = this._getZoneManager();
                 if (zoneManager && zoneManager.zoneState) {
                     console.log(`${LOG_PREFIX.REGISTRY} Processing initial zone state`);
                     this._handleZoneStateChange(zoneManager.zoneState);
                 }
+                this._refreshRoomRegistry();
 
-                // Periodically refresh the "Source Select" value for soundbars/sounddecks
-                // to pick up changes made outside of HA (e.g. TV auto-switching to ARC).
-                if (!this._sourcePollInterval) {
-                    this._sourcePollInterval = setInterval(() => this._pollCurrentSources(), 30000);
-                }
+                // Slow consistency check of the "Source Select" value for soundbars/sounddecks;
+                // changes normally arrive as RenderingControl events.
+                this._sourcePoller.start();
             }
         });
 
@@ -192,14 +408,30 @@ class RaumkernelHelper {
             this._handleZoneStateChange(data);
         });
 
-        this.raumkernel.on('rendererStateChanged', () => {
-            this._broadcastRoomStates();
+        this.raumkernel.on('rendererStateChanged', (renderer) => {
+            this._checkPowerStateChange(renderer);
+            this._markRendererDirty(renderer?.udn?.());
+            this._broadcastScheduler.schedule();
+            this._checkZoneWaiters(renderer?.udn?.());
         });
+
+        for (const event of ZONE_WAIT_EVENTS) {
+            this.raumkernel.on(event, () => this._checkZoneWaiters());
+        }
     }
 
     _resetState() {
-        this._state = { isReady: false, availableRooms: [], favourites: [] };
+        this._broadcastScheduler.cancel();
+        this._unsubscribeSourceEvents();
+        this._unsubscribeContentDirectoryEvents();
+        this._invalidateBrowseCache();
+        this._dirtyRooms.clear();
+        this._allRoomsDirty = false;
+        this._state.isReady = false;
         this._rooms.clear();
+        this._roomKeysByRoomUdn.clear();
+        this._zoneTopology = new Map();
+        this._broadcastRoomStates();
     }
 
     // ========================================================================
@@ -213,17 +445,85 @@ class RaumkernelHelper {
         return this._state;
     }
 
+    /**
+     * Returns the version of the state currently returned by getState()
+     * @returns {number}
+     */
+    getStateVersion() {
+        return this._stateVersion;
+    }
+
+    /**
+     * Returns the epoch of the state version sequence
+     * @returns {string}
+     */
+    getStateEpoch() {
+        return this._stateEpoch;
+    }
+
+    /**
+     * Returns the deltas that lead from `version` to the current state.
+     * @param {number} version - State version the client has
+     * @returns {StateDelta[]|null} The deltas in order, or null if they are no longer
+     *   (or were never) available and the client needs a full snapshot
+     */
+    getDeltasSince(version) {
+        if (version === this._stateVersion) return [];
+        const oldest = this._deltaHistory[0];
+        if (!oldest || version < oldest.baseVersion || version > this._stateVersion) return null;
+        return this._deltaHistory.filter(delta => delta.baseVersion >= version);
+    }
+
+    /**
+     * Returns runtime statistics for diagnostics
+     */
+    getStats() {
+        return {
+            stateVersion: this._stateVersion,
+            stateEpoch: this._stateEpoch,
+            deltaHistory: this._deltaHistory.length,
+            roomStates: { ...this._roomStateStats },
+            metadataCache: this._metadataCache.getStats(),
+            browseCache: { ...this._browseCache.getStats(), serverEvents: this._contentDirectoryEvents },
+            browsePrefetch: this._browsePrefetcher.getStats(),
+            broadcast: this._broadcastScheduler.getStats(),
+            grouping: {
+                joinLatencyMs: this._joinLatency.getStats(),
+                joinFailures: this._joinFailures,
+                zoneWaits: { ...this._zoneWaitStats, pending: this._zoneWaiters.size }
+            },
+            stateSnapshot: { stale: this._state.stale, ...this._stateSnapshot.getStats() },
+            sourcePolling: this._sourcePoller.getStats(),
+            capabilities: {
+                ...this._capabilityStats,
+                cache: this._capabilityCache.getStats(),
+                probesPending: this._capabilityProbeLimiter.active + this._capabilityProbeLimiter.pending
+            },
+            sourceEvents: { ...this._sourceEventStats, subscriptions: this._sourceEventSubscriptions.size }
+        };
+    }
+
     // ========================================================================
     // ROOM REGISTRY MANAGEMENT
     // ========================================================================
 
     /**
-     * Refreshes the room registry from current device state.
-     * Called on system ready and when devices change.
+     * Refreshes the room registry from current device state and broadcasts all rooms.
+     * Called on system ready.
      */
     _refreshRoomRegistry() {
+        this._syncRoomRegistry();
+        this._broadcastRoomStates();
+    }
+
+    /**
+     * Adds rooms for renderers that are not in the registry yet.
+     * @returns {string[]} RENDERER UDNs of the added rooms
+     */
+    _syncRoomRegistry() {
+        const added = [];
         const deviceManager = this._getDeviceManager();
-        if (!deviceManager) return;
+        if (!deviceManager) return added;
 
         for (const [rendererUdn, renderer] of deviceManager.mediaRenderers) {
             if (this._rooms.has(rendererUdn)) continue;
@@ -240,6 +540,8 @@ class RaumkernelHelper {
             }
             
             this._rooms.set(rendererUdn, roomInfo);
+            this._roomKeysByRoomUdn.set(roomInfo.roomUdn, rendererUdn);
+            added.push(rendererUdn);
             
             console.log(`${LOG_PREFIX.REGISTRY} Added: ${roomInfo.name} ` +
                 `(room: ${roomInfo.roomUdn}, renderer: ${roomInfo.rendererUdn})`);
@@ -248,7 +550,7 @@ class RaumkernelHelper {
             this._detectCapabilities(rendererUdn, renderer);
         }
 
-        this._broadcastRoomStates();
+        return added;
     }
 
     /**
@@ -274,116 +576,323 @@ class RaumkernelHelper {
     }
 
     /**
-     * Updates zone mappings when zone state changes
+     * Updates zone mappings when zone state changes. Only rooms whose zone changed
+     * (and newly discovered rooms) are updated and re-broadcast.
      * @param {*} combinedStateData 
      */
     _handleZoneStateChange(combinedStateData) {
-        const state = JSON.parse(JSON.stringify(combinedStateData));
-        
-        this._refreshRoomRegistry();
-        this._updateZoneMappings(state);
-        this._broadcastRoomStates();
+        const addedRooms = this._syncRoomRegistry();
+
+        const topology = combinedStateData?.zones
+            ? buildZoneTopology(combinedStateData.zones)
+            : this._zoneTopology;
+
+        const changes = diffZoneTopology(this._zoneTopology, topology);
+        const affectedRooms = this._applyZoneTopology(topology, addedRooms);
+        this._zoneTopology = topology;
+
+        if (changes.length > 0) {
+            console.log(`${LOG_PREFIX.REGISTRY} Zone changes: ` +
+                changes.map(change => `${change.type}(${change.roomUdn ?? change.name ?? change.zoneUdn})`).join(', '));
+            this.emit('zoneChanges', changes);
+        }
+
+        this._broadcastRoomStates(affectedRooms);
+        this._checkZoneWaiters();
     }
 
     /**
-     * Maps rooms to their current zones based on combined zone state
-     * @param {{zones: Array}} combinedState 
+     * Writes zone fields of the rooms that are members of changed zones in either
+     * the current or the new topology, plus the given new rooms.
+     * @param {Map<string, import('./ZoneTopology.js').ZoneInfo>} topology
+     * @param {string[]} addedRooms - RENDERER UDNs of rooms new to the registry
+     * @returns {string[]} RENDERER UDNs of the updated rooms
      */
-    _updateZoneMappings(combinedState) {
-        if (!combinedState?.zones) return;
+    _applyZoneTopology(topology, addedRooms) {
+        const memberUdns = new Set();
+        for (const zoneUdn of changedZones(this._zoneTopology, topology)) {
+            for (const udn of this._zoneTopology.get(zoneUdn)?.members ?? []) memberUdns.add(udn);
+            for (const udn of topology.get(zoneUdn)?.members ?? []) memberUdns.add(udn);
+        }
 
-        // Reset all zone mappings
-        for (const room of this._rooms.values()) {
-            room.zoneUdn = null;
-            room.zoneMembers = [room.roomUdn];
-            room.zoneName = null;
+        const zoneByMember = new Map();
+        for (const [zoneUdn, zone] of topology) {
+            for (const udn of zone.members) zoneByMember.set(udn, zoneUdn);
         }
 
-        // Apply zone mappings from state
-        for (const zone of combinedState.zones) {
-            // Log zone details for debugging
-            // console.log(`${LOG_PREFIX.REGISTRY} Processing zone: ${zone.udn} (isZone: ${zone.isZone}, name: ${zone.name})`);
-            
-            if (!zone.isZone) continue;
+        const rooms = new Map(addedRooms.map(key => [key, this._rooms.get(key)]));
+        for (const udn of memberUdns) {
+            const room = this._findRoomByAnyUdn(udn);
+            if (room) {
+                rooms.set(room.rendererUdn, room);
+            } else if (zoneByMember.has(udn)) {
+                console.warn(`${LOG_PREFIX.REGISTRY} Could not find room for member UDN: ${udn}`);
+            }
+        }
 
-            const memberUdns = zone.rooms?.map(r => r.udn) ?? [];
-            // console.log(`${LOG_PREFIX.REGISTRY} Zone ${zone.name} (${zone.udn}) has members: ${memberUdns.join(', ')}`);
-            
-            for (const memberUdn of memberUdns) {
-                const room = this._findRoomByAnyUdn(memberUdn);
-                if (room) {
-                    room.zoneUdn = zone.udn;
-                    room.zoneMembers = memberUdns;
-                    room.zoneName = zone.name;
-                    // console.log(`${LOG_PREFIX.REGISTRY} Mapped room ${room.name} to zone ${zone.name}`);
-                } else {
-                    console.warn(`${LOG_PREFIX.REGISTRY} Could not find room for member UDN: ${memberUdn}`);
-                }
+        for (const room of rooms.values()) {
+            const zoneUdn = zoneByMember.get(room.roomUdn) ?? zoneByMember.get(room.rendererUdn) ?? null;
+            const zone = zoneUdn ? topology.get(zoneUdn) : null;
+            room.zoneUdn = zoneUdn;
+            room.zoneMembers = zone ? zone.members : [room.roomUdn];
+            room.zoneName = zone ? zone.name : null;
+        }
+
+        return [...rooms.keys()];
+    }
+
+    /**
+     * Marks the rooms whose state a renderer event affects: the room of a physical
+     * renderer, or all members of a zone for a virtual renderer. Events from
+     * renderers that can't be attributed mark every room.
+     * @param {string|undefined} rendererUdn
+     */
+    _markRendererDirty(rendererUdn) {
+        if (typeof rendererUdn !== 'string') {
+            this._allRoomsDirty = true;
+            return;
+        }
+
+        if (this._rooms.has(rendererUdn)) {
+            this._dirtyRooms.add(rendererUdn);
+            return;
+        }
+
+        let matched = false;
+        for (const [key, room] of this._rooms) {
+            if (room.zoneUdn === rendererUdn) {
+                this._dirtyRooms.add(key);
+                matched = true;
             }
         }
+        if (!matched) this._allRoomsDirty = true;
     }
 
     /**
-     * Builds and publishes the room state array
+     * Publishes the rooms marked dirty since the last scheduled broadcast
      */
-    _broadcastRoomStates() {
-        const rooms = [];
+    _broadcastDirtyRooms() {
+        const dirty = this._allRoomsDirty ? null : this._dirtyRooms;
+        this._dirtyRooms = new Set();
+        this._allRoomsDirty = false;
+        this._broadcastRoomStates(dirty);
+    }
 
-        for (const room of this._rooms.values()) {
-            const nowPlaying = this._getNowPlayingForRoom(room);
-            
-            rooms.push({
-                name: room.name,
-                udn: room.roomUdn,
-                roomUdn: room.roomUdn,
-                rendererUdn: room.rendererUdn,
-                isZone: false,
-                zoneUdn: room.zoneUdn,
-                currentZoneUdn: room.zoneUdn, // Alias for compatibility
-                zoneName: room.zoneName,
-                zoneMembers: room.zoneMembers,
-                sourceSwitchingSupported: room.sourceSwitchingSupported || false,
-                lineInSupported: room.lineInSupported || false,
-                isPlaying: nowPlaying.isPlaying,
-                nowPlaying
-            });
+    /**
+     * Rebuilds the state of the given rooms (all rooms by default) and publishes
+     * the room state array. Other rooms keep their previously built state.
+     * @param {Iterable<string>|null} [rendererUdns] - RENDERER UDNs of the rooms to rebuild
+     */
+    _broadcastRoomStates(rendererUdns = null) {
+        const dirty = rendererUdns ? new Set(rendererUdns) : null;
+
+        // Drop rooms that left the registry
+        for (const key of this._roomStates.keys()) {
+            if (!this._rooms.has(key)) {
+                this._roomStates.delete(key);
+                this._removeSortedRoom(key);
+                this._roomIndex.delete(key);
+            }
         }
 
-        rooms.sort((a, b) => a.name.localeCompare(b.name));
+        for (const [key, room] of this._rooms) {
+            const previous = this._roomStates.get(key);
+            if (previous && dirty && !dirty.has(key)) {
+                this._roomStateStats.reused += 1;
+                continue;
+            }
+
+            const state = this._buildRoomState(room);
+            this._roomStates.set(key, state);
+            this._roomIndex.set(key, state);
+            this._roomStateStats.rebuilt += 1;
+
+            if (!previous) {
+                this._insertSortedRoom(key);
+            } else if (previous.name !== state.name) {
+                this._removeSortedRoom(key);
+                this._insertSortedRoom(key);
+            }
+        }
+
+        const rooms = this._sortedRoomKeys.map(key => this._roomStates.get(key));
+
+        const delta = this._diffRoomStates(this._state.availableRooms, rooms);
         this._state.availableRooms = rooms;
+
+        if (delta) {
+            this._deltaHistory.push(delta);
+            if (this._deltaHistory.length > DELTA_HISTORY_SIZE) {
+                this._deltaHistory.shift();
+            }
+            this.emit('stateDelta', delta);
+
+            if (this._state.isReady && StateSnapshot.affects(delta)) {
+                this._stateSnapshot.save(rooms, this._zoneTopology);
+            }
+        }
     }
 
-    // ========================================================================
-    // ROOM LOOKUP
-    // ========================================================================
+    /**
+     * Publishes the rooms of the last snapshot, marked stale, until the live
+     * registry takes over on systemReady. Commands can't reach them before that,
+     * and their playback state is unknown; clients should show them as unavailable.
+     */
+    _restoreStateSnapshot() {
+        const snapshot = this._stateSnapshot.load();
+        if (!snapshot) return;
+
+        this._state.availableRooms = snapshot.rooms.map(room => ({
+            ...room,
+            isPlaying: false,
+            nowPlaying: this._createEmptyNowPlaying()
+        }));
+        this._state.stale = true;
+        this._publishedStale = true;
+        this._zoneTopology = snapshot.zoneTopology;
+
+        console.log(`${LOG_PREFIX.REGISTRY} Restored ${snapshot.rooms.length} rooms from snapshot ` +
+            `(saved ${new Date(snapshot.savedAt).toISOString()})`);
+    }
 
     /**
-     * Finds a room by UDN or name
-     * @param {string} identifier - Room UDN, zone UDN, or partial name
-     * @returns {RoomState|undefined}
+     * Builds the published state of a room
+     * @param {RoomInfo} room
+     * @returns {RoomState}
      */
-    findRoom(identifier) {
-        if (!identifier) return undefined;
+    _buildRoomState(room) {
+        const nowPlaying = this._getNowPlayingForRoom(room);
+
+        return {
+            name: room.name,
+            udn: room.roomUdn,
+            roomUdn: room.roomUdn,
+            rendererUdn: room.rendererUdn,
+            isZone: false,
+            zoneUdn: room.zoneUdn,
+            currentZoneUdn: room.zoneUdn, // Alias for compatibility
+            zoneName: room.zoneName,
+            zoneMembers: room.zoneMembers,
+            sourceSwitchingSupported: room.sourceSwitchingSupported || false,
+            lineInSupported: room.lineInSupported || false,
+            isPlaying: nowPlaying.isPlaying,
+            nowPlaying
+        };
+    }
+
+    /**
+     * Inserts a room into the name-sorted key list, after rooms with the same name
+     * @param {string} key - RENDERER UDN
+     */
+    _insertSortedRoom(key) {
+        const name = this._roomStates.get(key).name;
+        let low = 0;
+        let high = this._sortedRoomKeys.length;
+        while (low < high) {
+            const mid = (low + high) >>> 1;
+            const midName = this._roomStates.get(this._sortedRoomKeys[mid]).name;
+            if (this._roomNameCollator.compare(midName, name) <= 0) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        this._sortedRoomKeys.splice(low, 0, key);
+    }
 
-        const rooms = this._state.availableRooms;
+    /**
+     * @param {string} key - RENDERER UDN
+     */
+    _removeSortedRoom(key) {
+        const index = this._sortedRoomKeys.indexOf(key);
+        if (index !== -1) this._sortedRoomKeys.splice(index, 1);
+    }
 
-        // Try exact room UDN match
-        let room = rooms.find(r => r.roomUdn === identifier);
-        if (room) return room;
+    /**
+     * Compares two published room arrays and bumps the state version if they differ.
+     * @param {RoomState[]} previousRooms
+     * @param {RoomState[]} rooms
+     * @returns {StateDelta|null} The delta, or null if nothing changed
+     */
+    _diffRoomStates(previousRooms, rooms) {
+        const previousByUdn = new Map(previousRooms.map(room => [room.udn, room]));
+        const changed = {};
+        let hasChanges = false;
+
+        for (const room of rooms) {
+            const previous = previousByUdn.get(room.udn);
+            previousByUdn.delete(room.udn);
+            // Rooms that were not rebuilt are the same object as before
+            if (previous === room) continue;
+
+            const patch = previous ? this._diffRoomState(previous, room) : room;
+            if (patch) {
+                changed[room.udn] = patch;
+                hasChanges = true;
+            }
+        }
 
-        // Try zone UDN match
-        room = rooms.find(r => r.zoneUdn === identifier);
-        if (room) return room;
+        const removed = [...previousByUdn.keys()];
+        const stale = this._state.stale;
+        if (!hasChanges && removed.length === 0 && stale === this._publishedStale) return null;
 
-        // Try partial name match (only if unambiguous)
-        if (identifier.length > 2) {
-            const matches = rooms.filter(r => 
-                r.name.toLowerCase().includes(identifier.toLowerCase())
-            );
-            if (matches.length === 1) return matches[0];
+        const baseVersion = this._stateVersion;
+        this._stateVersion += 1;
+        this._publishedStale = stale;
+
+        return { version: this._stateVersion, baseVersion, stale, rooms: changed, removed };
+    }
+
+    /**
+     * Returns the fields of a room that changed, descending one level into nowPlaying.
+     * @param {RoomState} previous
+     * @param {RoomState} room
+     * @returns {Object|null}
+     */
+    _diffRoomState(previous, room) {
+        const patch = this._diffFields(previous, room, ['nowPlaying']) ?? {};
+
+        const nowPlayingPatch = this._diffFields(previous.nowPlaying ?? {}, room.nowPlaying ?? {});
+        if (nowPlayingPatch) patch.nowPlaying = nowPlayingPatch;
+
+        return Object.keys(patch).length > 0 ? patch : null;
+    }
+
+    /**
+     * Shallow field diff. Fields missing from `current` are reported as null.
+     * @param {Object} previous
+     * @param {Object} current
+     * @param {string[]} [skipKeys]
+     * @returns {Object|null}
+     */
+    _diffFields(previous, current, skipKeys = []) {
+        const patch = {};
+        const isEqual = (a, b) => Array.isArray(a) && Array.isArray(b)
+            ? a.length === b.length && a.every((value, i) => value === b[i])
+            : a === b;
+
+        for (const [key, value] of Object.entries(current)) {
+            if (skipKeys.includes(key)) continue;
+            if (!isEqual(previous[key], value)) patch[key] = value;
         }
+        for (const key of Object.keys(previous)) {
+            if (!skipKeys.includes(key) && !(key in current)) patch[key] = null;
+        }
+
+        return Object.keys(patch).length > 0 ? patch : null;
+    }
+
+    // ========================================================================
+    // ROOM LOOKUP
+    // ========================================================================
 
-        return undefined;
+    /**
+     * Finds a room by UDN or name
+     * @param {string} identifier - Room UDN, zone UDN, renderer UDN, or (partial) name
+     * @returns {RoomState|undefined}
+     */
+    findRoom(identifier) {
+        return this._roomIndex.find(identifier);
     }
 
     /**
@@ -392,17 +901,8 @@ class RaumkernelHelper {
      * @returns {RoomInfo|undefined}
      */
     _findRoomByAnyUdn(udn) {
-        // Try renderer UDN (registry key)
-        if (this._rooms.has(udn)) {
-            return this._rooms.get(udn);
-        }
-
-        // Try room UDN
-        for (const room of this._rooms.values()) {
-            if (room.roomUdn === udn) return room;
-        }
-
-        return undefined;
+        // Try renderer UDN (registry key), then room UDN
+        return this._rooms.get(udn) ?? this._rooms.get(this._roomKeysByRoomUdn.get(udn));
     }
 
     // ========================================================================
@@ -468,17 +968,8 @@ class RaumkernelHelper {
             console.warn(`${LOG_PREFIX.RENDERER} Zone connect failed for ${room.name}: ${err.message}`);
         }
 
-        // Poll for zone creation
-        const maxAttempts = 15;
-        for (let i = 0; i < maxAttempts; i++) {
-            const zoneUdn = zoneManager.getZoneUDNFromRoomUDN(room.roomUdn);
-            if (zoneUdn && deviceManager.mediaRenderersVirtual.has(zoneUdn)) {
-                return deviceManager.mediaRenderersVirtual.get(zoneUdn);
-            }
-            if (i < maxAttempts - 1) {
-                await this._delay(500);
-            }
-        }
+        const zone = await this.waitForZone(room.roomUdn);
+        if (zone) return zone.renderer;
 
         // Search by renderer UDN as fallback
         for (const [, renderer] of deviceManager.mediaRenderersVirtual) {
@@ -526,11 +1017,14 @@ class RaumkernelHelper {
      * @returns {NowPlayingState}
      */
     _createEmptyNowPlaying() {
+        // Same shape as _extractNowPlaying so state deltas never need to drop keys
         return {
             artist: '',
             track: '',
+            album: '',
             uri: '',
             image: '',
+            classString: '',
             isPlaying: false,
             isLoading: false,
             isMuted: false,
@@ -539,8 +1033,11 @@ class RaumkernelHelper {
             canPlayNext: false,
             canPlayPrev: false,
             duration: 0,
+            durationSeconds: 0,
             position: 0,
-            powerState: 'STANDBY'
+            positionSeconds: 0,
+            powerState: 'STANDBY',
+            currentSource: 'Raumfeld'
         };
     }
 
@@ -772,31 +1269,29 @@ class RaumkernelHelper {
     // ========================================================================
 
     /**
-     * Parses DIDL-Lite XML metadata
+     * Parses DIDL-Lite XML metadata.
+     * Renderers report the same metadata with every state change, so results are cached.
      * @param {string} xml 
      * @returns {MediaMetadata}
      */
     _parseMetadata(xml) {
-        const result = { track: '', artist: '', album: '', image: '', uri: '', classString: '' };
-        if (!xml) return result;
-
-        try {
-            const parser = new (new JSDOM('')).window.DOMParser();
-            const doc = parser.parseFromString(xml, 'text/xml');
-
-            const getText = (tag) => doc.getElementsByTagName(tag)[0]?.textContent ?? '';
-
-            result.classString = getText('upnp:class');
-            result.track = getText('dc:title');
-            result.artist = getText('upnp:artist');
-            result.album = getText('upnp:album');
-            result.image = getText('upnp:albumArtURI');
-            result.uri = getText('res');
-        } catch (err) {
-            console.warn(`${LOG_PREFIX.MEDIA} Metadata parse error: ${err.message}`);
+        if (!xml) return { track: '', artist: '', album: '', image: '', uri: '', classString: '' };
+
+        let metadata = this._metadataCache.get(xml);
+        if (!metadata) {
+            const fields = parseDidl(xml)[0]?.fields ?? {};
+            metadata = {
+                track: fields['dc:title'] ?? '',
+                artist: fields['upnp:artist'] ?? '',
+                album: fields['upnp:album'] ?? '',
+                image: fields['upnp:albumArtURI'] ?? '',
+                uri: fields['res'] ?? '',
+                classString: fields['upnp:class'] ?? ''
+            };
+            this._metadataCache.set(xml, metadata);
         }
 
-        return result;
+        return { ...metadata };
     }
 
     // ========================================================================
@@ -830,17 +1325,19 @@ class RaumkernelHelper {
             if (positionInfo) {
                 // Update position for all rooms in this zone
                 const zoneUdn = room.zoneUdn;
-                for (const r of this._rooms.values()) {
+                const seekedRooms = [];
+                for (const [key, r] of this._rooms) {
                     if (r.zoneUdn === zoneUdn || r.roomUdn === room.roomUdn) {
                         // Force position update in next broadcast
                         // Store as seconds for consistency with positionSeconds
                         r._lastSeekPosition = typeof value === 'number' ? value : 0;
                         r._lastSeekTime = Date.now();
+                        seekedRooms.push(key);
                     }
                 }
                 
                 // Broadcast updated state immediately
-                this._broadcastRoomStates();
+                this._broadcastRoomStates(seekedRooms);
             }
         } catch (err) {
             console.warn(`${LOG_PREFIX.COMMAND} Failed to get position after seek: ${err.message}`);
@@ -960,7 +1457,7 @@ class RaumkernelHelper {
                     await this._delay(500);
                     
                     // Broadcast updated state immediately
-                    this._broadcastRoomStates();
+                    this._broadcastRoomStates([room.rendererUdn]);
                 } else {
                      console.warn(`${LOG_PREFIX.COMMAND} Renderer ${room.name} does not support enterManualStandby`);
                 }
@@ -993,7 +1490,7 @@ class RaumkernelHelper {
                     await this._delay(500);
 
                     // Broadcast updated state immediately
-                    this._broadcastRoomStates();
+                    this._broadcastRoomStates([room.rendererUdn]);
                 } else {
                      console.warn(`${LOG_PREFIX.COMMAND} Renderer ${room.name} does not support enterAutomaticStandby`);
                 }
@@ -1006,22 +1503,105 @@ class RaumkernelHelper {
         }
     }
 
+    // ========================================================================
+    // ZONE WAITERS
+    // ========================================================================
+
+    /**
+     * Resolves once the zone topology lists the room as a member of a zone whose
+     * virtual renderer was discovered. With `rendererReported`, that renderer must
+     * also have sent a state event since the wait started, as the host only
+     * accepts joins into a new zone once it is fully set up.
+     *
+     * Waiters are checked when they start and on every zone configuration, virtual
+     * renderer and renderer state event; all of these arrive as events, so there is
+     * no polling. The timeout covers a zone the host never sets up.
+     * @param {string} roomUdn - ROOM UDN
+     * @param {{rendererReported?: boolean, timeoutMs?: number}} [options]
+     * @returns {Promise<{zoneUdn: string, renderer: *}|null>} null on timeout
+     */
+    waitForZone(roomUdn, { rendererReported = false, timeoutMs = ZONE_WAIT_TIMEOUT_MS } = {}) {
+        return new Promise((resolve) => {
+            // Zone UDNs of the virtual renderers that sent state during the wait
+            const reportedRenderers = new Set();
+            const waiter = {
+                roomUdn,
+                check: (reportedUdn) => {
+                    if (reportedUdn) reportedRenderers.add(reportedUdn);
+                    const zone = this._getTopologyZone(roomUdn);
+                    if (!zone.zoneUdn || !zone.renderer) return;
+                    if (rendererReported && !reportedRenderers.has(zone.zoneUdn)) return;
+                    finish(zone);
+                    this._zoneWaitStats.resolved += 1;
+                }
+            };
+            const timeout = setTimeout(() => {
+                this._zoneWaitStats.timedOut += 1;
+                finish(null);
+            }, timeoutMs);
+            const finish = (zone) => {
+                clearTimeout(timeout);
+                this._zoneWaiters.delete(waiter);
+                resolve(zone);
+            };
+
+            this._zoneWaiters.add(waiter);
+            waiter.check();
+        });
+    }
+
+    /**
+     * @param {string} [reportedUdn] - UDN of a renderer that just sent a state event
+     */
+    _checkZoneWaiters(reportedUdn) {
+        for (const waiter of this._zoneWaiters) waiter.check(reportedUdn);
+    }
+
+    /**
+     * @param {string} roomUdn - ROOM UDN
+     * @returns {{zoneUdn: string|null, renderer: *}} The zone the room is a member of
+     *   in the zone topology, and its virtual renderer if already discovered
+     */
+    _getTopologyZone(roomUdn) {
+        for (const [zoneUdn, zone] of this._zoneTopology) {
+            if (zone.members.includes(roomUdn)) {
+                return { zoneUdn, renderer: this._getDeviceManager()?.mediaRenderersVirtual.get(zoneUdn) };
+            }
+        }
+        return { zoneUdn: null, renderer: undefined };
+    }
+
     // ========================================================================
     // GROUPING COMMANDS
     // ========================================================================
 
     async joinGroup(roomIdentifier, zoneIdentifier) {
+        const startedAt = Date.now();
+        try {
+            if (await this._joinGroup(roomIdentifier, zoneIdentifier)) {
+                this._joinLatency.record(Date.now() - startedAt);
+            }
+        } catch (err) {
+            this._joinFailures += 1;
+            throw err;
+        }
+    }
+
+    /**
+     * @returns {Promise<boolean>} Whether the join was sent to the host
+     */
+    async _joinGroup(roomIdentifier, zoneIdentifier) {
         const room = this.findRoom(roomIdentifier);
         if (!room) {
              console.warn(`${LOG_PREFIX.COMMAND} joinGroup: Room not found for identifier ${roomIdentifier}`);
-             return;
+             return false;
         }
 
         const zoneManager = this._getZoneManager();
         const deviceManager = this._getDeviceManager();
         if (!zoneManager || !deviceManager) {
             console.error(`${LOG_PREFIX.COMMAND} joinGroup failed: managers not available`);
-            return;
+            return false;
         }
 
         // Resolve target zone UDN
@@ -1038,32 +1618,19 @@ class RaumkernelHelper {
                 console.log(`${LOG_PREFIX.COMMAND} Target room ${targetRoom.name} has no zone (likely Spotify mode), creating zone first`);
                 
                 try {
+                    // Joining a zone the host hasn't fully set up may silently fail, so
+                    // wait until the zone is published and its renderer reports state.
+                    // The wait starts first so it sees the renderer's first event.
+                    const zoneReady = this.waitForZone(targetRoom.roomUdn, { rendererReported: true });
+
                     // Create a standalone zone for the target room to force UPnP mode
                     await zoneManager.connectRoomToZone(targetRoom.roomUdn, '', false);
-                    
-                    // Wait for the zone to be created
-                    const maxAttempts = 15;
-                    let targetZoneCreated = false;
-                    for (let i = 0; i < maxAttempts; i++) {
-                        const newZoneUdn = zoneManager.getZoneUDNFromRoomUDN(targetRoom.roomUdn);
-                        if (newZoneUdn && deviceManager.mediaRenderersVirtual.has(newZoneUdn)) {
-                            console.log(`${LOG_PREFIX.COMMAND} Target room ${targetRoom.name} now has zone: ${newZoneUdn}`);
-                            targetZoneUdn = newZoneUdn;
-                            targetZoneCreated = true;
-                            
-                            // Wait for the Raumfeld host to stabilize after zone creation
-                            // Without this delay, immediate join attempts may silently fail
-                            // Increased to 4s as 1.5s was sometimes insufficient
-                            console.log(`${LOG_PREFIX.COMMAND} Waiting for zone to stabilize...`);
-                            await this._delay(4000);
-                            break;
-                        }
-                        if (i < maxAttempts - 1) {
-                            await this._delay(500);
-                        }
-                    }
-                    
-                    if (!targetZoneCreated) {
+
+                    const zone = await zoneReady;
+                    if (zone) {
+                        console.log(`${LOG_PREFIX.COMMAND} Target room ${targetRoom.name} now has zone: ${zone.zoneUdn}`);
+                        targetZoneUdn = zone.zoneUdn;
+                    } else {
                         console.warn(`${LOG_PREFIX.COMMAND} Target room ${targetRoom.name} zone creation may not have completed`);
                         // Use room UDN as fallback
                         targetZoneUdn = targetRoom.roomUdn;
@@ -1095,21 +1662,10 @@ class RaumkernelHelper {
                 await zoneManager.connectRoomToZone(room.roomUdn, '', false);
                 
                 // Wait for the zone and virtual renderer to be created
-                const maxAttempts = 15;
-                let transitioned = false;
-                for (let i = 0; i < maxAttempts; i++) {
-                    const newZoneUdn = zoneManager.getZoneUDNFromRoomUDN(room.roomUdn);
-                    if (newZoneUdn && deviceManager.mediaRenderersVirtual.has(newZoneUdn)) {
-                        console.log(`${LOG_PREFIX.COMMAND} Room ${room.name} successfully transitioned to UPnP mode (zone: ${newZoneUdn})`);
-                        transitioned = true;
-                        break;
-                    }
-                    if (i < maxAttempts - 1) {
-                        await this._delay(500);
-                    }
-                }
-                
-                if (!transitioned) {
+                const zone = await this.waitForZone(room.roomUdn);
+                if (zone) {
+                    console.log(`${LOG_PREFIX.COMMAND} Room ${room.name} successfully transitioned to UPnP mode (zone: ${zone.zoneUdn})`);
+                } else {
                     console.warn(`${LOG_PREFIX.COMMAND} Room ${room.name} may not have fully transitioned to UPnP mode, attempting join anyway`);
                 }
             } catch (err) {
@@ -1122,6 +1678,7 @@ class RaumkernelHelper {
         try {
             await zoneManager.connectRoomToZone(room.roomUdn, targetZoneUdn);
             console.log(`${LOG_PREFIX.COMMAND} Successfully joined ${room.name} to zone ${targetZoneUdn}`);
+            return true;
         } catch (err) {
             console.error(`${LOG_PREFIX.COMMAND} joinGroup failed: ${err.message}`);
             throw err;
@@ -1171,7 +1728,8 @@ class RaumkernelHelper {
                     );
                 });
                 this._roomCurrentSourceCache.set(room.rendererUdn, source);
-                this._broadcastRoomStates();
+                this._sourcePoller.tighten(room.rendererUdn);
+                this._broadcastRoomStates([room.rendererUdn]);
             } catch (err) {
                  console.error(`${LOG_PREFIX.COMMAND} Failed to set source for ${room.name}: ${err.message}`);
                  // We don't throw here to avoid crashing the add-on, but we log it.
@@ -1205,7 +1763,7 @@ class RaumkernelHelper {
                     // "LineIn" source from being overridden during that window.
                     this._roomLineInGraceUntil.set(room.rendererUdn, Date.now() + 10000);
                 }
-                this._broadcastRoomStates();
+                this._broadcastRoomStates([room.rendererUdn]);
             } catch (err) {
                 console.error(`${LOG_PREFIX.COMMAND} Failed to switch ${room.name} to Line-in: ${err.message}`);
             }
@@ -1316,22 +1874,227 @@ class RaumkernelHelper {
     // MEDIA BROWSING
     // ========================================================================
 
+    /**
+     * Lists the children of a container. Results come from the browse cache when
+     * possible; the returned array is shared and must not be modified.
+     * @param {string} [objectId]
+     * @returns {Promise<Array>}
+     */
     async browse(objectId = '0') {
         const mediaServer = this._getDeviceManager()?.getRaumfeldMediaServer();
         if (!mediaServer) {
             console.warn(`${LOG_PREFIX.BROWSE} No media server available`);
             return [];
         }
+        this._subscribeContentDirectoryEvents(mediaServer);
 
         try {
-            const response = await mediaServer.browse(objectId);
-            return this._parseBrowseResponse(response);
+            const items = await this._browsePrefetcher.runRequest(objectId, undefined,
+                () => this._fetchBrowse(mediaServer, objectId));
+            this._browsePrefetcher.prefetch(this._getChildContainerIds(items).map(childId => ({
+                objectId: childId,
+                load: () => this._fetchBrowse(mediaServer, childId)
+            })));
+            return items;
         } catch (err) {
             console.error(`${LOG_PREFIX.BROWSE} Error browsing ${objectId}: ${err.message}`);
             return [];
         }
     }
 
+    /**
+     * Lists part of the children of a container, for containers too large to
+     * send at once. Pages come from the browse cache when possible; the returned
+     * items are shared and must not be modified.
+     * @param {string} [objectId]
+     * @param {number} [offset] - Index of the first child (UPnP StartingIndex)
+     * @param {number} [limit] - Maximum number of children (UPnP RequestedCount),
+     *   capped at BROWSE_MAX_PAGE_SIZE
+     * @returns {Promise<{objectId: string, offset: number, items: Array, totalMatches: number,
+     *   hasMore: boolean}>} `totalMatches` is a lower bound if the media server can't
+     *   count the children; `hasMore` tells whether children may follow the page
+     */
+    async browsePage(objectId = '0', offset = 0, limit = BROWSE_MAX_PAGE_SIZE) {
+        offset = Math.max(0, Math.floor(offset) || 0);
+        limit = Math.min(BROWSE_MAX_PAGE_SIZE, Math.max(1, Math.floor(limit) || BROWSE_MAX_PAGE_SIZE));
+        const page = { objectId, offset, items: [], totalMatches: 0, hasMore: false };
+
+        const mediaServer = this._getDeviceManager()?.getRaumfeldMediaServer();
+        if (!mediaServer) {
+            console.warn(`${LOG_PREFIX.BROWSE} No media server available`);
+            return page;
+        }
+        this._subscribeContentDirectoryEvents(mediaServer);
+
+        try {
+            const { items, totalMatches, hasMore } = await this._browsePrefetcher.runRequest(objectId,
+                `${offset}+${limit}`, () => this._fetchBrowsePage(mediaServer, objectId, offset, limit));
+            // Only the first page holds the children a user is likely to open next
+            if (offset === 0) {
+                this._browsePrefetcher.prefetch(this._getChildContainerIds(items).map(childId => ({
+                    objectId: childId,
+                    page: `0+${limit}`,
+                    load: () => this._fetchBrowsePage(mediaServer, childId, 0, limit)
+                })));
+            }
+            return { ...page, items, totalMatches, hasMore };
+        } catch (err) {
+            console.error(`${LOG_PREFIX.BROWSE} Error browsing ${objectId} from ${offset}: ${err.message}`);
+            return page;
+        }
+    }
+
+    /**
+     * @param {Object} mediaServer
+     * @param {string} objectId
+     * @returns {Promise<Array>} All children of a container, through the browse cache
+     */
+    _fetchBrowse(mediaServer, objectId) {
+        return this._browseCache.fetch(objectId,
+            async () => this._parseBrowseResponse(await mediaServer.browse(objectId)));
+    }
+
+    /**
+     * @param {Object} mediaServer
+     * @param {string} objectId
+     * @param {number} offset
+     * @param {number} limit
+     * @returns {Promise<{items: Array, totalMatches: number, hasMore: boolean}>} One page
+     *   of a container, through the browse cache
+     */
+    _fetchBrowsePage(mediaServer, objectId, offset, limit) {
+        return this._browseCache.fetch(objectId,
+            () => this._requestBrowsePage(mediaServer, objectId, offset, limit), `${offset}+${limit}`);
+    }
+
+    /**
+     * @param {Array} items - Parsed browse result
+     * @returns {string[]} Object IDs of the containers among the items, in order
+     */
+    _getChildContainerIds(items) {
+        return items.filter(item => item.isContainer && item.id).map(item => item.id);
+    }
+
+    /**
+     * Calls the ContentDirectory Browse action for one page. Media servers whose
+     * UPnP client is not accessible are browsed in full and sliced.
+     * @param {Object} mediaServer
+     * @param {string} objectId
+     * @param {number} offset
+     * @param {number} limit
+     * @returns {Promise<{items: Array, totalMatches: number, hasMore: boolean}>}
+     */
+    async _requestBrowsePage(mediaServer, objectId, offset, limit) {
+        const upnpClient = mediaServer.upnpClient;
+        if (typeof upnpClient?.callAction !== 'function') {
+            const items = await this._fetchBrowse(mediaServer, objectId);
+            return {
+                items: items.slice(offset, offset + limit),
+                totalMatches: items.length,
+                hasMore: offset + limit < items.length
+            };
+        }
+
+        const res = await new Promise((resolve, reject) => {
+            upnpClient.callAction(
+                CONTENT_DIRECTORY_SERVICE,
+                'Browse',
+                {
+                    ObjectID: objectId,
+                    BrowseFlag: 'BrowseDirectChildren',
+                    Filter: '*',
+                    StartingIndex: offset,
+                    RequestedCount: limit,
+                    SortCriteria: ''
+                },
+                (err, res) => err ? reject(err) : resolve(res)
+            );
+        });
+
+        const items = res?.Result ? this._parseBrowseXml(res.Result) : [];
+        const reported = parseInt(res?.TotalMatches, 10) || 0;
+        const totalMatches = Math.max(reported, offset + items.length);
+        // Servers report 0 if they can't determine the total; a full page may be followed by more
+        const hasMore = reported === 0 ? items.length === limit : offset + items.length < totalMatches;
+        return { items, totalMatches, hasMore };
+    }
+
+    /**
+     * @param {string} objectId
+     * @returns {number} How long the browse result of a container is cached, in ms
+     */
+    _getBrowseTtl(objectId) {
+        const rule = BROWSE_CACHE_TTLS.find(([prefix]) =>
+            objectId === prefix || objectId.startsWith(`${prefix}/`));
+        return rule ? rule[1] : BROWSE_CACHE_DEFAULT_TTL_MS;
+    }
+
+    /**
+     * Subscribes to the ContentDirectory events of the media server, once per
+     * server. Results cached before a server change are dropped.
+     * @param {Object} mediaServer
+     */
+    _subscribeContentDirectoryEvents(mediaServer) {
+        const upnpClient = mediaServer?.upnpClient;
+        if (typeof upnpClient?.subscribe !== 'function') return;
+        if (this._contentDirectorySubscription?.upnpClient === upnpClient) return;
+
+        if (this._contentDirectorySubscription) {
+            this._unsubscribeContentDirectoryEvents();
+            this._invalidateBrowseCache();
+        }
+
+        const listener = (event) => this._handleContentDirectoryEvent(event);
+        try {
+            upnpClient.subscribe(CONTENT_DIRECTORY_SERVICE, listener);
+            this._contentDirectorySubscription = { upnpClient, listener };
+        } catch (err) {
+            console.warn(`${LOG_PREFIX.BROWSE} Could not subscribe to ContentDirectory events: ${err.message}`);
+        }
+    }
+
+    _unsubscribeContentDirectoryEvents() {
+        const subscription = this._contentDirectorySubscription;
+        if (!subscription) return;
+        this._contentDirectorySubscription = null;
+        try {
+            subscription.upnpClient.unsubscribe?.(CONTENT_DIRECTORY_SERVICE, subscription.listener);
+        } catch {
+            // The media server is usually gone already
+        }
+    }
+
+    /**
+     * Invalidates the containers listed in a ContentDirectory event. Events that
+     * only report a new SystemUpdateID invalidate everything; the first event after
+     * subscribing just reports the current value.
+     * @param {{ContainerUpdateIDs?: string, SystemUpdateID?: string}} event
+     */
+    _handleContentDirectoryEvent(event) {
+        this._contentDirectoryEvents += 1;
+        const subscription = this._contentDirectorySubscription;
+        const containerIds = parseContainerUpdateIds(event?.ContainerUpdateIDs);
+        const systemUpdateId = event?.SystemUpdateID;
+
+        if (containerIds.length > 0) {
+            this._invalidateBrowseCache(containerIds);
+        } else if (systemUpdateId !== undefined && subscription?.systemUpdateId !== undefined &&
+            systemUpdateId !== subscription.systemUpdateId) {
+            this._invalidateBrowseCache();
+        }
+        if (subscription && systemUpdateId !== undefined) subscription.systemUpdateId = systemUpdateId;
+    }
+
+    /**
+     * Drops cached browse results and tells clients to drop theirs.
+     * @param {string[]} [objectIds] - Updated containers; all if omitted
+     */
+    _invalidateBrowseCache(objectIds) {
+        this._browseCache.invalidate(objectIds);
+        if (objectIds === undefined) this._browsePrefetcher.clear();
+        this.emit('browseInvalidated', { objectIds: objectIds ?? null });
+    }
+
     /**
      * @param {string|Array} response 
      * @returns {Array}
@@ -1365,46 +2128,24 @@ class RaumkernelHelper {
      * @returns {Array}
      */
     _parseBrowseXml(xml) {
-        const items = [];
-
-        try {
-            const parser = new (new JSDOM('')).window.DOMParser();
-            const doc = parser.parseFromString(xml, 'text/xml');
-
-            const getText = (node, tag) => node.getElementsByTagName(tag)[0]?.textContent ?? null;
-
-            // Parse containers
-            for (const node of doc.getElementsByTagName('container')) {
-                items.push({
-                    id: node.getAttribute('id'),
-                    title: getText(node, 'dc:title') || 'Unknown',
-                    artist: getText(node, 'upnp:artist'),
-                    album: getText(node, 'upnp:album'),
-                    image: this._sanitizeImageUrl(getText(node, 'upnp:albumArtURI')),
-                    class: getText(node, 'upnp:class'),
-                    playable: true,
-                    isContainer: true
-                });
-            }
-
-            // Parse items
-            for (const node of doc.getElementsByTagName('item')) {
-                items.push({
-                    id: node.getAttribute('id'),
-                    title: getText(node, 'dc:title') || 'Unknown',
-                    artist: getText(node, 'upnp:artist'),
-                    album: getText(node, 'upnp:album'),
-                    image: this._sanitizeImageUrl(getText(node, 'upnp:albumArtURI')),
-                    class: getText(node, 'upnp:class'),
-                    playable: true,
-                    isContainer: false
-                });
-            }
-        } catch (err) {
-            console.error(`${LOG_PREFIX.BROWSE} XML parse error: ${err.message}`);
-        }
+        const objects = parseDidl(xml);
+
+        // Containers first, then items
+        const toItem = (object) => ({
+            id: object.id,
+            title: object.fields['dc:title'] || 'Unknown',
+            artist: object.fields['upnp:artist'] ?? null,
+            album: object.fields['upnp:album'] ?? null,
+            image: this._sanitizeImageUrl(object.fields['upnp:albumArtURI'] ?? null),
+            class: object.fields['upnp:class'] ?? null,
+            playable: true,
+            isContainer: object.type === 'container'
+        });
 
-        return items;
+        return [
+            ...objects.filter(object => object.type === 'container').map(toItem),
+            ...objects.filter(object => object.type === 'item').map(toItem)
+        ];
     }
 
     // ========================================================================
@@ -1412,46 +2153,248 @@ class RaumkernelHelper {
     // ========================================================================
 
     /**
-     * Refreshes the cached "Source Select" value for all rooms that support it,
-     * and broadcasts an update if any value changed.
+     * @returns {string[]} RENDERER UDNs of rooms that support "Source Select"
      */
-    async _pollCurrentSources() {
-        const deviceManager = this._getDeviceManager();
-        if (!deviceManager) return;
-
-        let changed = false;
+    _getSourceSwitchingRenderers() {
+        const rendererUdns = [];
         for (const room of this._rooms.values()) {
-            if (!room.sourceSwitchingSupported) continue;
+            if (room.sourceSwitchingSupported) rendererUdns.push(room.rendererUdn);
+        }
+        return rendererUdns;
+    }
 
-            const renderer = deviceManager.mediaRenderers.get(room.rendererUdn);
-            if (!renderer?.upnpClient) continue;
+    /**
+     * Reads the current "Source Select" value of a renderer.
+     * @param {string} rendererUdn
+     * @returns {Promise<string|undefined>}
+     */
+    async _readCurrentSource(rendererUdn) {
+        const renderer = this._getDeviceManager()?.mediaRenderers.get(rendererUdn);
+        if (!renderer?.upnpClient) throw new Error(`Renderer ${rendererUdn} is not available`);
+
+        const res = await new Promise((resolve, reject) => {
+            renderer.upnpClient.callAction(
+                "urn:upnp-org:serviceId:RenderingControl",
+                "GetDeviceSetting",
+                { InstanceID: 0, Name: "Source Select" },
+                (err, res) => err ? reject(err) : resolve(res)
+            );
+        });
+        return res?.Value;
+    }
+
+    /**
+     * Stores a polled or reported "Source Select" value and broadcasts the room if it changed.
+     * @returns {boolean} Whether the value changed
+     */
+    _applySource(rendererUdn, source) {
+        if (!source || this._roomCurrentSourceCache.get(rendererUdn) === source) return false;
+
+        this._roomCurrentSourceCache.set(rendererUdn, source);
+        this._broadcastRoomStates([rendererUdn]);
+        return true;
+    }
+
+    /**
+     * Polls a soundbar's source soon after its PowerState changed: a TV switching
+     * on or off via HDMI-CEC usually switches the source as well.
+     * @param {Object} renderer - Renderer from the rendererStateChanged event
+     */
+    _checkPowerStateChange(renderer) {
+        const rendererUdn = renderer?.udn?.();
+        if (!rendererUdn || !this._roomCapabilities.get(rendererUdn)) return;
+
+        const powerState = renderer.rendererState?.PowerState;
+        if (!powerState) return;
+
+        const previous = this._lastPowerStates.get(rendererUdn);
+        this._lastPowerStates.set(rendererUdn, powerState);
+        if (previous !== undefined && previous !== powerState) {
+            this._sourcePoller.tighten(rendererUdn, { immediate: true });
+        }
+    }
+
+    /**
+     * Subscribes to the RenderingControl events of a source-switching renderer.
+     * The UPnP client shares one GENA subscription per service, so this adds a
+     * listener next to the one node-raumkernel registered.
+     * @param {string} rendererUdn
+     * @param {Object} renderer - PHYSICAL renderer
+     */
+    _subscribeSourceEvents(rendererUdn, renderer) {
+        const upnpClient = renderer?.upnpClient;
+        if (typeof upnpClient?.subscribe !== 'function') return;
 
+        const existing = this._sourceEventSubscriptions.get(rendererUdn);
+        if (existing?.upnpClient === upnpClient) return;
+        if (existing) this._unsubscribeSourceEvents(rendererUdn);
+
+        const listener = (event) => this._handleRenderingControlEvent(rendererUdn, event);
+        try {
+            upnpClient.subscribe(RENDERING_CONTROL_SERVICE, listener);
+            this._sourceEventSubscriptions.set(rendererUdn, { upnpClient, listener });
+        } catch (err) {
+            console.warn(`${LOG_PREFIX.REGISTRY} Could not subscribe to RenderingControl events of ` +
+                `${rendererUdn}: ${err.message}`);
+        }
+    }
+
+    /**
+     * Removes RenderingControl listeners of one renderer, or of all when no UDN is given.
+     * @param {string} [rendererUdn]
+     */
+    _unsubscribeSourceEvents(rendererUdn) {
+        const rendererUdns = rendererUdn ? [rendererUdn] : [...this._sourceEventSubscriptions.keys()];
+        for (const udn of rendererUdns) {
+            const subscription = this._sourceEventSubscriptions.get(udn);
+            if (!subscription) continue;
+            this._sourceEventSubscriptions.delete(udn);
             try {
-                const res = await new Promise((resolve, reject) => {
-                    renderer.upnpClient.callAction(
-                        "urn:upnp-org:serviceId:RenderingControl",
-                        "GetDeviceSetting",
-                        { InstanceID: 0, Name: "Source Select" },
-                        (err, res) => err ? reject(err) : resolve(res)
-                    );
-                });
-                if (res?.Value && this._roomCurrentSourceCache.get(room.rendererUdn) !== res.Value) {
-                    this._roomCurrentSourceCache.set(room.rendererUdn, res.Value);
-                    changed = true;
-                }
+                subscription.upnpClient.unsubscribe?.(RENDERING_CONTROL_SERVICE, subscription.listener);
             } catch {
-                // Ignore transient errors; will retry on next poll.
+                // The device is usually gone already
+            }
+        }
+    }
+
+    /**
+     * Applies a "Source Select" value reported in a RenderingControl LastChange
+     * event. If the event doesn't carry the value but reports more than volume
+     * changes, the source is read back right away.
+     * @param {string} rendererUdn
+     * @param {{LastChange?: string}} event
+     */
+    _handleRenderingControlEvent(rendererUdn, event) {
+        this._sourceEventStats.events += 1;
+        const variables = parseLastChange(event?.LastChange);
+
+        const source = getSourceSelect(variables);
+        if (source !== undefined) {
+            if (this._applySource(rendererUdn, source)) this._sourceEventStats.sourceChanges += 1;
+            return;
+        }
+
+        if (variables.some(({ name }) => !VOLUME_VARIABLES.has(name))) {
+            this._sourceEventStats.triggeredPolls += 1;
+            this._sourcePoller.tighten(rendererUdn, { immediate: true });
+        }
+    }
+
+    /**
+     * Determines the Source Select and Line-in capabilities of a renderer. Devices
+     * found in the persisted cache are applied immediately (and re-probed in the
+     * background once the entry is old); unknown devices are probed through the
+     * probe limiter.
+     * @param {string} rendererUdn
+     * @param {*} renderer - PHYSICAL renderer
+     * @returns {Promise<void>}
+     */
+    _detectCapabilities(rendererUdn, renderer) {
+        if (!renderer?.upnpClient) return Promise.resolve();
+        if (this._roomCapabilities.has(rendererUdn)) {
+            if (this._roomCapabilities.get(rendererUdn)) this._subscribeSourceEvents(rendererUdn, renderer);
+            return Promise.resolve();
+        }
+
+        let detection = this._capabilityDetections.get(rendererUdn);
+        if (!detection) {
+            detection = this._runCapabilityDetection(rendererUdn, renderer)
+                .finally(() => this._capabilityDetections.delete(rendererUdn));
+            this._capabilityDetections.set(rendererUdn, detection);
+        }
+        return detection;
+    }
+
+    async _runCapabilityDetection(rendererUdn, renderer) {
+        const identity = this._getDeviceIdentity(renderer);
+        const cached = this._capabilityCache.get(rendererUdn, identity);
+
+        if (cached) {
+            console.log(`${LOG_PREFIX.REGISTRY} Using cached capabilities for ${rendererUdn} ` +
+                `(Source Select: ${cached.sourceSelect}, Line-in: ${cached.lineIn})`);
+            this._applyCapabilities(rendererUdn, renderer, cached);
+            if (Date.now() - cached.probedAt > CAPABILITY_REVALIDATE_AFTER_MS) {
+                this._scheduleCapabilityRevalidation(rendererUdn, renderer, identity);
             }
+            return;
+        }
+
+        let capabilities;
+        try {
+            capabilities = await this._capabilityProbeLimiter.run(() => this._probeCapabilities(rendererUdn, renderer));
+        } catch (err) {
+            // Nothing is cached or applied, so a busy or unreachable device isn't
+            // recorded as lacking the capabilities
+            this._capabilityStats.probeFailures += 1;
+            console.warn(`${LOG_PREFIX.REGISTRY} Probing capabilities of ${rendererUdn} failed, ` +
+                `retrying in ${CAPABILITY_RETRY_DELAY_MS / 1000}s: ${err.message}`);
+            this._scheduleCapabilityRetry(rendererUdn);
+            return;
         }
+        this._capabilityCache.set(rendererUdn, identity, capabilities);
+        this._applyCapabilities(rendererUdn, renderer, capabilities);
+    }
 
-        if (changed) this._broadcastRoomStates();
+    /**
+     * Probes a renderer again after its probe got no answer, if its room is still known.
+     * @param {string} rendererUdn
+     */
+    _scheduleCapabilityRetry(rendererUdn) {
+        setTimeout(() => {
+            const renderer = this._getDeviceManager()?.mediaRenderers.get(rendererUdn);
+            if (renderer && this._rooms.has(rendererUdn)) this._detectCapabilities(rendererUdn, renderer);
+        }, CAPABILITY_RETRY_DELAY_MS);
+    }
+
+    /**
+     * Re-probes a renderer whose capabilities were taken from an old cache entry.
+     */
+    _scheduleCapabilityRevalidation(rendererUdn, renderer, identity) {
+        setTimeout(async () => {
+            try {
+                const capabilities = await this._capabilityProbeLimiter.run(
+                    () => this._probeCapabilities(rendererUdn, renderer));
+                this._capabilityStats.revalidations += 1;
+                this._capabilityCache.set(rendererUdn, identity, capabilities);
+
+                if (capabilities.sourceSelect !== this._roomCapabilities.get(rendererUdn) ||
+                    capabilities.lineIn !== this._roomLineInCapabilities.get(rendererUdn)) {
+                    this._capabilityStats.revalidationChanges += 1;
+                    console.log(`${LOG_PREFIX.REGISTRY} Capabilities of ${rendererUdn} changed ` +
+                        `(Source Select: ${capabilities.sourceSelect}, Line-in: ${capabilities.lineIn})`);
+                    this._applyCapabilities(rendererUdn, renderer, capabilities);
+                }
+            } catch (err) {
+                console.warn(`${LOG_PREFIX.REGISTRY} Revalidating capabilities of ${rendererUdn} failed: ${err.message}`);
+            }
+        }, CAPABILITY_REVALIDATE_DELAY_MS);
     }
 
-    async _detectCapabilities(rendererUdn, renderer) {
-        if (!renderer?.upnpClient) return;
-        if (this._roomCapabilities.has(rendererUdn)) return;
+    /**
+     * Model and version from the device description; a change (e.g. firmware
+     * update) invalidates the cached capabilities.
+     * @param {*} renderer
+     * @returns {import('./CapabilityCache.js').DeviceIdentity}
+     */
+    _getDeviceIdentity(renderer) {
+        const description = renderer.deviceDescription ?? renderer.upnpClient?.deviceDescription ?? {};
+        return {
+            model: description.modelName ?? null,
+            version: description.softwareVersion ?? description.modelNumber ?? null
+        };
+    }
 
+    /**
+     * @param {string} rendererUdn
+     * @param {*} renderer
+     * @returns {Promise<import('./CapabilityCache.js').Capabilities>} Rejects if the
+     *   device didn't answer, e.g. on a timeout or dropped connection
+     */
+    async _probeCapabilities(rendererUdn, renderer) {
+        this._capabilityStats.probes += 1;
         console.log(`${LOG_PREFIX.REGISTRY} detectCapabilities for ${rendererUdn}...`);
+
+        let sourceSelect;
         try {
             // Probe for Source Select capability
             const res = await new Promise((resolve, reject) => {
@@ -1463,32 +2406,49 @@ class RaumkernelHelper {
                 );
             });
             // If it doesn't throw, it's supported
-            this._roomCapabilities.set(rendererUdn, true);
+            sourceSelect = true;
             if (res?.Value) this._roomCurrentSourceCache.set(rendererUdn, res.Value);
             console.log(`${LOG_PREFIX.REGISTRY} ${rendererUdn} supports Source Select`);
-        } catch {
-            // 404/500 means not supported
-            this._roomCapabilities.set(rendererUdn, false);
+        } catch (err) {
+            if (!this._isUpnpRejection(err)) throw err;
+            // A UPnP fault or 404/500 means not supported
+            sourceSelect = false;
             console.log(`${LOG_PREFIX.REGISTRY} ${rendererUdn} does NOT support Source Select`);
         }
 
         // Probe for a physical Line-in input. Devices that support "Source Select"
         // already cover Line-in via that mechanism, so only check standalone
         // Line-in for devices without it.
-        if (!this._roomCapabilities.get(rendererUdn)) {
-            this._roomLineInCapabilities.set(rendererUdn, await this._probeLineIn(renderer));
+        let lineIn = false;
+        if (!sourceSelect) {
+            lineIn = await this._probeLineIn(renderer);
             console.log(`${LOG_PREFIX.REGISTRY} ${rendererUdn} ` +
-                `${this._roomLineInCapabilities.get(rendererUdn) ? "supports" : "does NOT support"} Line-in`);
+                `${lineIn ? "supports" : "does NOT support"} Line-in`);
+        }
+
+        return { sourceSelect, lineIn };
+    }
+
+    /**
+     * Stores capabilities and broadcasts the room to reflect them.
+     * @param {string} rendererUdn
+     * @param {*} renderer
+     * @param {import('./CapabilityCache.js').Capabilities} capabilities
+     */
+    _applyCapabilities(rendererUdn, renderer, { sourceSelect, lineIn }) {
+        this._roomCapabilities.set(rendererUdn, sourceSelect);
+        this._roomLineInCapabilities.set(rendererUdn, lineIn);
+        if (sourceSelect) {
+            this._subscribeSourceEvents(rendererUdn, renderer);
         } else {
-            this._roomLineInCapabilities.set(rendererUdn, false);
+            this._unsubscribeSourceEvents(rendererUdn);
         }
 
-        // Trigger a state update to reflect the new capability
         const room = this._rooms.get(rendererUdn);
         if (room) {
-            room.sourceSwitchingSupported = this._roomCapabilities.get(rendererUdn);
-            room.lineInSupported = this._roomLineInCapabilities.get(rendererUdn);
-            this._broadcastRoomStates();
+            room.sourceSwitchingSupported = sourceSelect;
+            room.lineInSupported = lineIn;
+            this._broadcastRoomStates([rendererUdn]);
         }
     }
 
@@ -1497,7 +2457,7 @@ class RaumkernelHelper {
      * The device's UPnP server can drop the connection ("socket hang up") if
      * hit again too soon after a previous call, so retry once after a delay.
      * @param {*} renderer
-     * @returns {Promise<boolean>}
+     * @returns {Promise<boolean>} Rejects if the retry is dropped as well
      */
     async _probeLineIn(renderer) {
         for (let attempt = 0; attempt < 2; attempt++) {
@@ -1513,6 +2473,7 @@ class RaumkernelHelper {
                 return true;
             } catch (err) {
                 if (/socket hang up/i.test(err?.message || "")) {
+                    if (attempt > 0) throw err;
                     await new Promise(r => setTimeout(r, 500));
                     continue;
                 }
@@ -1524,6 +2485,17 @@ class RaumkernelHelper {
         return false;
     }
 
+    /**
+     * Whether a failed UPnP call was rejected by the device (SOAP fault, HTTP error
+     * status, missing service or action), as opposed to a timeout or a dropped or
+     * refused connection, which says nothing about what the device supports.
+     * @param {*} err
+     * @returns {boolean}
+     */
+    _isUpnpRejection(err) {
+        return UPNP_REJECTION_CODES.has(err?.code) || Number.isInteger(err?.statusCode);
+    }
+
     // ========================================================================
     // UTILITY METHODS
     // ========================================================================
@@ -0,0 +1,138 @@
+/**
+ * RoomIndex - Lookup of published rooms by any of their identifiers
+ *
+ * Commands name rooms by room UDN, zone UDN, renderer UDN or (part of) the room
+ * name. The index keeps a map per identifier so lookups don't scan the room list.
+ * Rooms are stored under a stable key (the RENDERER UDN); `set` replaces all
+ * entries of a key, so the index stays consistent when a room is renamed or
+ * moves to another zone.
+ */
+
+/**
+ * @param {string} name
+ * @returns {string}
+ */
+export const normalizeRoomName = (name) => name.trim().toLowerCase();
+
+export default class RoomIndex {
+    /**
+     * @param {Intl.Collator} [collator] - Orders rooms sharing a zone UDN; the
+     *   first by name is returned for zone lookups
+     */
+    constructor(collator = new Intl.Collator()) {
+        this._collator = collator;
+
+        /** @type {Map<string, {room: Object, name: string}>} */
+        this._entries = new Map();
+        /** @type {Map<string, string>} */
+        this._byRoomUdn = new Map();
+        /** @type {Map<string, string>} */
+        this._byRendererUdn = new Map();
+        /** @type {Map<string, Set<string>>} */
+        this._byZoneUdn = new Map();
+        /** @type {Map<string, Set<string>>} Normalised room name to keys */
+        this._byName = new Map();
+    }
+
+    /**
+     * Adds or replaces a room.
+     * @param {string} key
+     * @param {{roomUdn: string, rendererUdn: string, zoneUdn: string|null, name: string}} room
+     */
+    set(key, room) {
+        this.delete(key);
+
+        const name = normalizeRoomName(room.name ?? '');
+        this._entries.set(key, { room, name });
+        if (room.roomUdn) this._byRoomUdn.set(room.roomUdn, key);
+        if (room.rendererUdn) this._byRendererUdn.set(room.rendererUdn, key);
+        if (room.zoneUdn) this._addToSet(this._byZoneUdn, room.zoneUdn, key);
+        this._addToSet(this._byName, name, key);
+    }
+
+    /**
+     * @param {string} key
+     */
+    delete(key) {
+        const entry = this._entries.get(key);
+        if (!entry) return;
+
+        const { room, name } = entry;
+        this._entries.delete(key);
+        if (this._byRoomUdn.get(room.roomUdn) === key) this._byRoomUdn.delete(room.roomUdn);
+        if (this._byRendererUdn.get(room.rendererUdn) === key) this._byRendererUdn.delete(room.rendererUdn);
+        if (room.zoneUdn) this._removeFromSet(this._byZoneUdn, room.zoneUdn, key);
+        this._removeFromSet(this._byName, name, key);
+    }
+
+    clear() {
+        this._entries.clear();
+        this._byRoomUdn.clear();
+        this._byRendererUdn.clear();
+        this._byZoneUdn.clear();
+        this._byName.clear();
+    }
+
+    get size() {
+        return this._entries.size;
+    }
+
+    /**
+     * Finds a room by room UDN, zone UDN, renderer UDN, unique exact name or an
+     * unambiguous part of its name (at least 3 characters), in that order.
+     * @param {string} identifier
+     * @returns {Object|undefined}
+     */
+    find(identifier) {
+        if (!identifier) return undefined;
+
+        const key = this._byRoomUdn.get(identifier)
+            ?? this._firstInZone(identifier)
+            ?? this._byRendererUdn.get(identifier);
+        if (key !== undefined) return this._entries.get(key).room;
+
+        const name = normalizeRoomName(identifier);
+        const exact = this._byName.get(name);
+        if (exact?.size === 1) return this._entries.get(exact.values().next().value).room;
+
+        if (identifier.length <= 2) return undefined;
+
+        let match;
+        for (const [roomName, keys] of this._byName) {
+            if (!roomName.includes(name)) continue;
+            if (match !== undefined || keys.size > 1) return undefined;
+            match = keys.values().next().value;
+        }
+        return match !== undefined ? this._entries.get(match).room : undefined;
+    }
+
+    _firstInZone(zoneUdn) {
+        const keys = this._byZoneUdn.get(zoneUdn);
+        if (!keys) return undefined;
+
+        let first;
+        for (const key of keys) {
+            if (first === undefined ||
+                this._collator.compare(this._entries.get(key).room.name, this._entries.get(first).room.name) < 0) {
+                first = key;
+            }
+        }
+        return first;
+    }
+
+    _addToSet(map, value, key) {
+        let keys = map.get(value);
+        if (!keys) {
+            keys = new Set();
+            map.set(value, keys);
+        }
+        keys.add(key);
+    }
+
+    _removeFromSet(map, value, key) {
+        const keys = map.get(value);
+        if (!keys) return;
+        keys.delete(key);
+        if (keys.size === 0) map.delete(value);
+    }
+}
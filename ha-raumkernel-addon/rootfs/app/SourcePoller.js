@@ -0,0 +1,158 @@
+/**
+ * SourcePoller - Adaptive, bounded-concurrency polling of a per-device value
+ *
+ * Soundbars and sounddecks don't report "Source Select" changes made outside of
+ * HA (e.g. the TV switching to ARC), so the value has to be polled. Each device
+ * gets its own interval: it doubles up to `maxIntervalMs` while the value stays the
+ * same and drops back to `minIntervalMs` after a change or a `tighten` call (e.g.
+ * the TV powering the device on). Due devices are polled through a
+ * ConcurrencyLimiter, and a device that doesn't answer within `timeoutMs` is
+ * treated as a failed poll instead of holding up the others (its request is
+ * abandoned, UPnP calls cannot be cancelled).
+ */
+
+import ConcurrencyLimiter from './ConcurrencyLimiter.js';
+
+const withTimeout = (promise, ms) => new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+        const err = new Error(`Timed out after ${ms}ms`);
+        err.code = 'ETIMEDOUT';
+        reject(err);
+    }, ms);
+    promise.then(resolve, reject).finally(() => clearTimeout(timer));
+});
+
+export default class SourcePoller {
+    /**
+     * @param {Object} handlers
+     * @param {function(): Iterable<string>} handlers.getKeys - Devices to poll; others are dropped
+     * @param {function(string): Promise<*>} handlers.poll - Reads the current value of a device
+     * @param {function(string, *): boolean} handlers.apply - Stores a polled value, returns
+     *   whether it differed from the known value
+     * @param {{concurrency?: number, timeoutMs?: number, minIntervalMs?: number,
+     *   maxIntervalMs?: number, tickMs?: number}} [options]
+     */
+    constructor({ getKeys, poll, apply }, {
+        concurrency = 3,
+        timeoutMs = 5000,
+        minIntervalMs = 10000,
+        maxIntervalMs = 120000,
+        tickMs = 2500
+    } = {}) {
+        this._getKeys = getKeys;
+        this._poll = poll;
+        this._apply = apply;
+
+        this.timeoutMs = timeoutMs;
+        this.minIntervalMs = minIntervalMs;
+        this.maxIntervalMs = Math.max(minIntervalMs, maxIntervalMs);
+        this.tickMs = tickMs;
+
+        this._limiter = new ConcurrencyLimiter(concurrency);
+        this._timer = null;
+
+        /** @type {Map<string, {intervalMs: number, dueAt: number, inFlight: boolean, retighten: boolean}>} */
+        this._devices = new Map();
+
+        this._stats = {
+            polls: 0,
+            changes: 0,
+            failures: 0,
+            timeouts: 0,
+            totalDurationMs: 0,
+            maxDurationMs: 0
+        };
+    }
+
+    start() {
+        if (this._timer) return;
+        this._timer = setInterval(() => this._tick(), this.tickMs);
+    }
+
+    stop() {
+        clearInterval(this._timer);
+        this._timer = null;
+    }
+
+    /**
+     * Resets a device to the shortest interval.
+     * @param {string} key
+     * @param {{immediate?: boolean}} [options] - Poll on the next tick instead of after minIntervalMs
+     */
+    tighten(key, { immediate = false } = {}) {
+        const device = this._devices.get(key);
+        if (!device) return;
+        if (device.inFlight) {
+            // The running poll may have read the value before the event; poll again
+            device.retighten = true;
+            return;
+        }
+
+        device.intervalMs = this.minIntervalMs;
+        const dueAt = immediate ? Date.now() : Date.now() + this.minIntervalMs;
+        device.dueAt = Math.min(device.dueAt, dueAt);
+    }
+
+    getStats() {
+        const { polls, changes, failures, totalDurationMs } = this._stats;
+        const completed = polls - failures;
+        const intervals = [...this._devices.values()].map(device => device.intervalMs);
+        return {
+            ...this._stats,
+            devices: this._devices.size,
+            inFlight: this._limiter.active + this._limiter.pending,
+            avgDurationMs: polls > 0 ? Math.round(totalDurationMs / polls) : 0,
+            changeHitRate: completed > 0 ? Math.round(changes / completed * 1000) / 1000 : 0,
+            minCurrentIntervalMs: intervals.length > 0 ? Math.min(...intervals) : null,
+            maxCurrentIntervalMs: intervals.length > 0 ? Math.max(...intervals) : null
+        };
+    }
+
+    _tick() {
+        const now = Date.now();
+        const keys = new Set(this._getKeys());
+
+        for (const key of this._devices.keys()) {
+            if (!keys.has(key)) this._devices.delete(key);
+        }
+
+        for (const key of keys) {
+            let device = this._devices.get(key);
+            if (!device) {
+                // Newly seen devices are polled right away
+                device = { intervalMs: this.minIntervalMs, dueAt: now, inFlight: false, retighten: false };
+                this._devices.set(key, device);
+            }
+            if (device.inFlight || device.dueAt > now) continue;
+
+            device.inFlight = true;
+            this._limiter.run(() => this._pollDevice(key, device));
+        }
+    }
+
+    async _pollDevice(key, device) {
+        const startedAt = Date.now();
+        let changed = false;
+        try {
+            const value = await withTimeout(Promise.resolve().then(() => this._poll(key)), this.timeoutMs);
+            changed = this._apply(key, value) === true;
+            if (changed) this._stats.changes += 1;
+        } catch (err) {
+            this._stats.failures += 1;
+            if (err?.code === 'ETIMEDOUT') this._stats.timeouts += 1;
+        } finally {
+            const durationMs = Date.now() - startedAt;
+            this._stats.polls += 1;
+            this._stats.totalDurationMs += durationMs;
+            this._stats.maxDurationMs = Math.max(this._stats.maxDurationMs, durationMs);
+
+            // Failures back off like a stable value, so an unreachable device isn't hammered
+            device.intervalMs = changed || device.retighten
+                ? this.minIntervalMs
+                : Math.min(device.intervalMs * 2, this.maxIntervalMs);
+            device.dueAt = device.retighten ? Date.now() : Date.now() + device.intervalMs;
+            device.retighten = false;
+            device.inFlight = false;
+        }
+    }
+}
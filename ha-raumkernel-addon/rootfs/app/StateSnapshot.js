@@ -0,0 +1,81 @@
+/**
+ * StateSnapshot - Last known room list, persisted for warm starts
+ *
+ * After a restart node-raumkernel needs a while to find the host and report
+ * systemReady; until then there would be no rooms to publish. The snapshot keeps
+ * the published rooms (identity, zone membership, capabilities) and the zone
+ * topology, so the add-on can serve them right away, marked as stale. Playback
+ * state is not stored, it is outdated by the time the snapshot is read.
+ */
+
+import JsonFile from './JsonFile.js';
+
+/** Bump when the snapshot format changes; files with another version are discarded */
+const FILE_VERSION = 1;
+
+/** Fields describing what is playing, left out of the snapshot */
+const PLAYBACK_FIELDS = new Set(['isPlaying', 'nowPlaying']);
+
+/**
+ * @typedef {Object} Snapshot
+ * @property {Object[]} rooms - Published room states without playback fields
+ * @property {Map<string, import('./ZoneTopology.js').ZoneInfo>} zoneTopology
+ * @property {number} savedAt
+ */
+
+export default class StateSnapshot {
+    /**
+     * @param {string} filePath
+     * @param {{writeDelayMs?: number}} [options]
+     */
+    constructor(filePath, { writeDelayMs = 5000 } = {}) {
+        this._file = new JsonFile(filePath, { writeDelayMs });
+        this._restoredRooms = 0;
+    }
+
+    /**
+     * @returns {Snapshot|undefined} undefined if there is no usable snapshot
+     */
+    load() {
+        const data = this._file.read();
+        if (data?.version !== FILE_VERSION || !Array.isArray(data.rooms) || data.rooms.length === 0) {
+            return undefined;
+        }
+        this._restoredRooms = data.rooms.length;
+        return {
+            rooms: data.rooms,
+            zoneTopology: new Map(Object.entries(data.zones ?? {})),
+            savedAt: data.savedAt
+        };
+    }
+
+    /**
+     * Schedules writing the given state.
+     * @param {Object[]} rooms - Published room states
+     * @param {Map<string, import('./ZoneTopology.js').ZoneInfo>} zoneTopology
+     */
+    save(rooms, zoneTopology) {
+        this._file.scheduleWrite(() => ({
+            version: FILE_VERSION,
+            savedAt: Date.now(),
+            rooms: rooms.map(room => Object.fromEntries(
+                Object.entries(room).filter(([field]) => !PLAYBACK_FIELDS.has(field)))),
+            zones: Object.fromEntries(zoneTopology)
+        }));
+    }
+
+    /**
+     * Whether a state delta touches more than playback, i.e. should update the snapshot.
+     * @param {{rooms: Object<string, Object>, removed: string[]}} delta
+     * @returns {boolean}
+     */
+    static affects(delta) {
+        if (delta.removed.length > 0) return true;
+        return Object.values(delta.rooms).some(patch =>
+            Object.keys(patch).some(field => !PLAYBACK_FIELDS.has(field)));
+    }
+
+    getStats() {
+        return { restoredRooms: this._restoredRooms, ...this._file.getStats() };
+    }
+}
@@ -0,0 +1,185 @@
+/**
+ * Subscription - Per-client filter for state messages
+ *
+ * Clients send a `subscribe` command to limit what they receive:
+ * - types: broadcast message types (e.g. ['stateDelta']); command replies are never filtered
+ * - rooms: room UDNs
+ * - fields: field groups (see FIELD_GROUPS); room identity fields are always included
+ *
+ * Omitted criteria match everything. Messages are filtered before they are
+ * serialised, so a client only pays for the data it asked for.
+ */
+
+/** Fields that identify a room and are always sent */
+const IDENTITY_FIELDS = ['name', 'udn', 'roomUdn', 'rendererUdn', 'isZone'];
+
+/**
+ * Field groups. `room` lists top-level room fields, `nowPlaying` fields of the
+ * nested nowPlaying state.
+ */
+export const FIELD_GROUPS = {
+    transport: {
+        room: ['isPlaying'],
+        nowPlaying: ['isPlaying', 'isLoading', 'canPlayPause', 'canPlayNext', 'canPlayPrev',
+            'duration', 'durationSeconds', 'position', 'positionSeconds']
+    },
+    volume: { room: [], nowPlaying: ['volume', 'isMuted'] },
+    metadata: { room: [], nowPlaying: ['artist', 'track', 'album', 'uri', 'image', 'classString'] },
+    capabilities: { room: ['sourceSwitchingSupported', 'lineInSupported'], nowPlaying: [] },
+    zone: { room: ['zoneUdn', 'currentZoneUdn', 'zoneName', 'zoneMembers'], nowPlaying: [] },
+    power: { room: [], nowPlaying: ['powerState'] },
+    source: { room: [], nowPlaying: ['currentSource'] }
+};
+
+const pick = (object, keys) => {
+    const result = {};
+    for (const key of keys) {
+        if (key in object) result[key] = object[key];
+    }
+    return result;
+};
+
+export default class Subscription {
+    /**
+     * @param {{types?: string[], rooms?: string[], fields?: string[]}} criteria
+     * @param {number} stateVersion - State version the client currently has
+     */
+    constructor({ types, rooms, fields } = {}, stateVersion = 0) {
+        for (const [name, criteria] of Object.entries({ types, rooms, fields })) {
+            if (criteria != null && !Array.isArray(criteria)) {
+                throw new Error(`Subscription ${name} must be an array`);
+            }
+        }
+
+        const unknownGroups = (fields ?? []).filter(group => !FIELD_GROUPS[group]);
+        if (unknownGroups.length > 0) {
+            throw new Error(`Unknown field group(s): ${unknownGroups.join(', ')}. ` +
+                `Available: ${Object.keys(FIELD_GROUPS).join(', ')}`);
+        }
+
+        this.types = types ? new Set(types) : null;
+        this.rooms = rooms ? new Set(rooms) : null;
+        this.fields = fields ? [...new Set(fields)] : null;
+
+        this._roomFields = null;
+        this._nowPlayingFields = null;
+        if (this.fields) {
+            this._roomFields = [...IDENTITY_FIELDS];
+            this._nowPlayingFields = [];
+            for (const group of this.fields) {
+                this._roomFields.push(...FIELD_GROUPS[group].room);
+                this._nowPlayingFields.push(...FIELD_GROUPS[group].nowPlaying);
+            }
+        }
+
+        /** Last state version sent to this client, used as baseVersion of filtered deltas */
+        this.stateVersion = stateVersion;
+    }
+
+    /**
+     * True if the subscription changes message contents (room or field filters),
+     * not just which message types are delivered.
+     */
+    get isProjection() {
+        return this.rooms !== null || this._roomFields !== null;
+    }
+
+    /**
+     * @param {string} type - Broadcast message type
+     * @returns {boolean}
+     */
+    acceptsType(type) {
+        return !this.types || this.types.has(type);
+    }
+
+    /**
+     * Applies the subscription to an outgoing message.
+     * @param {Object} message
+     * @param {boolean} [isBroadcast] - Command replies are never dropped by type
+     * @returns {Object|null} The filtered message (the same object if nothing was
+     *   filtered out), or null if the client should not get it
+     */
+    filterMessage(message, isBroadcast = true) {
+        if (isBroadcast && !this.acceptsType(message.type)) return null;
+
+        switch (message.type) {
+            case 'fullStateUpdate':
+                this.stateVersion = message.version;
+                if (!this.isProjection) return message;
+                return {
+                    ...message,
+                    payload: { ...message.payload, availableRooms: this._filterRooms(message.payload.availableRooms) }
+                };
+
+            case 'zones':
+            case 'zoneStateChanged':
+                if (!this.isProjection) return message;
+                return { ...message, payload: this._filterRooms(message.payload) };
+
+            case 'stateDelta':
+                return this._filterDelta(message);
+
+            default:
+                return message;
+        }
+    }
+
+    toJSON() {
+        return {
+            types: this.types ? [...this.types] : null,
+            rooms: this.rooms ? [...this.rooms] : null,
+            fields: this.fields
+        };
+    }
+
+    _filterRooms(rooms) {
+        return rooms
+            .filter(room => !this.rooms || this.rooms.has(room.udn))
+            .map(room => this._filterRoom(room));
+    }
+
+    /**
+     * Projects a room (or a room patch) onto the subscribed field groups.
+     */
+    _filterRoom(room) {
+        if (!this._roomFields) return room;
+
+        const result = pick(room, this._roomFields);
+        if (room.nowPlaying) {
+            const nowPlaying = pick(room.nowPlaying, this._nowPlayingFields);
+            if (Object.keys(nowPlaying).length > 0) result.nowPlaying = nowPlaying;
+        }
+        return result;
+    }
+
+    _filterDelta(message) {
+        const delta = message.payload;
+        if (!this.isProjection && delta.baseVersion === this.stateVersion) {
+            this.stateVersion = delta.version;
+            return message;
+        }
+
+        const rooms = {};
+        let hasRooms = false;
+
+        for (const [udn, patch] of Object.entries(delta.rooms)) {
+            if (this.rooms && !this.rooms.has(udn)) continue;
+
+            const filtered = this._filterRoom(patch);
+            // Patches of existing rooms carry no identity fields; drop them if
+            // nothing subscribed is left.
+            const isNewRoom = 'udn' in patch;
+            if (isNewRoom || Object.keys(filtered).length > 0) {
+                rooms[udn] = filtered;
+                hasRooms = true;
+            }
+        }
+
+        const removed = this.rooms ? delta.removed.filter(udn => this.rooms.has(udn)) : delta.removed;
+        if (!hasRooms && removed.length === 0) return null;
+
+        const baseVersion = this.stateVersion;
+        this.stateVersion = delta.version;
+        return { ...message, payload: { ...delta, baseVersion, rooms, removed } };
+    }
+}
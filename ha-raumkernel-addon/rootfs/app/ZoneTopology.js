@@ -0,0 +1,96 @@
+/**
+ * ZoneTopology - Zone membership snapshots and their differences
+ *
+ * The Raumfeld host reports the complete zone configuration with every change.
+ * Comparing it with the previous configuration tells which rooms actually moved,
+ * so only those need to be updated and re-broadcast.
+ */
+
+/**
+ * @typedef {Object} ZoneInfo
+ * @property {string} name - Zone display name
+ * @property {string[]} members - Room UDNs in the order reported by the host
+ */
+
+/**
+ * @typedef {Object} ZoneChange
+ * @property {'zoneCreated'|'zoneRemoved'|'zoneRenamed'|'roomJoined'|'roomLeft'} type
+ * @property {string} zoneUdn
+ * @property {string} [roomUdn] - For roomJoined / roomLeft
+ * @property {string} [name] - Zone name, for zoneCreated / zoneRenamed
+ */
+
+/**
+ * Builds a topology from the host's combined zone state. Entries that are not
+ * zones (rooms not assigned to any zone) are skipped. The input is not modified.
+ * @param {Array} zones - combinedZoneState.zones
+ * @returns {Map<string, ZoneInfo>} Zones keyed by zone UDN
+ */
+export function buildZoneTopology(zones) {
+    const topology = new Map();
+    for (const zone of zones ?? []) {
+        if (!zone.isZone) continue;
+        topology.set(zone.udn, {
+            name: zone.name,
+            members: zone.rooms?.map(room => room.udn) ?? []
+        });
+    }
+    return topology;
+}
+
+/**
+ * Lists the differences between two topologies.
+ * @param {Map<string, ZoneInfo>} previous
+ * @param {Map<string, ZoneInfo>} next
+ * @returns {ZoneChange[]}
+ */
+export function diffZoneTopology(previous, next) {
+    const changes = [];
+
+    for (const [zoneUdn, zone] of next) {
+        const before = previous.get(zoneUdn);
+        if (!before) {
+            changes.push({ type: 'zoneCreated', zoneUdn, name: zone.name });
+        } else if (before.name !== zone.name) {
+            changes.push({ type: 'zoneRenamed', zoneUdn, name: zone.name });
+        }
+
+        const previousMembers = new Set(before?.members ?? []);
+        for (const roomUdn of zone.members) {
+            if (!previousMembers.has(roomUdn)) changes.push({ type: 'roomJoined', zoneUdn, roomUdn });
+        }
+    }
+
+    for (const [zoneUdn, zone] of previous) {
+        const after = next.get(zoneUdn);
+        const members = new Set(after?.members ?? []);
+        for (const roomUdn of zone.members) {
+            if (!members.has(roomUdn)) changes.push({ type: 'roomLeft', zoneUdn, roomUdn });
+        }
+        if (!after) changes.push({ type: 'zoneRemoved', zoneUdn });
+    }
+
+    return changes;
+}
+
+/**
+ * Returns the UDNs of zones whose published fields (name, member list) differ.
+ * Unlike diffZoneTopology this also catches reordered members.
+ * @param {Map<string, ZoneInfo>} previous
+ * @param {Map<string, ZoneInfo>} next
+ * @returns {Set<string>}
+ */
+export function changedZones(previous, next) {
+    const changed = new Set();
+    for (const [zoneUdn, zone] of next) {
+        const before = previous.get(zoneUdn);
+        const isSame = before && before.name === zone.name &&
+            before.members.length === zone.members.length &&
+            before.members.every((udn, i) => udn === zone.members[i]);
+        if (!isSame) changed.add(zoneUdn);
+    }
+    for (const zoneUdn of previous.keys()) {
+        if (!next.has(zoneUdn)) changed.add(zoneUdn);
+    }
+    return changed;
+}
@@ -0,0 +1,109 @@
+/**
+ * Codec benchmark - compares JSON and MessagePack frames for room state updates
+ *
+ * Reports bytes per message (raw and deflated, as with permessage-deflate) and
+ * encode/decode time for a full state snapshot and a typical per-room delta.
+ *
+ * Usage: node bench/codecs.js [rooms] [iterations]
+ */
+
+import { randomUUID } from 'crypto';
+import { deflateRawSync } from 'zlib';
+import MessagePack from '../MessagePack.js';
+
+const ROOM_COUNT = parseInt(process.argv[2]) || 14;
+const ITERATIONS = parseInt(process.argv[3]) || 2000;
+
+const uuid = () => `uuid:${randomUUID()}`;
+
+function createRoom(index) {
+    const roomUdn = uuid();
+    const zoneUdn = uuid();
+    return {
+        name: `Room ${index + 1}`,
+        udn: roomUdn,
+        roomUdn,
+        rendererUdn: uuid(),
+        isZone: false,
+        zoneUdn,
+        currentZoneUdn: zoneUdn,
+        zoneName: `Room ${index + 1}`,
+        zoneMembers: [roomUdn],
+        sourceSwitchingSupported: index % 4 === 0,
+        lineInSupported: index % 3 === 0,
+        isPlaying: true,
+        nowPlaying: {
+            artist: 'Some Artist',
+            track: `Some fairly long track title number ${index}`,
+            album: 'Some Album (Deluxe Edition)',
+            uri: `http://192.168.1.10:47366/raumfeldImage?trackId=${index}&album=some-album`,
+            image: `https://resources.tidal.com/images/${randomUUID()}/640x640.jpg`,
+            classString: 'object.item.audioItem.musicTrack',
+            isPlaying: true,
+            isLoading: false,
+            isMuted: false,
+            volume: 35,
+            canPlayPause: true,
+            canPlayNext: true,
+            canPlayPrev: true,
+            duration: '0:04:12',
+            durationSeconds: 252,
+            position: 61,
+            positionSeconds: 61,
+            powerState: 'ACTIVE',
+            currentSource: 'Raumfeld'
+        }
+    };
+}
+
+const rooms = Array.from({ length: ROOM_COUNT }, (_, i) => createRoom(i));
+
+const messages = {
+    fullStateUpdate: {
+        type: 'fullStateUpdate',
+        version: 1234,
+        payload: { isReady: true, availableRooms: rooms, favourites: [] }
+    },
+    stateDelta: {
+        type: 'stateDelta',
+        payload: {
+            version: 1235,
+            baseVersion: 1234,
+            rooms: { [rooms[0].udn]: { nowPlaying: { position: 62, positionSeconds: 62 } } },
+            removed: []
+        }
+    }
+};
+
+const codecs = {
+    json: { encode: (data) => JSON.stringify(data), decode: (raw) => JSON.parse(raw) },
+    msgpack: { encode: (data) => MessagePack.encode(data), decode: (raw) => MessagePack.decode(raw) }
+};
+
+function timeIt(fn) {
+    // Warm up before measuring
+    for (let i = 0; i < Math.min(ITERATIONS, 200); i++) fn();
+    const start = process.hrtime.bigint();
+    for (let i = 0; i < ITERATIONS; i++) fn();
+    return Number(process.hrtime.bigint() - start) / ITERATIONS / 1000;
+}
+
+console.log(`Rooms: ${ROOM_COUNT}, iterations: ${ITERATIONS}\n`);
+
+const results = [];
+for (const [messageType, message] of Object.entries(messages)) {
+    for (const [codecName, codec] of Object.entries(codecs)) {
+        const encoded = codec.encode(message);
+        const bytes = Buffer.byteLength(encoded);
+        results.push({
+            message: messageType,
+            codec: codecName,
+            bytes,
+            deflatedBytes: deflateRawSync(encoded).length,
+            encodeUs: timeIt(() => codec.encode(message)).toFixed(1),
+            decodeUs: timeIt(() => codec.decode(encoded)).toFixed(1)
+        });
+    }
+}
+
+console.table(results);
@@ -0,0 +1,99 @@
+/**
+ * DIDL-Lite benchmark - compares the JSDOM DOMParser path with DidlParser
+ *
+ * Parses typical track metadata (as reported with every renderer state change) and
+ * a browse result page, checks both parsers agree, and reports the time per parse.
+ * "cached" is the metadata path as used by RaumkernelHelper, where the same
+ * metadata string hits the LRU cache.
+ *
+ * Usage: node bench/didl.js [iterations] [browseItems]
+ */
+
+import { JSDOM } from 'jsdom';
+import { parseDidl } from '../DidlParser.js';
+import LruCache from '../LruCache.js';
+
+const ITERATIONS = parseInt(process.argv[2]) || 2000;
+const BROWSE_ITEMS = parseInt(process.argv[3]) || 50;
+
+const DIDL_OPEN = '<DIDL-Lite xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/" ' +
+    'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/" ' +
+    'xmlns:raumfeld="urn:schemas-raumfeld-com:meta-data/raumfeld">';
+
+function createItem(index, type = 'item') {
+    const upnpClass = type === 'item' ? 'object.item.audioItem.musicTrack' : 'object.container.album.musicAlbum';
+    return `<${type} id="0/My Music/Albums/Album%20${index}/Track%20${index}" parentID="0/My Music/Albums" restricted="1">` +
+        `<raumfeld:name>Track</raumfeld:name>` +
+        `<upnp:class>${upnpClass}</upnp:class>` +
+        `<dc:title>Track ${index} &amp; Friends (Live at &quot;Venue&quot;)</dc:title>` +
+        `<upnp:artist>Some Artist</upnp:artist>` +
+        `<upnp:album>Some Album (Deluxe Edition)</upnp:album>` +
+        `<upnp:originalTrackNumber>${index + 1}</upnp:originalTrackNumber>` +
+        `<upnp:albumArtURI dlna:profileID="JPEG_TN" xmlns:dlna="urn:schemas-dlna-org:metadata-1-0/">` +
+        `http://192.168.1.10:47366/raumfeldImage?trackId=${index}&amp;size=640</upnp:albumArtURI>` +
+        `<res protocolInfo="http-get:*:audio/flac:*" duration="0:04:12.000">` +
+        `http://192.168.1.10:47366/track/${index}.flac</res>` +
+        `</${type}>`;
+}
+
+const trackMetadata = `${DIDL_OPEN}${createItem(1)}</DIDL-Lite>`;
+const browseResult = DIDL_OPEN +
+    Array.from({ length: BROWSE_ITEMS }, (_, i) => createItem(i, i % 5 === 0 ? 'container' : 'item')).join('') +
+    '</DIDL-Lite>';
+
+const TAGS = ['dc:title', 'upnp:artist', 'upnp:album', 'upnp:albumArtURI', 'upnp:class', 'res'];
+
+function parseWithJsdom(xml) {
+    const parser = new (new JSDOM('')).window.DOMParser();
+    const doc = parser.parseFromString(xml, 'text/xml');
+    const objects = [];
+    for (const node of doc.querySelectorAll('container, item')) {
+        const fields = {};
+        for (const tag of TAGS) fields[tag] = node.getElementsByTagName(tag)[0]?.textContent ?? null;
+        objects.push({ type: node.tagName, id: node.getAttribute('id'), fields });
+    }
+    return objects;
+}
+
+function parseWithDidlParser(xml) {
+    return parseDidl(xml).map(({ type, id, fields }) => ({
+        type,
+        id,
+        fields: Object.fromEntries(TAGS.map(tag => [tag, fields[tag] ?? null]))
+    }));
+}
+
+function timeIt(fn) {
+    // Warm up before measuring
+    for (let i = 0; i < Math.min(ITERATIONS, 200); i++) fn();
+    const start = process.hrtime.bigint();
+    for (let i = 0; i < ITERATIONS; i++) fn();
+    return Number(process.hrtime.bigint() - start) / ITERATIONS / 1000;
+}
+
+for (const [name, xml] of Object.entries({ trackMetadata, browseResult })) {
+    if (JSON.stringify(parseWithJsdom(xml)) !== JSON.stringify(parseWithDidlParser(xml))) {
+        console.error(`Parsers disagree on ${name}`);
+        process.exit(1);
+    }
+}
+
+console.log(`Iterations: ${ITERATIONS}, browse items: ${BROWSE_ITEMS}\n`);
+
+const cache = new LruCache(256);
+const parseCached = (xml) => {
+    let result = cache.get(xml);
+    if (!result) {
+        result = parseDidl(xml);
+        cache.set(xml, result);
+    }
+    return result;
+};
+
+console.table([
+    { input: 'trackMetadata', parser: 'jsdom', us: timeIt(() => parseWithJsdom(trackMetadata)).toFixed(1) },
+    { input: 'trackMetadata', parser: 'DidlParser', us: timeIt(() => parseDidl(trackMetadata)).toFixed(1) },
+    { input: 'trackMetadata', parser: 'DidlParser (cached)', us: timeIt(() => parseCached(trackMetadata)).toFixed(2) },
+    { input: 'browseResult', parser: 'jsdom', us: timeIt(() => parseWithJsdom(browseResult)).toFixed(1) },
+    { input: 'browseResult', parser: 'DidlParser', us: timeIt(() => parseDidl(browseResult)).toFixed(1) }
+]);
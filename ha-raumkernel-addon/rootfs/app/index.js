@@ -2,6 +2,11 @@ import { WebSocketServer } from 'ws';
 import { createServer } from 'http';
 import RaumkernelHelper from './RaumkernelHelper.js';
 import IntegrationManager from './IntegrationManager.js';
+import MessagePack from './MessagePack.js';
+import Subscription from './Subscription.js';
+import ConcurrencyLimiter from './ConcurrencyLimiter.js';
+import OutboundQueue, { STATE_MESSAGE_TYPES } from './OutboundQueue.js';
+import FrameCache, { SNAPSHOT_MESSAGE_TYPES } from './FrameCache.js';
 
 import fs from 'fs';
 
@@ -35,7 +40,10 @@ const runtimeConfig = {
     RAUMFELD_HOST: process.env.RAUMFELD_HOST || '',
     LOG_LEVEL: process.env.LOG_LEVEL || 'info',
     ENABLE_AUTO_INSTALL: true,
-    DEVELOPER_MODE: false
+    DEVELOPER_MODE: false,
+    BROADCAST_WINDOW_MS: process.env.BROADCAST_WINDOW_MS ? parseInt(process.env.BROADCAST_WINDOW_MS) : 50,
+    BROADCAST_MAX_LATENCY_MS: process.env.BROADCAST_MAX_LATENCY_MS ? parseInt(process.env.BROADCAST_MAX_LATENCY_MS) : 200,
+    BROWSE_PREFETCH_COUNT: process.env.BROWSE_PREFETCH_COUNT ? parseInt(process.env.BROWSE_PREFETCH_COUNT) : 3
 };
 
 try {
@@ -46,6 +54,9 @@ try {
         if (options.LOG_LEVEL !== undefined) runtimeConfig.LOG_LEVEL = options.LOG_LEVEL;
         if (options.ENABLE_AUTO_INSTALL !== undefined) runtimeConfig.ENABLE_AUTO_INSTALL = options.ENABLE_AUTO_INSTALL;
         if (options.DEVELOPER_MODE !== undefined) runtimeConfig.DEVELOPER_MODE = options.DEVELOPER_MODE;
+        if (options.BROADCAST_WINDOW_MS !== undefined) runtimeConfig.BROADCAST_WINDOW_MS = options.BROADCAST_WINDOW_MS;
+        if (options.BROADCAST_MAX_LATENCY_MS !== undefined) runtimeConfig.BROADCAST_MAX_LATENCY_MS = options.BROADCAST_MAX_LATENCY_MS;
+        if (options.BROWSE_PREFETCH_COUNT !== undefined) runtimeConfig.BROWSE_PREFETCH_COUNT = options.BROWSE_PREFETCH_COUNT;
         
         // Propagate to process.env as some modules might use it
         process.env.RAUMFELD_HOST = runtimeConfig.RAUMFELD_HOST;
@@ -125,6 +136,18 @@ const server = createServer((req, res) => {
                             <span class="config-label">DEVELOPER_MODE</span>
                             <span class="config-value">${runtimeConfig.DEVELOPER_MODE}</span>
                         </div>
+                        <div class="config-item">
+                            <span class="config-label">BROADCAST_WINDOW_MS</span>
+                            <span class="config-value">${runtimeConfig.BROADCAST_WINDOW_MS}</span>
+                        </div>
+                        <div class="config-item">
+                            <span class="config-label">BROADCAST_MAX_LATENCY_MS</span>
+                            <span class="config-value">${runtimeConfig.BROADCAST_MAX_LATENCY_MS}</span>
+                        </div>
+                        <div class="config-item">
+                            <span class="config-label">BROWSE_PREFETCH_COUNT</span>
+                            <span class="config-value">${runtimeConfig.BROWSE_PREFETCH_COUNT}</span>
+                        </div>
                     </div>
                 </div>
             </div>
@@ -145,7 +168,8 @@ const server = createServer((req, res) => {
                     ws = new WebSocket(wsUrl);
 
                     ws.onopen = () => {
-                        // console.log('Connected');
+                        // Only the full state is shown, skip everything else
+                        ws.send(JSON.stringify({ command: 'subscribe', payload: { types: ['fullStateUpdate'] } }));
                     };
 
                     ws.onclose = () => {
@@ -171,12 +195,33 @@ const server = createServer((req, res) => {
     `);
 });
 
-const wss = new WebSocketServer({ server });
+// The WebSocket subprotocol selects the frame encoding. Clients that don't request
+// one (e.g. the status page) get JSON text frames.
+const SUBPROTOCOL_CODECS = {
+    'raumkernel.msgpack': 'msgpack',
+    'raumkernel.json': 'json'
+};
+
+const wss = new WebSocketServer({
+    server,
+    // Room payloads repeat the same keys and UDNs in every frame and compress well
+    perMessageDeflate: { threshold: 256 },
+    handleProtocols: (protocols) => {
+        for (const protocol of protocols) {
+            if (SUBPROTOCOL_CODECS[protocol]) return protocol;
+        }
+        return false;
+    }
+});
 
 server.listen(PORT, () => {
     console.log(`HTTP and WebSocket server started on port ${PORT}`);
 });
-const rkHelper = new RaumkernelHelper();
+const rkHelper = new RaumkernelHelper({
+    broadcastWindowMs: runtimeConfig.BROADCAST_WINDOW_MS,
+    broadcastMaxLatencyMs: runtimeConfig.BROADCAST_MAX_LATENCY_MS,
+    browsePrefetchCount: runtimeConfig.BROWSE_PREFETCH_COUNT
+});
 
 // Log startup information
 let addonVersion = 'unknown';
@@ -202,191 +247,454 @@ console.log(`Startup: addon=${addonVersion} node-raumkernel=${nodeRaumkernelVers
 
 // console.log(\`WebSocket server started on port \${PORT}\`); // Logged by server.listen callback now
 
-// Broadcast state to all connected clients
-const broadcast = (data) => {
-    const message = JSON.stringify(data);
+const encodeMessage = (data, codec) => codec === 'msgpack' ? MessagePack.encode(data) : JSON.stringify(data);
+
+// Snapshots of the current state are encoded once per codec and state version
+const frameCache = new FrameCache();
+
+const encodeFrame = (data, codec) => SNAPSHOT_MESSAGE_TYPES.has(data.type) && data.version !== undefined
+    ? frameCache.getFrame(data, codec, rkHelper.getState().isReady)
+    : encodeMessage(data, codec);
+
+// Encodes a message for one client, applying its subscription first.
+// Returns null if the subscription filters the message out.
+const prepareFrame = (ws, data, isBroadcast = false) => {
+    const message = ws.subscription ? ws.subscription.filterMessage(data, isBroadcast) : data;
+    if (!message) return null;
+    return message === data ? encodeFrame(data, ws.codec) : encodeMessage(message, ws.codec);
+};
+
+// Send a message to one client in its negotiated encoding. Messages sent this
+// way are queued if the client is slow, but never dropped.
+const send = (ws, data) => {
+    const frame = prepareFrame(ws, data);
+    if (frame) ws.outbound.send(frame);
+};
+
+// Broadcast a message to all connected clients, optionally filtered.
+// The message is encoded at most once per codec; only clients whose subscription
+// changes its contents get a frame of their own.
+// State messages are not queued for congested clients; they get the latest
+// state once they catch up instead.
+const broadcast = (data, filter = () => true) => {
+    const isState = STATE_MESSAGE_TYPES.has(data.type);
+    const messages = {};
+    const sharedFrame = (codec) => messages[codec] ??= encodeFrame(data, codec);
     wss.clients.forEach((client) => {
-        if (client.readyState === client.OPEN) {
-            client.send(message);
+        if (client.readyState !== client.OPEN || !filter(client)) return;
+        if (isState && client.outbound.isCongested) {
+            if (client.subscription?.acceptsType(data.type) ?? true) {
+                client.outbound.supersedeState(data.type);
+            }
+            return;
         }
+        if (client.subscription) {
+            const message = client.subscription.filterMessage(data, true);
+            if (!message) return;
+            client.outbound.send(message === data ? sharedFrame(client.codec) : encodeMessage(message, client.codec));
+            return;
+        }
+        client.outbound.send(sharedFrame(client.codec));
     });
 };
 
+// Builds the frames that replace state messages a congested client missed.
+// Delta clients cannot skip deltas, so they get a full snapshot instead.
+const buildResyncFrames = (ws, types) => {
+    const version = rkHelper.getStateVersion();
+    const state = rkHelper.getState();
+    const messages = [];
+    if (types.has('zoneStateChanged')) {
+        messages.push({ type: 'zoneStateChanged', version, payload: state.availableRooms });
+    }
+    if (types.has('fullStateUpdate') || types.has('stateDelta')) {
+        messages.push({ type: 'fullStateUpdate', version, payload: state });
+    }
+    return messages.map(message => prepareFrame(ws, message));
+};
+
+// Clients connecting with `?delta=1` receive versioned per-room `stateDelta` messages.
+// All other clients (status page, older integrations) keep receiving `fullStateUpdate`.
+const wantsDeltas = (client) => client.deltaUpdates;
+const wantsFullState = (client) => !client.deltaUpdates;
+
 // Handle state changes from Raumkernel
 rkHelper.raumkernel.on('systemReady', (ready) => {
     broadcast({ type: 'systemReady', payload: ready });
 });
 
 rkHelper.raumkernel.on('combinedZoneStateChanged', () => {
-    // rkHelper handles the update internally via its own listener
+    // rkHelper handles the update internally via its own listener and emits a
+    // stateDelta for the affected rooms. Legacy clients use this for discovery.
     const zones = rkHelper.getState().availableRooms;
-    broadcast({ type: 'zoneStateChanged', payload: zones });
+    broadcast({ type: 'zoneStateChanged', version: rkHelper.getStateVersion(), payload: zones }, wantsFullState);
 });
 
-rkHelper.raumkernel.on('rendererStateChanged', () => {
-     // This might be too noisy, but useful for real-time updates
-     // Ideally we map this back to the Zone it belongs to or send generic update
-     // For minimal implementation, rely on periodic or major events, or implement granular updates.
-     // rkHelper.getAvailableZones() is triggered by combinedZoneStateChanged mostly.
-     // But 'rendererStateChanged' is for volume/transport changes.
-     
-     // Trigger a broadcast of the full zone state for simplicity for now
-     const fullState = rkHelper.getState(); 
-     broadcast({ type: 'fullStateUpdate', payload: fullState });
+rkHelper.on('stateDelta', (delta) => {
+    broadcast({ type: 'stateDelta', payload: delta }, wantsDeltas);
+    broadcast({ type: 'fullStateUpdate', version: delta.version, payload: rkHelper.getState() }, wantsFullState);
 });
 
+// Clients caching browse results drop the listed containers (all if objectIds is null)
+rkHelper.on('browseInvalidated', (payload) => {
+    broadcast({ type: 'browseInvalidated', payload });
+});
 
-wss.on('connection', (ws) => {
-    console.log('Client connected');
-    
-    // Send initial state
-    ws.send(JSON.stringify({ type: 'fullStateUpdate', payload: rkHelper.getState() }));
+const sendFullState = (ws) => {
+    send(ws, { type: 'fullStateUpdate', version: rkHelper.getStateVersion(), payload: rkHelper.getState() });
+};
 
-    ws.on('message', async (message) => {
-        try {
-            const data = JSON.parse(message);
-            console.log('Received command:', data);
+// Per-client backpressure: state updates are held back once this many bytes wait
+// to be written, and a client whose undroppable backlog exceeds the cap is closed.
+const CLIENT_HIGH_WATER_MARK = 64 * 1024;
+const CLIENT_MAX_QUEUE_BYTES = 4 * 1024 * 1024;
+let nextClientId = 1;
+
+const getClientStats = () => [...wss.clients].map(client => ({
+    id: client.clientId,
+    codec: client.codec,
+    deltaUpdates: client.deltaUpdates,
+    subscription: client.subscription?.toJSON() ?? null,
+    queue: client.outbound.getStats()
+}));
+
+// Protocol features announced to clients in the initial `hello` message
+const PROTOCOL_FEATURES = ['delta', 'ack', 'subscribe', 'batch', 'resume', 'browsePaging'];
+
+// Commands whose payload names a room that must exist
+const getRoomIdentifier = (payload) => payload.roomUdn ?? payload.room;
+
+// Limits for the `batch` command
+const BATCH_MAX_OPERATIONS = 100;
+const BATCH_DEFAULT_CONCURRENCY = 4;
+const BATCH_MAX_CONCURRENCY = 16;
+
+// Objects per browseChunk frame of a streamed browse
+const BROWSE_DEFAULT_CHUNK_SIZE = 100;
+
+/**
+ * Executes a list of commands. Operations that control the same renderer run in
+ * order; distinct renderers are driven in parallel with bounded concurrency.
+ * @returns {Promise<Array<{ok: boolean, result?: *, error?: string}>>} One entry per operation
+ */
+const runBatch = async (ws, { operations, concurrency = BATCH_DEFAULT_CONCURRENCY }) => {
+    if (!Array.isArray(operations)) {
+        throw new Error('batch requires an operations array');
+    }
+    if (operations.length > BATCH_MAX_OPERATIONS) {
+        throw new Error(`batch is limited to ${BATCH_MAX_OPERATIONS} operations`);
+    }
+
+    // Group operations by the renderer they end up controlling (the zone renderer
+    // for grouped rooms). Operations without a room get a lane of their own.
+    const lanes = new Map();
+    operations.forEach((operation, index) => {
+        const room = rkHelper.findRoom(getRoomIdentifier(operation?.payload ?? {}));
+        const key = room ? (room.zoneUdn ?? room.rendererUdn) : `#${index}`;
+        if (!lanes.has(key)) lanes.set(key, []);
+        lanes.get(key).push(index);
+    });
+
+    const results = new Array(operations.length);
+    const limiter = new ConcurrencyLimiter(Math.min(concurrency, BATCH_MAX_CONCURRENCY));
+
+    await Promise.all([...lanes.values()].map(lane => limiter.run(async () => {
+        for (const index of lane) {
+            const { command, payload } = operations[index] ?? {};
+            try {
+                if (command === 'batch') {
+                    throw new Error('Nested batch commands are not supported');
+                }
+                if (command === 'browse' && operations[index].payload?.stream) {
+                    throw new Error('Streamed browsing is not supported in batch commands');
+                }
+                // Results are returned in the batch reply, keyed by operation index
+                const result = await handleCommand(ws, command, payload ?? {}, index);
+                results[index] = { ok: true, result: result ?? null };
+            } catch (error) {
+                results[index] = { ok: false, error: error.message };
+            }
+        }
+    })));
+
+    return results;
+};
+
+/**
+ * Sends the children of a container as ordered `browseChunk` frames tagged with
+ * the request id. The next page is only fetched once the client has taken the
+ * previous frames, so large containers don't pile up in memory.
+ * @returns {Promise<{objectId: string, offset: number, totalMatches: number,
+ *   hasMore: boolean, returned: number, chunks: number}>} Summary sent as the command result
+ */
+const streamBrowse = async (ws, { objectId = '0', offset = 0, limit = Infinity, chunkSize }, requestId) => {
+    if (requestId === undefined) {
+        throw new Error('Streamed browsing requires a request id');
+    }
+
+    // Coerced like chunkSize: a string offset would turn `offset + limit` into a string.
+    // A missing, zero or non-numeric limit streams the rest of the container.
+    offset = Math.max(0, Math.floor(offset) || 0);
+    limit = Math.max(1, Math.floor(limit) || Infinity);
+    const size = Math.max(1, Math.floor(chunkSize) || BROWSE_DEFAULT_CHUNK_SIZE);
+    const end = offset + limit;
+    let position = offset;
+    let totalMatches = 0;
+    let hasMore = false;
+    let chunks = 0;
+
+    while (position < end && ws.readyState === ws.OPEN) {
+        const count = Math.min(size, end - position);
+        const page = await rkHelper.browsePage(objectId, position, count);
+        ({ totalMatches, hasMore } = page);
+        send(ws, {
+            type: 'browseChunk',
+            id: requestId,
+            payload: { objectId, seq: chunks, offset: position, items: page.items, totalMatches, hasMore }
+        });
+        chunks += 1;
+        position += page.items.length;
+
+        // totalMatches is only a lower bound if the media server can't count the children
+        if (page.items.length === 0 || !hasMore) break;
+        await ws.outbound.whenDrained();
+    }
+
+    return { objectId, offset, totalMatches, hasMore, returned: position - offset, chunks };
+};
+
+/**
+ * Executes a single client command.
+ * @returns {Promise<*>} Command result, sent back to clients that passed a request `id`
+ */
+const handleCommand = async (ws, command, payload, requestId) => {
+    const roomIdentifier = getRoomIdentifier(payload);
+    if (roomIdentifier !== undefined && !rkHelper.findRoom(roomIdentifier)) {
+        throw new Error(`Room not found: ${roomIdentifier}`);
+    }
+
+    switch (command) {
+        case 'getZones':
+            send(ws, { type: 'zones', version: rkHelper.getStateVersion(), payload: rkHelper.getState().availableRooms });
+            return null;
             
-            const { command, payload } = data;
+        case 'getStats':
+            return { ...rkHelper.getStats(), frameCache: frameCache.getStats(), clients: getClientStats() };
+
+        case 'batch':
+            // payload: { operations: [{ command, payload }], concurrency? }
+            return runBatch(ws, payload);
+
+        case 'subscribe': {
+            // payload: { types?, rooms?, fields? } - an empty payload removes the subscription
+            const { types, rooms, fields } = payload;
+            const isFiltered = [types, rooms, fields].some(criteria => criteria != null);
+            ws.subscription = isFiltered ? new Subscription({ types, rooms, fields }) : null;
+            // Resend the state so the client's view matches the new filter
+            sendFullState(ws);
+            return { subscription: ws.subscription?.toJSON() ?? null };
+        }
+
+        case 'play':
+            // payload: { roomUdn, streamUrl } (streamUrl optional if just resuming)
+            if (payload.streamUrl) {
+                await rkHelper.load(payload.roomUdn, payload.streamUrl);
+            } else {
+                // Use play() directly to ensure wakeup logic is triggered
+                await rkHelper.play(payload.roomUdn);
+            }
+            break;
+
+        case 'seek':
+            await rkHelper.seek(payload.roomUdn, payload.value);
+            break;
             
-            switch (command) {
-                case 'getZones':
-                    ws.send(JSON.stringify({ type: 'zones', payload: rkHelper.getState().availableRooms }));
-                    break;
-                    
-                case 'play':
-                    // payload: { roomUdn, streamUrl } (streamUrl optional if just resuming)
-                    if (payload.streamUrl) {
-                        await rkHelper.load(payload.roomUdn, payload.streamUrl);
-                    } else {
-                        // Use play() directly to ensure wakeup logic is triggered
-                        await rkHelper.play(payload.roomUdn);
-                    }
-                    break;
+        case 'pause':
+            await rkHelper.setPause(payload.roomUdn, true);
+            break;
+            
+        case 'stop':
+            await rkHelper.setStop(payload.roomUdn);
+            break;
+            
+        case 'next':
+            await rkHelper.setNext(payload.roomUdn);
+            break;
+            
+        case 'prev':
+            await rkHelper.setPrev(payload.roomUdn);
+            break;
+            
+        case 'setVolume':
+            await rkHelper.setVolume(payload.roomUdn, payload.volume);
+            break;
+            
+        case 'setMute':
+            await rkHelper.setMute(payload.roomUdn, payload.mute);
+            break;
+        
+        case 'load':
+            await rkHelper.load(payload.roomUdn, payload.url);
+            break;
+
+        case 'selectSource':
+            if (payload.source === 'Line-in') {
+                await rkHelper.setRoomLineIn(payload.room);
+            } else {
+                await rkHelper.setRoomSource(payload.room, payload.source);
+            }
+            break;
 
-                case 'seek':
-                    await rkHelper.seek(payload.roomUdn, payload.value);
-                    break;
-                    
-                case 'pause':
-                    await rkHelper.setPause(payload.roomUdn, true);
-                    break;
-                    
-                case 'stop':
-                    await rkHelper.setStop(payload.roomUdn);
-                    break;
-                    
-                case 'next':
-                    await rkHelper.setNext(payload.roomUdn);
-                    break;
-                    
-                case 'prev':
-                    await rkHelper.setPrev(payload.roomUdn);
-                    break;
-                    
-                case 'setVolume':
-                    await rkHelper.setVolume(payload.roomUdn, payload.volume);
-                    break;
-                    
-                case 'setMute':
-                    await rkHelper.setMute(payload.roomUdn, payload.mute);
-                    break;
-                
-                case 'load':
-                    await rkHelper.load(payload.roomUdn, payload.url);
-                    break;
-
-                case 'selectSource':
-                    if (payload.source === 'Line-in') {
-                        await rkHelper.setRoomLineIn(payload.room);
-                    } else {
-                        await rkHelper.setRoomSource(payload.room, payload.source);
-                    }
-                    break;
-
-                case 'browse': {
-                    const items = await rkHelper.browse(payload.objectId);
-                    ws.send(JSON.stringify({ 
-                        type: 'browseResult', 
-                        payload: { 
-                            objectId: payload.objectId, 
-                            items: items 
-                        }     
-                    }));
-                    break;
-                }
+        case 'browse': {
+            // payload: { objectId, offset?, limit?, stream?, chunkSize? } - offset/limit
+            // reply with one page, its totalMatches and hasMore, stream sends browseChunk frames
+            if (payload.stream) {
+                return streamBrowse(ws, payload, requestId);
+            }
+            if (payload.offset !== undefined || payload.limit !== undefined) {
+                return rkHelper.browsePage(payload.objectId, payload.offset, payload.limit);
+            }
 
-                case 'loadContainer':
-                    await rkHelper.loadContainer(payload.roomUdn, payload.containerId);
-                    break;
+            const items = await rkHelper.browse(payload.objectId);
+            if (requestId === undefined) {
+                // Legacy clients match the reply on objectId
+                send(ws, { 
+                    type: 'browseResult', 
+                    payload: { 
+                        objectId: payload.objectId, 
+                        items: items 
+                    }     
+                });
+            }
+            return items;
+        }
 
-                case 'loadSingle':
-                    await rkHelper.loadSingle(payload.roomUdn, payload.itemId);
-                    break;
+        case 'loadContainer':
+            await rkHelper.loadContainer(payload.roomUdn, payload.containerId);
+            break;
 
-                case 'playSystemSound':
-                    await rkHelper.playSystemSound(payload.roomUdn, payload.soundId);
-                    break;
+        case 'loadSingle':
+            await rkHelper.loadSingle(payload.roomUdn, payload.itemId);
+            break;
 
-                case 'enterStandby':
-                    await rkHelper.enterStandby(payload.roomUdn);
-                    break;
+        case 'playSystemSound':
+            await rkHelper.playSystemSound(payload.roomUdn, payload.soundId);
+            break;
 
-                case 'enterEcoStandby':
-                    await rkHelper.enterEcoStandby(payload.roomUdn);
-                    break;
+        case 'enterStandby':
+            await rkHelper.enterStandby(payload.roomUdn);
+            break;
 
-                case 'reboot': {
-                    // payload: { roomUdn }
-                    const roomInfo = rkHelper.findRoom(payload.roomUdn);
-                    
-                    if (roomInfo && roomInfo.rendererUdn) {
-                        const deviceManager = rkHelper.raumkernel.managerDisposer.deviceManager;
-                        const renderer = deviceManager.getMediaRenderer(roomInfo.rendererUdn);
-                        
-                        if (renderer) {
-                            const host = renderer.host();
-                            console.log(`Rebooting device at ${host} (${roomInfo.name})`);
-                            try {
-                                const { exec } = await import('child_process');
-                                exec(`ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -o BatchMode=yes -o ConnectTimeout=5 root@${host} /sbin/reboot`, (error) => {
-                                    if (error) {
-                                        console.error(`Reboot failed for ${host}:`, error.message);
-                                        return;
-                                    }
-                                    console.log(`Reboot command sent to ${host}`);
-                                });
-                            } catch (err) {
-                                console.error(`Failed to execute reboot command:`, err.message);
+        case 'enterEcoStandby':
+            await rkHelper.enterEcoStandby(payload.roomUdn);
+            break;
+
+        case 'reboot': {
+            // payload: { roomUdn }
+            const roomInfo = rkHelper.findRoom(payload.roomUdn);
+            
+            if (roomInfo && roomInfo.rendererUdn) {
+                const deviceManager = rkHelper.raumkernel.managerDisposer.deviceManager;
+                const renderer = deviceManager.getMediaRenderer(roomInfo.rendererUdn);
+                
+                if (renderer) {
+                    const host = renderer.host();
+                    console.log(`Rebooting device at ${host} (${roomInfo.name})`);
+                    try {
+                        const { exec } = await import('child_process');
+                        exec(`ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -o BatchMode=yes -o ConnectTimeout=5 root@${host} /sbin/reboot`, (error) => {
+                            if (error) {
+                                console.error(`Reboot failed for ${host}:`, error.message);
+                                return;
                             }
-                        } else {
-                            console.warn(`Reboot failed: renderer not found for ${roomInfo.name}`);
-                        }
-                    } else {
-                        console.warn(`Reboot failed: room not found for UDN ${payload.roomUdn}`);
+                            console.log(`Reboot command sent to ${host}`);
+                        });
+                    } catch (err) {
+                        console.error(`Failed to execute reboot command:`, err.message);
                     }
-                    break;
+                } else {
+                    console.warn(`Reboot failed: renderer not found for ${roomInfo.name}`);
                 }
+            } else {
+                console.warn(`Reboot failed: room not found for UDN ${payload.roomUdn}`);
+            }
+            break;
+        }
 
-                case 'joinGroup':
-                    // payload: { roomUdn, zoneUdn }
-                    await rkHelper.joinGroup(payload.roomUdn, payload.zoneUdn);
-                    break;
-                    
-                case 'leaveGroup':
-                    // payload: { roomUdn }
-                    await rkHelper.leaveGroup(payload.roomUdn);
-                    break;
+        case 'joinGroup':
+            // payload: { roomUdn, zoneUdn }
+            await rkHelper.joinGroup(payload.roomUdn, payload.zoneUdn);
+            break;
+            
+        case 'leaveGroup':
+            // payload: { roomUdn }
+            await rkHelper.leaveGroup(payload.roomUdn);
+            break;
 
+        default:
+            throw new Error(`Unknown command: ${command}`);
+    }
 
+    return null;
+};
 
-                default:
-                    console.warn('Unknown command:', command);
-            }
+wss.on('connection', (ws, req) => {
+    const params = new URL(req.url ?? '/', 'http://localhost').searchParams;
+    ws.deltaUpdates = params.get('delta') === '1';
+    ws.codec = SUBPROTOCOL_CODECS[ws.protocol] ?? 'json';
+    ws.subscription = null;
+    ws.outbound = new OutboundQueue(ws, (types) => buildResyncFrames(ws, types), {
+        highWaterMark: CLIENT_HIGH_WATER_MARK,
+        maxQueueBytes: CLIENT_MAX_QUEUE_BYTES
+    });
+    ws.clientId = nextClientId++;
+    console.log(`Client ${ws.clientId} connected (${ws.deltaUpdates ? 'delta' : 'full'} state updates, ${ws.codec})`);
+    
+    // Delta clients reconnecting with `since` and `epoch` get only the deltas they
+    // missed, as long as the add-on hasn't restarted and still has them.
+    const since = Number.parseInt(params.get('since'), 10);
+    const canResume = ws.deltaUpdates && Number.isInteger(since) && params.get('epoch') === rkHelper.getStateEpoch();
+    const missedDeltas = canResume
+        ? rkHelper.getDeltasSince(since)
+        : null;
+
+    // Announce protocol features, then send initial state
+    send(ws, {
+        type: 'hello',
+        payload: {
+            features: PROTOCOL_FEATURES,
+            codec: ws.codec,
+            epoch: rkHelper.getStateEpoch(),
+            version: rkHelper.getStateVersion(),
+            stale: rkHelper.getState().stale,
+            resumed: missedDeltas !== null
+        }
+    });
+    if (missedDeltas) {
+        console.log(`Client ${ws.clientId} resumed from version ${since} (${missedDeltas.length} deltas)`);
+        missedDeltas.forEach(delta => send(ws, { type: 'stateDelta', payload: delta }));
+    } else {
+        sendFullState(ws);
+    }
+
+    ws.on('message', async (message, isBinary) => {
+        let requestId;
+        try {
+            const data = isBinary ? MessagePack.decode(message) : JSON.parse(message);
+            console.log('Received command:', data);
             
+            const { id, command, payload } = data;
+            requestId = id;
+
+            const result = await handleCommand(ws, command, payload ?? {}, requestId);
+            if (requestId !== undefined && ws.readyState === ws.OPEN) {
+                send(ws, { type: 'result', id: requestId, payload: result ?? null });
+            }
         } catch (error) {
             console.error('Error processing message:', error);
-            ws.send(JSON.stringify({ type: 'error', error: error.message }));
+            if (ws.readyState === ws.OPEN) {
+                send(ws, { type: 'error', id: requestId, error: error.message });
+            }
         }
     });
 });
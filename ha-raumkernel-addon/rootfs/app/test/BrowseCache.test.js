@@ -0,0 +1,99 @@
+import assert from 'node:assert/strict';
+import { describe, it } from 'node:test';
+import BrowseCache, { parseContainerUpdateIds } from '../BrowseCache.js';
+
+/** A load that resolves when the test says so */
+function deferredLoad(result) {
+    let resolve;
+    const promise = new Promise(r => { resolve = r; });
+    const load = () => promise;
+    load.resolve = () => resolve(result);
+    return load;
+}
+
+describe('BrowseCache', () => {
+    it('serves results until their TTL expires', async (t) => {
+        t.mock.timers.enable({ apis: ['Date'] });
+        const cache = new BrowseCache({ ttlFor: objectId => objectId === '0/Favorites' ? 1000 : 60000 });
+        let loads = 0;
+        const load = async () => ++loads;
+
+        assert.equal(await cache.fetch('0/Favorites', load), 1);
+        assert.equal(await cache.fetch('0/Favorites', load), 1);
+        t.mock.timers.tick(1000);
+        assert.equal(await cache.fetch('0/Favorites', load), 2);
+        assert.deepEqual(
+            [cache.getStats().hits, cache.getStats().misses, cache.getStats().expired], [1, 2, 1]);
+    });
+
+    it('evicts the least recently used container', async () => {
+        const cache = new BrowseCache({ maxEntries: 2 });
+
+        await cache.fetch('a', async () => 'a');
+        await cache.fetch('b', async () => 'b');
+        await cache.fetch('a', async () => 'reloaded');
+        await cache.fetch('c', async () => 'c');
+
+        assert.equal(await cache.fetch('a', async () => 'reloaded'), 'a');
+        assert.equal(await cache.fetch('b', async () => 'reloaded'), 'reloaded');
+    });
+
+    it('shares a running load between callers', async () => {
+        const cache = new BrowseCache();
+        const load = deferredLoad(['item']);
+
+        const first = cache.fetch('0/My Music', load);
+        const second = cache.fetch('0/My Music', () => assert.fail('loaded twice'));
+        load.resolve();
+
+        assert.equal(await first, await second);
+        assert.equal(cache.getStats().deduplicated, 1);
+        assert.equal(cache.getStats().inFlight, 0);
+    });
+
+    it('does not let loads that ran during an invalidation answer later callers', async () => {
+        const cache = new BrowseCache();
+        const stale = deferredLoad('old');
+        const fresh = deferredLoad('new');
+
+        const before = cache.fetch('0/Favorites', stale, '0-50');
+        cache.invalidate(['0/Favorites']);
+        const after = cache.fetch('0/Favorites', fresh, '0-50');
+
+        stale.resolve();
+        assert.equal(await before, 'old');
+        // The finished stale load must not remove the newer load
+        assert.equal(cache.getStats().inFlight, 1);
+        fresh.resolve();
+        assert.equal(await after, 'new');
+        assert.equal(await cache.fetch('0/Favorites', () => assert.fail('not cached'), '0-50'), 'new');
+    });
+
+    it('invalidates all pages of a container', async () => {
+        const cache = new BrowseCache();
+        await cache.fetch('0/Favorites', async () => 'first page', '0-50');
+        await cache.fetch('0/Favorites', async () => 'second page', '50-50');
+        await cache.fetch('0/My Music', async () => 'music');
+
+        cache.invalidate(['0/Favorites']);
+
+        assert.equal(cache.getStats().size, 1);
+        assert.equal(await cache.fetch('0/My Music', () => assert.fail('not cached')), 'music');
+    });
+
+    it('passes load failures to every caller without caching', async () => {
+        const cache = new BrowseCache();
+        const failing = () => Promise.reject(new Error('Browse failed'));
+
+        await assert.rejects(cache.fetch('0', failing), /Browse failed/);
+        assert.equal(await cache.fetch('0', async () => 'retried'), 'retried');
+    });
+});
+
+describe('parseContainerUpdateIds', () => {
+    it('lists the updated containers', () => {
+        assert.deepEqual(parseContainerUpdateIds('0/Favorites,12,0/Zones\\,Rooms,3'), ['0/Favorites', '0/Zones,Rooms']);
+        assert.deepEqual(parseContainerUpdateIds(''), []);
+        assert.deepEqual(parseContainerUpdateIds(undefined), []);
+    });
+});
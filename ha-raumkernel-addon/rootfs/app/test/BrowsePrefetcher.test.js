@@ -0,0 +1,120 @@
+import assert from 'node:assert/strict';
+import { describe, it } from 'node:test';
+import BrowsePrefetcher from '../BrowsePrefetcher.js';
+
+/** Lets settled loads run their callbacks; setImmediate is not mocked */
+const settle = () => new Promise(resolve => setImmediate(resolve));
+
+/** Prefetch requests recording which containers were loaded */
+function children(objectIds, loaded, items = 10) {
+    return objectIds.map(objectId => ({
+        objectId,
+        load: async () => {
+            loaded.push(objectId);
+            return Array.from({ length: items }, () => ({}));
+        }
+    }));
+}
+
+describe('BrowsePrefetcher', () => {
+    it('prefetches the first children after the delay', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout'] });
+        const prefetcher = new BrowsePrefetcher({ count: 2, delayMs: 100 });
+        const loaded = [];
+
+        prefetcher.prefetch(children(['a', 'b', 'c'], loaded));
+        assert.deepEqual(loaded, []);
+        t.mock.timers.tick(100);
+        await settle();
+        t.mock.timers.tick(100);
+        await settle();
+
+        assert.deepEqual(loaded, ['a', 'b']);
+        assert.equal(prefetcher.getStats().heldItems, 20);
+    });
+
+    it('waits for running client browses', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout'] });
+        const prefetcher = new BrowsePrefetcher({ count: 1, delayMs: 100 });
+        const loaded = [];
+        let finishBrowse;
+
+        const browse = prefetcher.runRequest('0', undefined, () => new Promise(resolve => { finishBrowse = resolve; }));
+        prefetcher.prefetch(children(['a'], loaded));
+        t.mock.timers.tick(100);
+        await settle();
+        assert.deepEqual(loaded, []);
+
+        finishBrowse([]);
+        await browse;
+        t.mock.timers.tick(100);
+        await settle();
+        assert.deepEqual(loaded, ['a']);
+    });
+
+    it('replaces children still waiting when another container is opened', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout'] });
+        const prefetcher = new BrowsePrefetcher({ count: 2, delayMs: 100 });
+        const loaded = [];
+
+        prefetcher.prefetch(children(['a', 'b'], loaded));
+        prefetcher.prefetch(children(['x'], loaded));
+        t.mock.timers.tick(100);
+        await settle();
+
+        assert.deepEqual(loaded, ['x']);
+        assert.equal(prefetcher.getStats().superseded, 2);
+    });
+
+    it('counts client browses of prefetched containers as hits and frees their budget', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout'] });
+        const prefetcher = new BrowsePrefetcher({ count: 1, delayMs: 0 });
+
+        prefetcher.prefetch(children(['a'], []));
+        t.mock.timers.tick(0);
+        await settle();
+        await prefetcher.runRequest('a', undefined, async () => []);
+        await prefetcher.runRequest('b', undefined, async () => []);
+
+        const stats = prefetcher.getStats();
+        assert.deepEqual([stats.hits, stats.misses, stats.heldItems], [1, 1, 0]);
+    });
+
+    it('stops prefetching while the budget is used up', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout'] });
+        const prefetcher = new BrowsePrefetcher({ count: 1, delayMs: 0, maxItems: 10 });
+        const loaded = [];
+
+        prefetcher.prefetch(children(['a'], loaded));
+        t.mock.timers.tick(0);
+        await settle();
+        prefetcher.prefetch(children(['b'], loaded));
+        t.mock.timers.tick(0);
+        await settle();
+
+        assert.deepEqual(loaded, ['a']);
+        assert.equal(prefetcher.getStats().skipped, 1);
+    });
+
+    it('forgets prefetched results once the browse cache dropped them', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout', 'Date'] });
+        const prefetcher = new BrowsePrefetcher({ count: 1, delayMs: 0, ttlFor: () => 1000 });
+
+        prefetcher.prefetch(children(['a'], []));
+        t.mock.timers.tick(0);
+        await settle();
+        t.mock.timers.tick(1000);
+        await prefetcher.runRequest('a', undefined, async () => []);
+
+        const stats = prefetcher.getStats();
+        assert.deepEqual([stats.unused, stats.hits, stats.misses, stats.heldItems], [1, 0, 1, 0]);
+    });
+
+    it('passes browses straight through when disabled', async () => {
+        const prefetcher = new BrowsePrefetcher({ count: 0 });
+
+        assert.equal(await prefetcher.runRequest('0', undefined, async () => 'items'), 'items');
+        prefetcher.prefetch(children(['a'], []));
+        assert.deepEqual([prefetcher.getStats().queued, prefetcher.getStats().misses], [0, 0]);
+    });
+});
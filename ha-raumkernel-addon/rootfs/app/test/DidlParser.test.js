@@ -0,0 +1,58 @@
+import assert from 'node:assert/strict';
+import { describe, it } from 'node:test';
+import { decodeEntities, parseDidl } from '../DidlParser.js';
+
+const didl = (body) =>
+    '<?xml version="1.0"?><DIDL-Lite xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/" ' +
+    `xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/">${body}</DIDL-Lite>`;
+
+describe('parseDidl', () => {
+    it('reads items and containers in document order', () => {
+        const objects = parseDidl(didl(
+            '<container id="0/My Music" parentID="0"><dc:title>My Music</dc:title>' +
+            '<upnp:class>object.container</upnp:class></container>' +
+            '<item id=\'0/Track 1\'><dc:title>Song</dc:title><upnp:artist>Band</upnp:artist>' +
+            '<res protocolInfo="http-get:*:audio/mpeg:*">http://host/track.mp3</res></item>'));
+
+        assert.deepEqual(objects, [
+            { type: 'container', id: '0/My Music', fields: { 'dc:title': 'My Music', 'upnp:class': 'object.container' } },
+            { type: 'item', id: '0/Track 1', fields: { 'dc:title': 'Song', 'upnp:artist': 'Band', res: 'http://host/track.mp3' } }
+        ]);
+    });
+
+    it('decodes entities, CDATA and attribute values with ">"', () => {
+        const [item] = parseDidl(didl(
+            '<item id="a&amp;b" extra="x > y"><dc:title>Rock &amp; Roll &#8211; &#x263A;</dc:title>' +
+            '<upnp:album><![CDATA[<Live>]]></upnp:album><!-- <dc:title>ignored</dc:title> --></item>'));
+
+        assert.equal(item.id, 'a&b');
+        assert.equal(item.fields['dc:title'], 'Rock & Roll – ☺');
+        assert.equal(item.fields['upnp:album'], '<Live>');
+    });
+
+    it('keeps the first occurrence and skips elements with children', () => {
+        const [item] = parseDidl(didl(
+            '<item id="1"><dc:title>First</dc:title><dc:title>Second</dc:title>' +
+            '<desc><nested>x</nested></desc><upnp:albumArtURI/></item>'));
+
+        assert.equal(item.fields['dc:title'], 'First');
+        assert.equal(item.fields.nested, 'x');
+        assert.equal('desc' in item.fields, false);
+        assert.equal(item.fields['upnp:albumArtURI'], '');
+    });
+
+    it('returns what it could read from malformed input', () => {
+        assert.deepEqual(parseDidl(''), []);
+        assert.deepEqual(parseDidl(null), []);
+        const objects = parseDidl(didl('<item id="1"><dc:title>Song</dc:title></item><item id="2"><dc:title>Cut'));
+        assert.deepEqual(objects.map(object => object.id), ['1']);
+    });
+});
+
+describe('decodeEntities', () => {
+    it('leaves unknown and invalid references alone', () => {
+        assert.equal(decodeEntities('a &nbsp; b'), 'a &nbsp; b');
+        assert.equal(decodeEntities('&#x110000;'), '&#x110000;');
+        assert.equal(decodeEntities('&lt;&gt;&quot;&apos;'), '<>"\'');
+    });
+});
@@ -0,0 +1,57 @@
+import assert from 'node:assert/strict';
+import { describe, it } from 'node:test';
+import { decode, encode, Raw } from '../MessagePack.js';
+
+const hex = (value) => encode(value).toString('hex');
+
+describe('MessagePack', () => {
+    it('uses the smallest integer format', () => {
+        assert.equal(hex(5), '05');
+        assert.equal(hex(-3), 'fd');
+        assert.equal(hex(200), 'ccc8');
+        assert.equal(hex(1000), 'cd03e8');
+        assert.equal(hex(100000), 'ce000186a0');
+        assert.equal(hex(-100), 'd09c');
+        assert.equal(hex(-1000), 'd1fc18');
+    });
+
+    it('encodes maps, arrays and strings like the reference format', () => {
+        assert.equal(hex({ a: 1, b: [true, null] }), '82a16101a16292c3c0');
+        assert.equal(hex(1.5), 'cb3ff8000000000000');
+    });
+
+    it('skips undefined and function properties like JSON', () => {
+        assert.deepEqual(decode(encode({ a: 1, b: undefined, c: () => {} })), { a: 1 });
+        assert.deepEqual(decode(encode([undefined])), [null]);
+    });
+
+    it('round-trips values of every size class', () => {
+        const values = [
+            0, 127, 128, 255, 256, 65535, 65536, 2 ** 32, Number.MAX_SAFE_INTEGER,
+            -32, -33, -128, -129, -32768, -32769, -(2 ** 31), -(2 ** 31) - 1,
+            0.25, -1e100, '', 'ä€😀', 'x'.repeat(31), 'x'.repeat(32), 'x'.repeat(256), 'x'.repeat(70000),
+            [], Array.from({ length: 16 }, (_, i) => i), Array.from({ length: 70000 }, () => 1),
+            {}, Object.fromEntries(Array.from({ length: 20 }, (_, i) => [`k${i}`, i])),
+            { nested: { list: [{ title: 'Song', volume: 20 }], flag: false } }
+        ];
+        for (const value of values) {
+            assert.deepEqual(decode(encode(value)), value);
+        }
+    });
+
+    it('decodes binary and float32 values written by other encoders', () => {
+        assert.deepEqual(decode(Buffer.from('c403010203', 'hex')), Buffer.from([1, 2, 3]));
+        assert.equal(decode(Buffer.from('ca3fc00000', 'hex')), 1.5);
+    });
+
+    it('rejects unsupported types', () => {
+        assert.throws(() => decode(Buffer.from([0xc1])), /Unsupported MessagePack type 0xc1/);
+    });
+});
+
+describe('MessagePack Raw', () => {
+    it('splices encoded fragments into a message', () => {
+        const fragment = new Raw(encode({ rooms: [1, 2] }));
+        assert.deepEqual(decode(encode({ type: 'zones', payload: fragment })), { type: 'zones', payload: { rooms: [1, 2] } });
+    });
+});
@@ -0,0 +1,125 @@
+import assert from 'node:assert/strict';
+import { describe, it } from 'node:test';
+import OutboundQueue from '../OutboundQueue.js';
+
+/** Socket whose writes complete only when the test calls `flush` */
+class FakeSocket {
+    constructor() {
+        this.bufferedAmount = 0;
+        this.sent = [];
+        this.terminated = false;
+        this._callbacks = [];
+    }
+
+    send(frame, callback) {
+        this.sent.push(frame);
+        this._callbacks.push(callback);
+    }
+
+    flush(error) {
+        const callbacks = this._callbacks;
+        this._callbacks = [];
+        callbacks.forEach(callback => callback(error));
+    }
+
+    terminate() {
+        this.terminated = true;
+    }
+}
+
+const frame = (text, bytes = 10) => text.padEnd(bytes, '.');
+
+describe('OutboundQueue', () => {
+    it('writes directly while the client keeps up', () => {
+        const ws = new FakeSocket();
+        const queue = new OutboundQueue(ws, () => [], { highWaterMark: 100 });
+
+        queue.send(frame('a'));
+        ws.flush();
+        queue.send(frame('b'));
+
+        assert.deepEqual(ws.sent, [frame('a'), frame('b')]);
+        assert.equal(queue.getStats().queuedMessages, 0);
+    });
+
+    it('queues frames above the high water mark and sends them in order', () => {
+        const ws = new FakeSocket();
+        const queue = new OutboundQueue(ws, () => [], { highWaterMark: 15 });
+
+        queue.send(frame('a', 20));
+        queue.send(frame('b'));
+        queue.send(frame('c'));
+        assert.deepEqual(ws.sent, [frame('a', 20)]);
+        assert.equal(queue.isCongested, true);
+
+        ws.flush();
+        assert.deepEqual(ws.sent, [frame('a', 20), frame('b'), frame('c')]);
+    });
+
+    it('replaces superseded state messages with one resync', () => {
+        const ws = new FakeSocket();
+        const resyncs = [];
+        const queue = new OutboundQueue(ws, (types) => {
+            resyncs.push([...types].sort());
+            return ['snapshot', null];
+        }, { highWaterMark: 15 });
+
+        queue.send(frame('a', 20));
+        queue.supersedeState('stateDelta');
+        queue.send(frame('reply'));
+        queue.supersedeState('stateDelta');
+        queue.supersedeState('zoneStateChanged');
+        ws.flush();
+
+        assert.deepEqual(resyncs, [['stateDelta', 'zoneStateChanged']]);
+        assert.deepEqual(ws.sent, [frame('a', 20), 'snapshot', frame('reply')]);
+        assert.equal(queue.getStats().supersededStates, 3);
+        assert.equal(queue.getStats().statePending, false);
+    });
+
+    it('terminates clients whose queue grows too large', () => {
+        const ws = new FakeSocket();
+        const queue = new OutboundQueue(ws, () => [], { highWaterMark: 15, maxQueueBytes: 25 });
+
+        queue.send(frame('a', 20));
+        queue.send(frame('b'));
+        queue.send(frame('c'));
+        assert.equal(ws.terminated, false);
+        queue.send(frame('d'));
+        assert.equal(ws.terminated, true);
+    });
+});
+
+describe('OutboundQueue.whenDrained', () => {
+    it('resolves right away if the client keeps up', async () => {
+        const queue = new OutboundQueue(new FakeSocket(), () => [], { highWaterMark: 100 });
+        await queue.whenDrained();
+    });
+
+    it('resolves once the queue drained', async () => {
+        const ws = new FakeSocket();
+        const queue = new OutboundQueue(ws, () => [], { highWaterMark: 15 });
+        queue.send(frame('a', 20));
+        queue.send(frame('b'));
+
+        let drained = false;
+        const done = queue.whenDrained().then(() => { drained = true; });
+        await Promise.resolve();
+        assert.equal(drained, false);
+
+        ws.flush();
+        ws.flush();
+        await done;
+        assert.equal(drained, true);
+    });
+
+    it('resolves when a write fails', async () => {
+        const ws = new FakeSocket();
+        const queue = new OutboundQueue(ws, () => [], { highWaterMark: 15 });
+        queue.send(frame('a', 20));
+
+        const done = queue.whenDrained();
+        ws.flush(new Error('closed'));
+        await done;
+    });
+});
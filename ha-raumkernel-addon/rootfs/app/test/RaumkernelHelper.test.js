@@ -0,0 +1,226 @@
+import assert from 'node:assert/strict';
+import fs from 'fs';
+import path from 'path';
+import { describe, it } from 'node:test';
+import { createHelper, createTempDir } from './fakes.js';
+
+const room = (udn, fields = {}) => ({
+    udn,
+    name: udn,
+    zoneUdn: null,
+    nowPlaying: { title: '', volume: 20, isPlaying: false },
+    ...fields
+});
+
+describe('state deltas', () => {
+    it('sends new rooms in full', () => {
+        const helper = createHelper();
+        const kitchen = room('kitchen');
+
+        const delta = helper._diffRoomStates([], [kitchen]);
+
+        assert.equal(delta.baseVersion, 0);
+        assert.equal(delta.version, 1);
+        assert.deepEqual(delta.rooms, { kitchen });
+        assert.deepEqual(delta.removed, []);
+        assert.equal(helper.getStateVersion(), 1);
+    });
+
+    it('sends only changed fields, descending into nowPlaying', () => {
+        const helper = createHelper();
+        const before = room('kitchen');
+        const after = room('kitchen', { zoneUdn: 'zone-1', nowPlaying: { ...before.nowPlaying, volume: 30 } });
+
+        const delta = helper._diffRoomStates([before], [after]);
+
+        assert.deepEqual(delta.rooms, { kitchen: { zoneUdn: 'zone-1', nowPlaying: { volume: 30 } } });
+    });
+
+    it('reports removed fields as null and removed rooms by UDN', () => {
+        const helper = createHelper();
+        const before = [room('kitchen', { zoneName: 'Downstairs' }), room('bath')];
+
+        const delta = helper._diffRoomStates(before, [room('kitchen')]);
+
+        assert.deepEqual(delta.rooms, { kitchen: { zoneName: null } });
+        assert.deepEqual(delta.removed, ['bath']);
+    });
+
+    it('returns null and keeps the version if nothing changed', () => {
+        const helper = createHelper();
+
+        assert.equal(helper._diffRoomStates([room('kitchen')], [room('kitchen')]), null);
+        assert.equal(helper.getStateVersion(), 0);
+    });
+
+    it('chains versions', () => {
+        const helper = createHelper();
+        const first = helper._diffRoomStates([], [room('kitchen')]);
+        const second = helper._diffRoomStates([room('kitchen')], [room('kitchen', { name: 'Kitchen' })]);
+
+        assert.equal(second.baseVersion, first.version);
+        assert.equal(second.version, 2);
+    });
+});
+
+describe('capability detection', () => {
+    const identity = { model: 'Soundbar', version: '1.0' };
+    const upnpError = (message, fields) => Object.assign(new Error(message), fields);
+
+    /** Physical renderer answering every UPnP call with `answer(action)` */
+    const renderer = (answer) => ({
+        upnpClient: {
+            deviceDescription: { modelName: identity.model, softwareVersion: identity.version },
+            callAction: (service, action, args, callback) => {
+                const result = answer(action);
+                if (result instanceof Error) callback(result);
+                else callback(null, result);
+            }
+        }
+    });
+
+    it('caches devices that reject the probes', async () => {
+        const helper = createHelper();
+        const rejection = upnpError('Invalid Name', { code: 'EUPNP', statusCode: 500, errorCode: '800' });
+
+        await helper._detectCapabilities('renderer-1', renderer(() => rejection));
+
+        const cached = helper._capabilityCache.get('renderer-1', identity);
+        assert.deepEqual({ sourceSelect: cached.sourceSelect, lineIn: cached.lineIn }, { sourceSelect: false, lineIn: false });
+        assert.equal(helper._roomCapabilities.get('renderer-1'), false);
+    });
+
+    it('probes again instead of caching a probe that got no answer', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout'] });
+        const helper = createHelper();
+        let answer = upnpError('Timed out', { code: 'ETIMEDOUT' });
+        const soundbar = renderer(() => answer);
+        helper.raumkernel.managerDisposer.deviceManager = { mediaRenderers: new Map([['renderer-1', soundbar]]) };
+        helper._rooms.set('renderer-1', { name: 'Living room', roomUdn: 'room-1', rendererUdn: 'renderer-1' });
+
+        await helper._detectCapabilities('renderer-1', soundbar);
+
+        assert.equal(helper._capabilityCache.get('renderer-1', identity), undefined);
+        assert.equal(helper._roomCapabilities.has('renderer-1'), false);
+
+        answer = { Value: 'HDMI' };
+        t.mock.timers.tick(30 * 1000);
+        await helper._capabilityDetections.get('renderer-1');
+
+        assert.equal(helper._capabilityCache.get('renderer-1', identity).sourceSelect, true);
+        assert.equal(helper._rooms.get('renderer-1').sourceSwitchingSupported, true);
+    });
+});
+
+describe('warm start', () => {
+    const zone = { name: 'Downstairs', members: ['room-1', 'room-2'] };
+
+    /** Writes a snapshot with both rooms in the zone, as saved by the previous run */
+    const writeSnapshot = () => {
+        const snapshotPath = path.join(createTempDir(), 'state.json');
+        const rooms = zone.members.map((roomUdn, index) => ({
+            name: `Room ${index + 1}`,
+            udn: roomUdn,
+            roomUdn,
+            rendererUdn: `renderer-${index + 1}`,
+            zoneUdn: 'zone-1',
+            zoneName: zone.name,
+            zoneMembers: zone.members
+        }));
+        fs.writeFileSync(snapshotPath, JSON.stringify({
+            version: 1, savedAt: Date.now(), rooms, zones: { 'zone-1': zone }
+        }));
+        return snapshotPath;
+    };
+
+    /** Renderers and zones as node-raumkernel reports them on systemReady */
+    const discover = (helper) => {
+        const renderers = zone.members.map((roomUdn, index) => [`renderer-${index + 1}`, {
+            roomName: () => `Room ${index + 1}`,
+            roomUdn: () => roomUdn,
+            rendererState: {}
+        }]);
+        helper.raumkernel.managerDisposer.deviceManager = {
+            mediaRenderers: new Map(renderers),
+            mediaRenderersVirtual: new Map()
+        };
+        helper.raumkernel.managerDisposer.zoneManager = {
+            zoneState: {
+                zones: [{ isZone: true, udn: 'zone-1', name: zone.name, rooms: zone.members.map(udn => ({ udn })) }]
+            }
+        };
+    };
+
+    it('serves the restored rooms as stale', () => {
+        const helper = createHelper({ stateSnapshotPath: writeSnapshot() });
+
+        assert.equal(helper._state.stale, true);
+        assert.deepEqual(helper._state.availableRooms.map(room => room.zoneUdn), ['zone-1', 'zone-1']);
+        assert.equal(helper._state.availableRooms[0].isPlaying, false);
+    });
+
+    it('gives live rooms the zones of an unchanged topology', (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout', 'setInterval'] });
+        const helper = createHelper({ stateSnapshotPath: writeSnapshot() });
+        const published = [];
+        helper.on('stateDelta', () => published.push(helper._state.availableRooms));
+        discover(helper);
+
+        helper.raumkernel.emit('systemReady', true);
+        helper._sourcePoller.stop();
+
+        assert.equal(helper._state.stale, false);
+        assert.notEqual(published.length, 0);
+        for (const rooms of published) {
+            assert.deepEqual(rooms.map(room => [room.udn, room.zoneUdn, room.zoneMembers]), [
+                ['room-1', 'zone-1', zone.members],
+                ['room-2', 'zone-1', zone.members]
+            ]);
+        }
+    });
+});
+
+describe('browse paging', () => {
+    /** Media server answering Browse with the given number of children and TotalMatches */
+    const mediaServer = (returned, totalMatches) => ({
+        upnpClient: {
+            callAction: (service, action, args, callback) => callback(null, {
+                Result: '<DIDL-Lite>' + '<item id="track"><dc:title>Track</dc:title></item>'.repeat(returned) + '</DIDL-Lite>',
+                TotalMatches: String(totalMatches)
+            })
+        }
+    });
+
+    it('reports more children after a full page of unknown total', async () => {
+        const page = await createHelper()._requestBrowsePage(mediaServer(50, 0), '0/My Music', 100, 50);
+
+        assert.equal(page.items.length, 50);
+        assert.equal(page.totalMatches, 150);
+        assert.equal(page.hasMore, true);
+    });
+
+    it('ends at a short page of unknown total', async () => {
+        const page = await createHelper()._requestBrowsePage(mediaServer(20, 0), '0/My Music', 100, 50);
+
+        assert.equal(page.totalMatches, 120);
+        assert.equal(page.hasMore, false);
+    });
+
+    it('follows the reported total', async () => {
+        const helper = createHelper();
+
+        assert.equal((await helper._requestBrowsePage(mediaServer(50, 150), '0', 50, 50)).hasMore, true);
+        assert.equal((await helper._requestBrowsePage(mediaServer(50, 150), '0', 100, 50)).hasMore, false);
+    });
+
+    it('slices containers of media servers without an accessible UPnP client', async () => {
+        const helper = createHelper();
+        const server = { browse: async () => '' };
+        helper._parseBrowseResponse = () => Array.from({ length: 5 }, (_, i) => ({ id: `item-${i}` }));
+
+        const page = await helper._requestBrowsePage(server, '0', 2, 2);
+        assert.deepEqual(page.items.map(item => item.id), ['item-2', 'item-3']);
+        assert.equal(page.hasMore, true);
+        assert.equal((await helper._requestBrowsePage(server, '0', 3, 2)).hasMore, false);
+    });
+});
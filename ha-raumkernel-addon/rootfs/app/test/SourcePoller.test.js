@@ -0,0 +1,109 @@
+import assert from 'node:assert/strict';
+import { setTimeout as sleep } from 'node:timers/promises';
+import { describe, it } from 'node:test';
+import SourcePoller from '../SourcePoller.js';
+
+const settle = () => sleep(5);
+
+const createPoller = (handlers, options) => new SourcePoller({
+    getKeys: () => ['soundbar'],
+    poll: async () => 'HDMI',
+    apply: () => false,
+    ...handlers
+}, { minIntervalMs: 1000, maxIntervalMs: 4000, ...options });
+
+describe('SourcePoller', () => {
+    it('polls new devices right away and backs off while the value is stable', async () => {
+        let polls = 0;
+        const poller = createPoller({ poll: async () => { polls += 1; return 'HDMI'; } });
+
+        poller._tick();
+        await settle();
+        assert.equal(polls, 1);
+        assert.equal(poller.getStats().maxCurrentIntervalMs, 2000);
+
+        // Not due again yet
+        poller._tick();
+        await settle();
+        assert.equal(polls, 1);
+
+        poller._devices.get('soundbar').dueAt = 0;
+        poller._tick();
+        await settle();
+        poller._devices.get('soundbar').dueAt = 0;
+        poller._tick();
+        await settle();
+        assert.equal(poller.getStats().maxCurrentIntervalMs, 4000);
+    });
+
+    it('returns to the shortest interval after a change or tighten', async () => {
+        let changed = false;
+        const poller = createPoller({ apply: () => changed });
+
+        poller._tick();
+        await settle();
+        assert.equal(poller.getStats().maxCurrentIntervalMs, 2000);
+
+        poller.tighten('soundbar', { immediate: true });
+        changed = true;
+        poller._tick();
+        await settle();
+        const stats = poller.getStats();
+        assert.equal(stats.polls, 2);
+        assert.equal(stats.changes, 1);
+        assert.equal(stats.maxCurrentIntervalMs, 1000);
+    });
+
+    it('polls again after a tighten that arrived during a poll', async () => {
+        let release;
+        const poller = createPoller({ poll: () => new Promise(resolve => { release = resolve; }) });
+
+        poller._tick();
+        await settle();
+        poller.tighten('soundbar');
+        release('HDMI');
+        await settle();
+
+        const device = poller._devices.get('soundbar');
+        assert.equal(device.intervalMs, 1000);
+        assert.ok(device.dueAt <= Date.now());
+    });
+
+    it('counts failures and timeouts, which back off like a stable value', async () => {
+        const failing = createPoller({ poll: async () => { throw new Error('socket hang up'); } });
+        failing._tick();
+        await settle();
+        assert.equal(failing.getStats().failures, 1);
+        assert.equal(failing.getStats().maxCurrentIntervalMs, 2000);
+
+        const hanging = createPoller({ poll: () => new Promise(() => {}) }, { timeoutMs: 1 });
+        hanging._tick();
+        await settle();
+        assert.equal(hanging.getStats().timeouts, 1);
+    });
+
+    it('limits concurrent polls and forgets devices that are gone', async () => {
+        let keys = ['a', 'b', 'c'];
+        let running = 0;
+        let maxRunning = 0;
+        const poller = createPoller({
+            getKeys: () => keys,
+            poll: async () => {
+                running += 1;
+                maxRunning = Math.max(maxRunning, running);
+                await sleep(1);
+                running -= 1;
+                return 'HDMI';
+            }
+        }, { concurrency: 2 });
+
+        poller._tick();
+        await sleep(20);
+        assert.equal(poller.getStats().polls, 3);
+        assert.equal(maxRunning, 2);
+
+        keys = ['a'];
+        poller._tick();
+        assert.equal(poller.getStats().devices, 1);
+    });
+});
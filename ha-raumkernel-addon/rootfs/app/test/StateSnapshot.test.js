@@ -0,0 +1,55 @@
+import assert from 'node:assert/strict';
+import fs from 'fs';
+import path from 'path';
+import { describe, it } from 'node:test';
+import StateSnapshot from '../StateSnapshot.js';
+import { createTempDir } from './fakes.js';
+
+const kitchen = {
+    name: 'Kitchen',
+    udn: 'room-1',
+    zoneUdn: 'zone-1',
+    sourceSwitchingSupported: true,
+    isPlaying: true,
+    nowPlaying: { track: 'Song' }
+};
+
+const topology = new Map([['zone-1', { name: 'Kitchen', members: ['room-1'] }]]);
+
+describe('StateSnapshot', () => {
+    it('restores saved rooms and zones without playback state', async (t) => {
+        t.mock.timers.enable({ apis: ['setTimeout'] });
+        const filePath = path.join(createTempDir(), 'state.json');
+        const snapshot = new StateSnapshot(filePath, { writeDelayMs: 100 });
+
+        snapshot.save([kitchen], topology);
+        assert.equal(fs.existsSync(filePath), false);
+        t.mock.timers.tick(100);
+        // The write itself goes through fs promises
+        while (snapshot.getStats().writes === 0) await new Promise(resolve => setImmediate(resolve));
+
+        const restored = new StateSnapshot(filePath).load();
+        assert.deepEqual(restored.rooms, [
+            { name: 'Kitchen', udn: 'room-1', zoneUdn: 'zone-1', sourceSwitchingSupported: true }
+        ]);
+        assert.deepEqual(restored.zoneTopology, topology);
+    });
+
+    it('discards missing, empty and outdated snapshots', () => {
+        const dir = createTempDir();
+        const write = (name, data) => {
+            fs.writeFileSync(path.join(dir, name), JSON.stringify(data));
+            return new StateSnapshot(path.join(dir, name)).load();
+        };
+
+        assert.equal(new StateSnapshot(path.join(dir, 'missing.json')).load(), undefined);
+        assert.equal(write('empty.json', { version: 1, rooms: [], zones: {} }), undefined);
+        assert.equal(write('old.json', { version: 0, rooms: [kitchen], zones: {} }), undefined);
+    });
+
+    it('tells deltas that change more than playback', () => {
+        assert.equal(StateSnapshot.affects({ rooms: { 'room-1': { nowPlaying: { track: 'Other' } } }, removed: [] }), false);
+        assert.equal(StateSnapshot.affects({ rooms: { 'room-1': { isPlaying: false, zoneUdn: null } }, removed: [] }), true);
+        assert.equal(StateSnapshot.affects({ rooms: {}, removed: ['room-1'] }), true);
+    });
+});
@@ -0,0 +1,62 @@
+import assert from 'node:assert/strict';
+import { describe, it } from 'node:test';
+import { buildZoneTopology, changedZones, diffZoneTopology } from '../ZoneTopology.js';
+
+const topology = (zones) => new Map(Object.entries(zones).map(([udn, [name, members]]) => [udn, { name, members }]));
+
+describe('buildZoneTopology', () => {
+    it('keeps zones with their members in host order and skips unassigned rooms', () => {
+        const zones = [
+            { isZone: true, udn: 'zone-1', name: 'Kitchen, Bath', rooms: [{ udn: 'kitchen' }, { udn: 'bath' }] },
+            { isZone: false, udn: 'office', name: 'Office' },
+            { isZone: true, udn: 'zone-2', name: 'Garden' }
+        ];
+
+        assert.deepEqual(buildZoneTopology(zones), topology({
+            'zone-1': ['Kitchen, Bath', ['kitchen', 'bath']],
+            'zone-2': ['Garden', []]
+        }));
+        assert.deepEqual(buildZoneTopology(undefined), new Map());
+    });
+});
+
+describe('diffZoneTopology', () => {
+    it('reports created, removed and renamed zones and moved rooms', () => {
+        const before = topology({ 'zone-1': ['Kitchen', ['kitchen', 'bath']], 'zone-2': ['Office', ['office']] });
+        const after = topology({ 'zone-1': ['Kitchen, Garden', ['kitchen', 'garden']], 'zone-3': ['Bath', ['bath']] });
+
+        assert.deepEqual(diffZoneTopology(before, after), [
+            { type: 'zoneRenamed', zoneUdn: 'zone-1', name: 'Kitchen, Garden' },
+            { type: 'roomJoined', zoneUdn: 'zone-1', roomUdn: 'garden' },
+            { type: 'zoneCreated', zoneUdn: 'zone-3', name: 'Bath' },
+            { type: 'roomJoined', zoneUdn: 'zone-3', roomUdn: 'bath' },
+            { type: 'roomLeft', zoneUdn: 'zone-1', roomUdn: 'bath' },
+            { type: 'roomLeft', zoneUdn: 'zone-2', roomUdn: 'office' },
+            { type: 'zoneRemoved', zoneUdn: 'zone-2' }
+        ]);
+    });
+
+    it('reports nothing for an unchanged topology', () => {
+        const zones = topology({ 'zone-1': ['Kitchen', ['kitchen', 'bath']] });
+        assert.deepEqual(diffZoneTopology(zones, topology({ 'zone-1': ['Kitchen', ['kitchen', 'bath']] })), []);
+    });
+});
+
+describe('changedZones', () => {
+    it('includes reordered, renamed, new and removed zones only', () => {
+        const before = topology({
+            same: ['Same', ['a']],
+            reordered: ['Reordered', ['b', 'c']],
+            renamed: ['Old', ['d']],
+            removed: ['Removed', ['e']]
+        });
+        const after = topology({
+            same: ['Same', ['a']],
+            reordered: ['Reordered', ['c', 'b']],
+            renamed: ['New', ['d']],
+            created: ['Created', ['f']]
+        });
+
+        assert.deepEqual([...changedZones(before, after)].sort(), ['created', 'removed', 'renamed', 'reordered']);
+    });
+});
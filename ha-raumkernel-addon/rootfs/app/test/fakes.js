@@ -0,0 +1,50 @@
+/**
+ * Stand-ins for node-raumkernel, so RaumkernelHelper can be tested without a
+ * Raumfeld system
+ */
+
+import { EventEmitter } from 'events';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import RaumkernelHelper from '../RaumkernelHelper.js';
+
+/**
+ * Emits the node-raumkernel events tests trigger; managers are set by the tests
+ */
+export class FakeRaumkernel extends EventEmitter {
+    constructor() {
+        super();
+        this.settings = { raumfeldHost: '0.0.0.0' };
+        this.logger = new EventEmitter();
+        this.managerDisposer = { deviceManager: null, zoneManager: null };
+    }
+
+    createLogger() {}
+
+    getSettings() {
+        return this.settings;
+    }
+
+    init() {}
+}
+
+/**
+ * @returns {string} A new empty directory
+ */
+export function createTempDir() {
+    return fs.mkdtempSync(path.join(os.tmpdir(), 'raumkernel-test-'));
+}
+
+/**
+ * @param {Object} [options] - RaumkernelHelper options; files go to a temporary directory
+ * @returns {RaumkernelHelper}
+ */
+export function createHelper(options = {}) {
+    const dir = createTempDir();
+    return new RaumkernelHelper({
+        raumkernel: new FakeRaumkernel(),
+        capabilityCachePath: path.join(dir, 'capabilities.json'),
+        ...options
+    });
+}
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
@@ -11,8 +10,10 @@ from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from . import RaumfeldData
 from .api import RaumfeldApiClient
 from .const import DOMAIN
+from .room_store import RoomView
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,40 +24,17 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Raumfeld button."""
-    client: RaumfeldApiClient = hass.data[DOMAIN][entry.entry_id]
-
-    known_udns = set()
+    data: RaumfeldData = hass.data[DOMAIN][entry.entry_id]
 
     @callback
-    def handle_message(data: dict[str, Any]) -> None:
-        if data.get("type") in ("zones", "zoneStateChanged"):
-            rooms = data.get("payload", [])
-            new_entities = []
-            for room in rooms:
-                if room["udn"] not in known_udns:
-                    known_udns.add(room["udn"])
-                    new_entities.append(RaumfeldRebootButton(client, room))
-                    new_entities.append(RaumfeldEcoModeButton(client, room))
-
-            if new_entities:
-                async_add_entities(new_entities)
-
-        elif data.get("type") == "fullStateUpdate":
-            rooms = data.get("payload", {}).get("availableRooms", [])
-            new_entities = []
-            for room in rooms:
-                if room["udn"] not in known_udns:
-                    known_udns.add(room["udn"])
-                    new_entities.append(RaumfeldRebootButton(client, room))
-                    new_entities.append(RaumfeldEcoModeButton(client, room))
-            if new_entities:
-                async_add_entities(new_entities)
-
-    client.register_listener(handle_message)
-
-    # Trigger initial fetch if already connected
-    if client.connected:
-        hass.async_create_task(client.get_zones())
+    def add_new_rooms(rooms: list[RoomView]) -> None:
+        async_add_entities(
+            entity_class(data.client, room)
+            for room in rooms
+            for entity_class in (RaumfeldRebootButton, RaumfeldEcoModeButton)
+        )
+
+    entry.async_on_unload(data.rooms.async_add_new_rooms_listener(add_new_rooms))
 
 
 class RaumfeldRebootButton(ButtonEntity):
@@ -66,15 +44,15 @@ class RaumfeldRebootButton(ButtonEntity):
     _attr_icon = "mdi:restart"
     _attr_has_entity_name = True
 
-    def __init__(self, client: RaumfeldApiClient, room_data: dict[str, Any]) -> None:
+    def __init__(self, client: RaumfeldApiClient, room: RoomView) -> None:
         """Initialize the button."""
         self._client = client
-        self._room_udn = room_data["udn"]
+        self._room_udn = room.udn
         self._attr_name = "Reboot"
         self._attr_unique_id = f"{self._room_udn}_reboot"
         self._attr_device_info = {
             "identifiers": {(DOMAIN, self._room_udn)},
-            "name": room_data.get("name"),
+            "name": room.name,
             "manufacturer": "Teufel",
             "model": "Raumfeld Room",
         }
@@ -91,15 +69,15 @@ class RaumfeldEcoModeButton(ButtonEntity):
     _attr_icon = "mdi:leaf"
     _attr_has_entity_name = True
 
-    def __init__(self, client: RaumfeldApiClient, room_data: dict[str, Any]) -> None:
+    def __init__(self, client: RaumfeldApiClient, room: RoomView) -> None:
         """Initialize the button."""
         self._client = client
-        self._room_udn = room_data["udn"]
+        self._room_udn = room.udn
         self._attr_name = "Eco mode"
         self._attr_unique_id = f"{self._room_udn}_eco_mode"
         self._attr_device_info = {
             "identifiers": {(DOMAIN, self._room_udn)},
-            "name": room_data.get("name"),
+            "name": room.name,
             "manufacturer": "Teufel",
             "model": "Raumfeld Room",
         }
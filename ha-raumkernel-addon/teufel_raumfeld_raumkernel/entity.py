@@ -0,0 +1,60 @@
+"""Base entity for Teufel Raumfeld rooms."""
+
+from __future__ import annotations
+
+from collections.abc import Hashable
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+
+from .api import RaumfeldApiClient
+from .room_store import RaumfeldRoomStore, RoomView
+
+
+class RaumfeldRoomEntity(Entity):
+    """Entity that mirrors the state of one room.
+
+    Room updates carry every field of the room, most of which an entity does not
+    expose (e.g. the playback position for a power sensor). The entity state is
+    only written when the fingerprint of what the entity exposes changed.
+    """
+
+    def __init__(
+        self, client: RaumfeldApiClient, rooms: RaumfeldRoomStore, room: RoomView
+    ) -> None:
+        """Initialize."""
+        self._client = client
+        self._rooms = rooms
+        self._udn = room.udn
+        self._written_fingerprint: Hashable | None = None
+        self.update_state(room)
+
+    async def async_added_to_hass(self) -> None:
+        """Run when this Entity has been added to HA."""
+        # HA writes the initial state right after this
+        self._written_fingerprint = self.state_fingerprint()
+        self.async_on_remove(
+            self._rooms.async_add_room_listener(self._udn, self._handle_room_update)
+        )
+
+    @callback
+    def _handle_room_update(self, room: RoomView) -> None:
+        """Handle a state change of this entity's room."""
+        self.update_state(room)
+
+        fingerprint = self.state_fingerprint()
+        if fingerprint == self._written_fingerprint:
+            self._rooms.record_entity_write(suppressed=True)
+            return
+
+        self._written_fingerprint = fingerprint
+        self._rooms.record_entity_write(suppressed=False)
+        self.async_write_ha_state()
+
+    def update_state(self, room: RoomView) -> None:
+        """Update state from data. Implemented by subclasses."""
+        raise NotImplementedError
+
+    def state_fingerprint(self) -> Hashable:
+        """Return the values this entity exposes. Implemented by subclasses."""
+        raise NotImplementedError
@@ -0,0 +1,200 @@
+"""Shared room store for the Teufel Raumfeld platforms."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeassistant.core import callback
+
+from .api import RaumfeldApiClient
+
+_LOGGER = logging.getLogger(__name__)
+
+NewRoomsListener = Callable[[list["RoomView"]], None]
+RoomViewListener = Callable[["RoomView"], None]
+
+
+class RoomView:
+    """Typed, read-only view of a room in the client's room mirror.
+
+    Views only wrap the mirrored dict, so handing one out per update costs
+    nothing. Entities get a fresh view with every update and should not keep it.
+    """
+
+    __slots__ = ("_data", "_stale")
+
+    def __init__(self, data: dict[str, Any], stale: bool = False) -> None:
+        """Initialize."""
+        self._data = data
+        self._stale = stale
+
+    @property
+    def udn(self) -> str:
+        """Return the room UDN."""
+        return self._data["udn"]
+
+    @property
+    def stale(self) -> bool:
+        """Return True if the room was restored by the add-on and not updated yet.
+
+        The add-on can't reach the room and doesn't know its playback state yet.
+        """
+        return self._stale
+
+    @property
+    def name(self) -> str | None:
+        """Return the room name."""
+        return self._data.get("name")
+
+    @property
+    def zone_udn(self) -> str | None:
+        """Return the UDN of the zone the room belongs to, if any."""
+        return self._data.get("currentZoneUdn")
+
+    @property
+    def zone_name(self) -> str | None:
+        """Return the name of the room's zone."""
+        return self._data.get("zoneName")
+
+    @property
+    def zone_members(self) -> list[str]:
+        """Return the room UDNs of the room's zone."""
+        return self._data.get("zoneMembers") or []
+
+    @property
+    def source_switching_supported(self) -> bool:
+        """Return True if the room's device has a "Source Select" setting."""
+        # Older add-on versions don't report capabilities
+        return self._data.get("sourceSwitchingSupported", False)
+
+    @property
+    def line_in_supported(self) -> bool:
+        """Return True if the room's device has a standalone Line-in."""
+        return self._data.get("lineInSupported", False)
+
+    @property
+    def now_playing(self) -> dict[str, Any]:
+        """Return the room's playback state as reported by the add-on."""
+        return self._data.get("nowPlaying") or {}
+
+    @property
+    def power_state(self) -> str:
+        """Return the PowerState of the room's device."""
+        return self.now_playing.get("powerState", "ACTIVE")
+
+    @property
+    def current_source(self) -> str:
+        """Return the raw "Source Select" value."""
+        return self.now_playing.get("currentSource", "Raumfeld")
+
+
+class RaumfeldRoomStore:
+    """Discovers rooms once for all platforms and hands out room views.
+
+    Platforms register a new-rooms listener instead of each scanning every
+    "roomsChanged" message for unknown UDNs.
+    """
+
+    def __init__(self, client: RaumfeldApiClient) -> None:
+        """Initialize."""
+        self._client = client
+        self._known_udns: set[str] = set()
+        self._new_rooms_listeners: list[NewRoomsListener] = []
+        # Media player entity IDs by room UDN, for resolving zone members
+        self._media_player_ids: dict[str, str] = {}
+        # Entity state writes after room updates, and those skipped as unchanged
+        self.entity_writes = {"written": 0, "suppressed": 0}
+        client.register_listener(self._handle_rooms_changed, "roomsChanged")
+
+    @property
+    def rooms(self) -> list[RoomView]:
+        """Return views of all rooms currently known from the add-on."""
+        return [self._view(room) for room in self._client.rooms]
+
+    def get(self, udn: str) -> RoomView | None:
+        """Return a view of a room, or None if it is unknown."""
+        room = self._client.get_room(udn)
+        return self._view(room) if room is not None else None
+
+    @callback
+    def async_add_new_rooms_listener(
+        self, listener: NewRoomsListener
+    ) -> Callable[[], None]:
+        """Call listener with the known rooms now and with new rooms later.
+
+        Returns a function that removes the listener.
+        """
+        self._new_rooms_listeners.append(listener)
+        if known := self.rooms:
+            listener(known)
+
+        @callback
+        def remove() -> None:
+            if listener in self._new_rooms_listeners:
+                self._new_rooms_listeners.remove(listener)
+
+        return remove
+
+    @callback
+    def async_add_room_listener(
+        self, udn: str, listener: RoomViewListener
+    ) -> Callable[[], None]:
+        """Call listener with a view of the room whenever it changes.
+
+        Returns a function that removes the listener.
+        """
+
+        def handle_room(room: dict[str, Any]) -> None:
+            listener(self._view(room))
+
+        self._client.register_room_listener(udn, handle_room)
+        return lambda: self._client.unregister_room_listener(udn, handle_room)
+
+    @callback
+    def set_media_player_id(self, udn: str, entity_id: str) -> None:
+        """Record the entity ID of a room's media player."""
+        self._media_player_ids[udn] = entity_id
+
+    @callback
+    def remove_media_player_id(self, udn: str, entity_id: str) -> None:
+        """Forget a room's media player, unless the room has a newer one."""
+        if self._media_player_ids.get(udn) == entity_id:
+            del self._media_player_ids[udn]
+
+    def media_player_ids(self, udns: Iterable[str]) -> list[str]:
+        """Return the media player entity IDs of the given rooms that have one."""
+        ids = self._media_player_ids
+        return [ids[udn] for udn in udns if udn in ids]
+
+    @callback
+    def record_entity_write(self, suppressed: bool) -> None:
+        """Count an entity state write, or one skipped because nothing changed."""
+        self.entity_writes["suppressed" if suppressed else "written"] += 1
+
+    @callback
+    def close(self) -> None:
+        """Stop tracking the client's rooms."""
+        self._client.unregister_listener(self._handle_rooms_changed, "roomsChanged")
+        self._new_rooms_listeners.clear()
+
+    def _view(self, room: dict[str, Any]) -> RoomView:
+        """Return a view of a mirrored room."""
+        return RoomView(room, self._client.stale)
+
+    @callback
+    def _handle_rooms_changed(self, data: dict[str, Any]) -> None:
+        """Announce rooms seen for the first time."""
+        new_rooms = [
+            self._view(room)
+            for room in data["payload"]
+            if room["udn"] not in self._known_udns
+        ]
+        if not new_rooms:
+            return
+
+        self._known_udns.update(room.udn for room in new_rooms)
+        _LOGGER.debug("Discovered rooms: %s", [room.name for room in new_rooms])
+        for listener in list(self._new_rooms_listeners):
+            listener(new_rooms)
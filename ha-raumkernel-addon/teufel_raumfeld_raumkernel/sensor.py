@@ -3,15 +3,17 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from . import RaumfeldData
 from .api import RaumfeldApiClient
 from .const import DOMAIN
+from .entity import RaumfeldRoomEntity
+from .room_store import RaumfeldRoomStore, RoomView
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,47 +35,30 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Raumfeld sensors."""
-    client: RaumfeldApiClient = hass.data[DOMAIN][entry.entry_id]
-
-    known_udns = set()
+    data: RaumfeldData = hass.data[DOMAIN][entry.entry_id]
 
     @callback
-    def handle_message(data: dict[str, Any]) -> None:
-        if data.get("type") in ("zones", "zoneStateChanged"):
-            rooms = data.get("payload", [])
-        elif data.get("type") == "fullStateUpdate":
-            rooms = data.get("payload", {}).get("availableRooms", [])
-        else:
-            return
-
-        new_entities = []
-        for room in rooms:
-            if room["udn"] not in known_udns:
-                known_udns.add(room["udn"])
-                new_entities.append(RaumfeldPowerStatusSensor(client, room))
-                new_entities.append(RaumfeldInputSensor(client, room))
-
-        if new_entities:
-            async_add_entities(new_entities)
-
-    client.register_listener(handle_message)
+    def add_new_rooms(rooms: list[RoomView]) -> None:
+        async_add_entities(
+            entity_class(data.client, data.rooms, room)
+            for room in rooms
+            for entity_class in (RaumfeldPowerStatusSensor, RaumfeldInputSensor)
+        )
 
-    # Trigger initial fetch if already connected
-    if client.connected:
-        hass.async_create_task(client.get_zones())
+    entry.async_on_unload(data.rooms.async_add_new_rooms_listener(add_new_rooms))
 
 
-class RaumfeldSensorBase(SensorEntity):
+class RaumfeldSensorBase(RaumfeldRoomEntity, SensorEntity):
     """Base class for Raumfeld room sensors."""
 
     _attr_has_entity_name = True
 
-    def __init__(self, client: RaumfeldApiClient, room_data: dict[str, Any]) -> None:
+    def __init__(
+        self, client: RaumfeldApiClient, rooms: RaumfeldRoomStore, room: RoomView
+    ) -> None:
         """Initialize."""
-        self._client = client
-        self._udn = room_data["udn"]
-        self._room_name = room_data.get("name")
-        self.update_state(room_data)
+        self._room_name = room.name
+        super().__init__(client, rooms, room)
 
     @property
     def device_info(self):
@@ -85,33 +70,9 @@ class RaumfeldSensorBase(SensorEntity):
             "model": "Raumfeld Room",
         }
 
-    async def async_added_to_hass(self) -> None:
-        """Run when this Entity has been added to HA."""
-        self._client.register_listener(self._handle_event)
-
-    async def async_will_remove_from_hass(self) -> None:
-        """Run when this Entity is being removed from HA."""
-        self._client.unregister_listener(self._handle_event)
-
-    @callback
-    def _handle_event(self, data: dict[str, Any]) -> None:
-        """Handle incoming events."""
-        if data.get("type") in ("zones", "zoneStateChanged"):
-            rooms = data.get("payload", [])
-        elif data.get("type") == "fullStateUpdate":
-            rooms = data.get("payload", {}).get("availableRooms", [])
-        else:
-            return
-
-        for room in rooms:
-            if room["udn"] == self._udn:
-                self.update_state(room)
-                self.async_write_ha_state()
-                break
-
-    def update_state(self, room_data: dict[str, Any]) -> None:
-        """Update state from data. Implemented by subclasses."""
-        raise NotImplementedError
+    def state_fingerprint(self) -> tuple:
+        """Return the values this entity exposes."""
+        return (self._attr_available, self._attr_native_value)
 
 
 class RaumfeldPowerStatusSensor(RaumfeldSensorBase):
@@ -120,17 +81,18 @@ class RaumfeldPowerStatusSensor(RaumfeldSensorBase):
     _attr_icon = "mdi:power"
     _attr_name = "Power status"
 
-    def __init__(self, client: RaumfeldApiClient, room_data: dict[str, Any]) -> None:
+    def __init__(
+        self, client: RaumfeldApiClient, rooms: RaumfeldRoomStore, room: RoomView
+    ) -> None:
         """Initialize."""
-        super().__init__(client, room_data)
+        super().__init__(client, rooms, room)
         self._attr_unique_id = f"{self._udn}_power_status"
 
-    def update_state(self, room_data: dict[str, Any]) -> None:
+    def update_state(self, room: RoomView) -> None:
         """Update state from data."""
-        self._attr_available = True
+        self._attr_available = not room.stale
 
-        now_playing = room_data.get("nowPlaying", {})
-        power_state = now_playing.get("powerState", "ACTIVE")
+        power_state = room.power_state
 
         if power_state == "MANUAL_STANDBY":
             self._attr_native_value = "Off"
@@ -148,17 +110,18 @@ class RaumfeldInputSensor(RaumfeldSensorBase):
     _attr_icon = "mdi:import"
     _attr_name = "Input"
 
-    def __init__(self, client: RaumfeldApiClient, room_data: dict[str, Any]) -> None:
+    def __init__(
+        self, client: RaumfeldApiClient, rooms: RaumfeldRoomStore, room: RoomView
+    ) -> None:
         """Initialize."""
-        super().__init__(client, room_data)
+        super().__init__(client, rooms, room)
         self._attr_unique_id = f"{self._udn}_input"
 
-    def update_state(self, room_data: dict[str, Any]) -> None:
+    def update_state(self, room: RoomView) -> None:
         """Update state from data."""
-        self._attr_available = True
+        self._attr_available = not room.stale
 
-        now_playing = room_data.get("nowPlaying", {})
-        current_source = now_playing.get("currentSource", "Raumfeld")
+        current_source = room.current_source
 
         self._attr_native_value = _SOURCE_RAW_TO_DISPLAY.get(
             current_source, current_source
@@ -0,0 +1,254 @@
+"""Tests for the Raumkernel add-on API client."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("homeassistant")
+
+from custom_components.teufel_raumfeld_raumkernel import api  # noqa: E402
+
+
+class FakeWebSocket:
+    """WebSocket that accepts commands and never answers."""
+
+    closed = False
+    protocol = None
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.sent: list[dict] = []
+
+    async def send_json(self, data: dict) -> None:
+        """Record a sent command."""
+        self.sent.append(data)
+
+    async def close(self) -> None:
+        """Close the connection."""
+        self.closed = True
+
+
+def test_deltas_leave_the_received_messages_untouched() -> None:
+    """The mirror must not alias or modify the dicts of received messages."""
+
+    async def run() -> None:
+        client = api.RaumfeldApiClient("localhost")
+        snapshot = {
+            "type": "fullStateUpdate",
+            "version": 1,
+            "payload": {
+                "availableRooms": [
+                    {"udn": "room-1", "name": "Kitchen", "nowPlaying": {"volume": 20}}
+                ]
+            },
+        }
+        delta = {
+            "type": "stateDelta",
+            "payload": {
+                "baseVersion": 1,
+                "version": 2,
+                "rooms": {
+                    "room-1": {"nowPlaying": {"volume": 30}},
+                    "room-2": {"udn": "room-2", "nowPlaying": {"volume": 10}},
+                },
+                "removed": [],
+            },
+        }
+        client._dispatch_event(snapshot)
+        client._dispatch_event(delta)
+
+        assert client._rooms["room-1"]["nowPlaying"] == {"volume": 30}
+        assert snapshot["payload"]["availableRooms"][0]["nowPlaying"] == {"volume": 20}
+        assert delta["payload"]["rooms"]["room-1"] == {"nowPlaying": {"volume": 30}}
+
+        client._dispatch_event(
+            {
+                "type": "stateDelta",
+                "payload": {
+                    "baseVersion": 2,
+                    "version": 3,
+                    "rooms": {"room-2": {"nowPlaying": {"volume": 15}}},
+                    "removed": [],
+                },
+            }
+        )
+        assert client._rooms["room-2"]["nowPlaying"] == {"volume": 15}
+        assert delta["payload"]["rooms"]["room-2"]["nowPlaying"] == {"volume": 10}
+
+    asyncio.run(run())
+
+
+def test_delta_applies_after_snapshot_request_timed_out(monkeypatch) -> None:
+    """A failed resync must not freeze the room mirror."""
+    monkeypatch.setattr(api, "DEFAULT_COMMAND_TIMEOUT", 0.01)
+
+    async def run() -> None:
+        client = api.RaumfeldApiClient("localhost")
+        client._ws = FakeWebSocket()
+        client._server_features = {"ack"}
+        client._apply_snapshot([{"udn": "room-1", "name": "Kitchen"}], 1)
+
+        # Version gap: the client requests a snapshot, which times out
+        client._handle_message(
+            {
+                "type": "stateDelta",
+                "payload": {"baseVersion": 5, "version": 6, "rooms": {}},
+            }
+        )
+        assert client._resync_pending
+        await asyncio.sleep(0.1)
+        assert client._ws.sent[0]["command"] == "getZones"
+        assert not client._resync_pending
+
+        client._handle_message(
+            {
+                "type": "stateDelta",
+                "payload": {
+                    "baseVersion": 1,
+                    "version": 2,
+                    "rooms": {"room-1": {"name": "Living room"}},
+                },
+            }
+        )
+        assert client._rooms["room-1"]["name"] == "Living room"
+        assert client._state_version == 2
+
+    asyncio.run(run())
+
+
+def test_batch_timeout_follows_the_slowest_renderer() -> None:
+    """Operations on different renderers run in parallel on the add-on."""
+
+    async def run() -> None:
+        client = api.RaumfeldApiClient("localhost")
+        client._apply_snapshot(
+            [
+                {"udn": "room-1", "currentZoneUdn": "zone-1"},
+                {"udn": "room-2", "currentZoneUdn": "zone-1"},
+                {"udn": "room-3"},
+            ],
+            1,
+        )
+
+        # room-1 and room-2 share the zone renderer, room-3 runs in parallel
+        timeout = client._batch_timeout(
+            [
+                ("joinGroup", {"roomUdn": "room-1"}),
+                ("pause", {"roomUdn": "room-2"}),
+                ("pause", {"roomUdn": "room-3"}),
+            ]
+        )
+        assert timeout == 40.0
+
+        many = [("joinGroup", {"roomUdn": f"room-{i}"}) for i in range(100)]
+        assert client._batch_timeout(many) == api.BATCH_MAX_TIMEOUT
+
+    asyncio.run(run())
+
+
+class FakeSession:
+    """Session whose connections are accepted and dropped right away."""
+
+    closed = False
+
+    async def ws_connect(self, *args, **kwargs) -> FakeWebSocket:
+        """Return a connected WebSocket."""
+        return FakeWebSocket()
+
+
+def test_reconnect_backs_off_when_connections_drop_right_away() -> None:
+    """The reconnect delay only starts over after a stable connection."""
+    attempts: list[int] = []
+
+    def reconnect_delay(attempt: int) -> float:
+        if len(attempts) == 4:
+            raise asyncio.CancelledError
+        attempts.append(attempt)
+        return 0
+
+    async def return_immediately() -> None:
+        return None
+
+    async def run() -> None:
+        client = api.RaumfeldApiClient("localhost", session=FakeSession())
+        client._reconnect_delay = reconnect_delay
+        client._receive_hello = return_immediately
+        client._listen = return_immediately
+        with pytest.raises(asyncio.CancelledError):
+            await client.connect()
+
+    asyncio.run(run())
+    assert attempts == [0, 1, 2, 3]
+
+
+def test_rooms_update_when_the_addon_state_is_no_longer_stale() -> None:
+    """Restored rooms are stale until a delta clears the flag."""
+
+    async def run() -> None:
+        client = api.RaumfeldApiClient("localhost")
+        updates: list[dict] = []
+        client.register_room_listener("room-1", updates.append)
+
+        client._handle_message(
+            {
+                "type": "fullStateUpdate",
+                "version": 1,
+                "payload": {
+                    "stale": True,
+                    "availableRooms": [{"udn": "room-1", "name": "Kitchen"}],
+                },
+            }
+        )
+        assert client.stale
+        assert len(updates) == 1
+
+        # The live room equals the restored one, only the flag changes
+        client._handle_message(
+            {
+                "type": "stateDelta",
+                "payload": {
+                    "baseVersion": 1,
+                    "version": 2,
+                    "stale": False,
+                    "rooms": {},
+                },
+            }
+        )
+        assert not client.stale
+        assert len(updates) == 2
+
+    asyncio.run(run())
+
+
+def test_browse_page_tells_whether_more_children_follow() -> None:
+    """Older add-ons don't send hasMore; it then follows from the total."""
+
+    async def run() -> None:
+        client = api.RaumfeldApiClient("localhost")
+        client._server_features = {"browsePaging"}
+        pages: dict[str, dict] = {
+            "0/Unknown size": {"items": [{}] * 2, "totalMatches": 2, "hasMore": True},
+            "0/Before hasMore": {"items": [{}] * 2, "totalMatches": 5},
+        }
+
+        async def send_command(command: str, payload: dict) -> dict:
+            return pages[payload["objectId"]]
+
+        client.send_command = send_command
+        _, total, has_more = await client.browse_page("0/Unknown size", 0, 2)
+        assert (total, has_more) == (2, True)
+        _, total, has_more = await client.browse_page("0/Before hasMore", 3, 2)
+        assert (total, has_more) == (5, False)
+
+        client._server_features = set()
+        client._browse_cache.invalidate()
+
+        async def request_browse(object_id: str) -> list[dict]:
+            return [{}] * 5
+
+        client._request_browse = request_browse
+        assert (await client.browse_page("0", 2, 2))[2]
+        assert not (await client.browse_page("0", 3, 2))[2]
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+"""Tests for the browse result cache."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.teufel_raumfeld_raumkernel import browse_cache  # noqa: E402
+
+
+def test_fetch_started_after_invalidation_does_not_join_the_stale_fetch() -> None:
+    """Callers after an invalidation get a fresh fetch, which is then cached."""
+
+    async def run() -> None:
+        cache = browse_cache.BrowseCache()
+        stale_release = asyncio.Event()
+
+        async def load_stale() -> str:
+            await stale_release.wait()
+            return "old"
+
+        async def load_fresh() -> str:
+            return "new"
+
+        async def not_loaded() -> str:
+            raise AssertionError("fetched again")
+
+        before = asyncio.create_task(cache.fetch("0/Favorites", load_stale, 0))
+        await asyncio.sleep(0)
+        cache.invalidate(["0/Favorites"])
+        after = asyncio.create_task(cache.fetch("0/Favorites", load_fresh, 0))
+
+        assert await asyncio.wait_for(after, 1) == "new"
+        stale_release.set()
+        assert await before == "old"
+        assert await cache.fetch("0/Favorites", not_loaded, 0) == "new"
+        assert cache.stats["deduplicated"] == 0
+
+    asyncio.run(run())
+
+
+def test_invalidation_drops_every_page_of_a_container() -> None:
+    """Other containers stay cached."""
+
+    async def run() -> None:
+        cache = browse_cache.BrowseCache()
+        loads: list[tuple[str, int]] = []
+
+        def loader(object_id: str, page: int):
+            async def load() -> str:
+                loads.append((object_id, page))
+                return f"{object_id}@{page}"
+
+            return load
+
+        for object_id, page in (("0/Favorites", 0), ("0/Favorites", 50), ("0", 0)):
+            await cache.fetch(object_id, loader(object_id, page), page)
+        cache.invalidate(["0/Favorites"])
+        for object_id, page in (("0/Favorites", 0), ("0/Favorites", 50), ("0", 0)):
+            await cache.fetch(object_id, loader(object_id, page), page)
+
+        assert loads[3:] == [("0/Favorites", 0), ("0/Favorites", 50)]
+
+    asyncio.run(run())